@@ -67,7 +67,7 @@ qx.Class.define("sar.io.Resources", {
           },
           getDistribution: {
             method: "GET",
-            url: "/training-set-generation/distribution?timestamp={timestamp}"
+            url: "/training-set-generation/distribution"
           },
           resetData: {
             method: "GET",
@@ -109,15 +109,15 @@ qx.Class.define("sar.io.Resources", {
           },
           getSemivariogram: {
             method: "GET",
-            url: "/analysis-creation/variogram?timestamp={timestamp}"
+            url: "/analysis-creation/variogram"
           },
           getMarginals: {
             method: "GET",
-            url: "/analysis-creation/marginals?timestamp={timestamp}"
+            url: "/analysis-creation/marginals"
           },
           getDeviations: {
             method: "GET",
-            url: "/analysis-creation/deviations?timestamp={timestamp}"
+            url: "/analysis-creation/deviations"
           },
           getReport: {
             method: "GET",
@@ -167,7 +167,7 @@ qx.Class.define("sar.io.Resources", {
           },
           getDistribution: {
             method: "GET",
-            url: "/test-set-generation/distribution?timestamp={timestamp}"
+            url: "/test-set-generation/distribution"
           },
           resetData: {
             method: "GET",
@@ -201,11 +201,11 @@ qx.Class.define("sar.io.Resources", {
           },
           getQQPlot: {
             method: "GET",
-            url: "/confirm-model/qqplot?timestamp={timestamp}"
+            url: "/confirm-model/qqplot"
           },
           getDeviations: {
             method: "GET",
-            url: "/confirm-model/deviations?timestamp={timestamp}"
+            url: "/confirm-model/deviations"
           },
           getReport: {
             method: "GET",
@@ -228,7 +228,7 @@ qx.Class.define("sar.io.Resources", {
           },
           getDistribution: {
             method: "GET",
-            url: "/search-space/distribution?timestamp={timestamp}"
+            url: "/search-space/distribution"
           },
         }
       },
@@ -258,7 +258,7 @@ qx.Class.define("sar.io.Resources", {
           },
           getDeviations: {
             method: "GET",
-            url: "/verify/deviations?timestamp={timestamp}"
+            url: "/verify/deviations"
           },
           getReport: {
             method: "GET",
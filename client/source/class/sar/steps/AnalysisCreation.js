@@ -256,20 +256,17 @@ qx.Class.define("sar.steps.AnalysisCreation", {
 
     __populateSemivariogramImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("analysisCreation");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getSemivariogram"].url);
-      this.__semivariogramImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__semivariogramImage, endpoints["getSemivariogram"].url);
     },
 
     __populateMarginalsImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("analysisCreation");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getMarginals"].url);
-      this.__marginalsImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__marginalsImage, endpoints["getMarginals"].url);
     },
 
     __populateDeviationsImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("analysisCreation");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getDeviations"].url);
-      this.__deviationsImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__deviationsImage, endpoints["getDeviations"].url);
     },
 
     __modelExported: function(data) {
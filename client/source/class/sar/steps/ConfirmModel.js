@@ -236,14 +236,12 @@ qx.Class.define("sar.steps.ConfirmModel", {
 
     __populateQQImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("confirmModel");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getQQPlot"].url);
-      this.__qqImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__qqImage, endpoints["getQQPlot"].url);
     },
 
     __populateDeviationsImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("confirmModel");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getDeviations"].url);
-      this.__deviationsImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__deviationsImage, endpoints["getDeviations"].url);
     },
 
     __resetValueLabels: function() {
@@ -170,8 +170,7 @@ qx.Class.define("sar.steps.SearchSpace", {
 
     __populateDistributionImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("searchSpace");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getDistribution"].url);
-      this.__distributionImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__distributionImage, endpoints["getDistribution"].url);
     },
 
     __searchSpaceExported: function(data) {
@@ -158,21 +158,17 @@ qx.Class.define("sar.steps.TestSetGeneration", {
     },
 
     __fetchResults: function() {
-      sar.io.Resources.fetch("testSetGeneration", "getData")
-        .then(data => this.__popoluateTable(data))
+      // the sample may be large: its rows are fetched by pages, as they are shown
+      const endpoints = sar.io.Resources.getEndPoints("testSetGeneration");
+      sar.steps.Utils.populateRemoteDataTable(this._dataTable, endpoints["getData"].url)
         .catch(err => console.error(err));
 
       this.__populateDistributionImage();
     },
 
-    __popoluateTable: function(data) {
-      sar.steps.Utils.populateDataTable(this._dataTable, data);
-    },
-
     __populateDistributionImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("testSetGeneration");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getDistribution"].url);
-      this.__distributionImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__distributionImage, endpoints["getDistribution"].url);
     },
 
     __testDataExported: function(data) {
@@ -14,6 +14,7 @@
 /**
  * @ignore(fetch)
  * @ignore(Headers)
+ * @ignore(URL)
  */
 
 qx.Class.define("sar.steps.Utils", {
@@ -127,9 +128,30 @@ qx.Class.define("sar.steps.Utils", {
       }
     },
 
+    /**
+     * Fills the table with a dataset served by pages (see sar.widget.DatasetTableModel),
+     * fetching only the rows scrolled into view
+     */
+    populateRemoteDataTable: function(table, url) {
+      // headings, before any row is asked for
+      return sar.widget.DatasetTableModel.fetchPage(url, 0, 1)
+        .then(page => {
+          const headings = page.headings || [];
+          const tableModel = new sar.widget.DatasetTableModel(url, headings);
+          tableModel.setColumns(headings.map(headerId => this.__getAliasFromId(headerId)), headings);
+          table.setTableModel(tableModel);
+          for (let i=0; i<headings.length; i++) {
+            table.setColumnWidth(i, 70);
+          }
+        });
+    },
+
     emptyDataTable: function(table) {
-      if (table.getTableModel()) {
-        table.getTableModel().setData([]);
+      const tableModel = table.getTableModel();
+      if (tableModel instanceof sar.widget.DatasetTableModel) {
+        table.setTableModel(new qx.ui.table.model.Simple());
+      } else if (tableModel) {
+        tableModel.setData([]);
       }
     },
 
@@ -438,8 +460,29 @@ qx.Class.define("sar.steps.Utils", {
       return image;
     },
 
-    setTimestampOnQuery: function(url) {
-      return url.replace("{timestamp}", Date.now());
+    /**
+     * Plots are served with their ETag: the url of a plot does not change, the
+     * browser revalidates its copy and only downloads the plot again if it changed.
+     */
+    populateImage: function(image, url) {
+      fetch(url, {
+        cache: "no-cache",
+        credentials: "same-origin"
+      })
+        .then(resp => {
+          if (!resp.ok) {
+            throw Error(`Error while fetching ${url}`);
+          }
+          return resp.blob();
+        })
+        .then(blob => {
+          const previous = image.getSource();
+          image.setSource(URL.createObjectURL(blob));
+          if (previous && previous.startsWith("blob:")) {
+            URL.revokeObjectURL(previous);
+          }
+        })
+        .catch(err => console.error(err));
     },
 
     createGenerateReportButton: function(resourceName, filename) {
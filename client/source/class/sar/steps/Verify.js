@@ -167,8 +167,7 @@ qx.Class.define("sar.steps.Verify", {
 
     __populateDeviationsImage: function() {
       const endpoints = sar.io.Resources.getEndPoints("verify");
-      const url = sar.steps.Utils.setTimestampOnQuery(endpoints["getDeviations"].url);
-      this.__deviationsImage.setSource(url);
+      sar.steps.Utils.populateImage(this.__deviationsImage, endpoints["getDeviations"].url);
     },
 
     resetResults: function() {
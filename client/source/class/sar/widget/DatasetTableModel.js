@@ -0,0 +1,89 @@
+/* ************************************************************************
+
+   Copyright:
+     2023 IT'IS Foundation, https://itis.swiss
+
+   License:
+     MIT: https://opensource.org/licenses/MIT
+
+************************************************************************ */
+
+/**
+ * Table model of a dataset served by pages: rows are fetched with offset and
+ * limit as they are scrolled into view, the row count comes from X-Total-Count.
+ *
+ * @ignore(fetch)
+ */
+
+qx.Class.define("sar.widget.DatasetTableModel", {
+  extend: qx.ui.table.model.Remote,
+
+  /**
+   * @param url {String} data endpoint of the dataset
+   * @param headings {Array} column ids, in the order of the rows
+   */
+  construct: function(url, headings) {
+    this.base(arguments);
+
+    this.__url = url;
+    this.__headings = headings;
+    this.setBlockSize(this.self().PAGE_ROWS);
+  },
+
+  statics: {
+    PAGE_ROWS: 200,
+
+    fetchPage: function(url, offset, limit) {
+      return fetch(`${url}?offset=${offset}&limit=${limit}`, {
+        cache: "no-cache",
+        credentials: "same-origin",
+        headers: {
+          "Accept": "application/json"
+        }
+      })
+        .then(resp => {
+          if (!resp.ok) {
+            throw Error(`Error while fetching ${url}`);
+          }
+          const total = parseInt(resp.headers.get("X-Total-Count"));
+          return resp.json().then(data => ({
+            total: isNaN(total) ? data["rows"].length : total,
+            headings: data["headings"],
+            rows: data["rows"]
+          }));
+        });
+    }
+  },
+
+  members: {
+    __url: null,
+    __headings: null,
+
+    // overridden
+    _loadRowCount: function() {
+      this.self().fetchPage(this.__url, 0, 1)
+        .then(page => this._onRowCountLoaded(page.total))
+        .catch(err => {
+          console.error(err);
+          this._onRowCountLoaded(0);
+        });
+    },
+
+    // overridden
+    _loadRowData: function(firstRowIndex, lastRowIndex) {
+      const limit = lastRowIndex - firstRowIndex + 1;
+      this.self().fetchPage(this.__url, firstRowIndex, limit)
+        .then(page => this._onRowDataLoaded(page.rows.map(row => this.__toMap(row))))
+        .catch(err => {
+          console.error(err);
+          this._onRowDataLoaded(null);
+        });
+    },
+
+    __toMap: function(row) {
+      const rowData = {};
+      this.__headings.forEach((heading, idx) => rowData[heading] = row[idx]);
+      return rowData;
+    }
+  }
+});
@@ -0,0 +1,61 @@
+"""Report figures: rendered one after another vs in a pool of processes
+
+python -m benchmarks.bench_figures [sizes...]
+"""
+
+import io
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from iec62209_service.reports import figures
+from iec62209_service.utils.common import ModelInterface, SampleInterface
+
+from .synthetic import measured_csv
+
+
+def creation_figures(size: int) -> figures.Figures:
+    model = ModelInterface(SampleInterface())
+    model.load_init_sample(io.BytesIO(measured_csv(size)))
+    model.make_model()
+    training_set = model.samples.trainingSet
+    return {
+        "distribution.png": (training_set, "plot_distribution"),
+        "acceptance.png": (training_set, "plot_deviations"),
+        "semivariogram.png": (model, "plot_model"),
+        "marginals.png": (training_set, "plot_marginals"),
+    }
+
+
+def timeit(figs: figures.Figures, parallel: bool, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        with TemporaryDirectory() as tmp:
+            start = perf_counter()
+            figures.render_figures(Path(tmp), figs, parallel=parallel)
+            best = min(best, perf_counter() - start)
+    return best
+
+
+def main(sizes: list[int], repeat: int = 3):
+    # with a single CPU, render_figures renders in place: no speedup to expect
+    print(f"available CPUs: {figures.available_cpus()}")
+    print(f"{'rows':>8} {'serial [s]':>11} {'parallel [s]':>13} {'speedup':>8}")
+    try:
+        for size in sizes:
+            figs = creation_figures(size)
+            # the pool is started once per server: leave its start out
+            timeit(figs, True, 1)
+            serial = timeit(figs, False, repeat)
+            parallel = timeit(figs, True, repeat)
+            print(
+                f"{size:>8} {serial:>11.2f} {parallel:>13.2f} "
+                f"{serial / parallel:>7.1f}x"
+            )
+    finally:
+        figures.shutdown()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [50, 400])
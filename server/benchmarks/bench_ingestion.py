@@ -0,0 +1,60 @@
+"""Upload ingestion: temp-file round trips vs parsing the upload stream once
+
+python -m benchmarks.bench_ingestion [sizes...]
+"""
+
+import io
+import sys
+from os import remove
+from tempfile import NamedTemporaryFile
+from time import perf_counter
+
+from iec62209.work import Sample, add_zvar, load_measured_sample
+from iec62209_service.utils.ingestion import XVAR, ZVAR, read_measured_sample
+
+from .synthetic import measured_csv
+
+
+def legacy_ingest(upload: io.BytesIO) -> Sample:
+    """the former upload path: line count, two temp files and three csv passes"""
+    if len([x for x in upload.readlines() if x.strip()]) < 2:
+        raise Exception("Empty data set")
+    upload.seek(0)
+    tmp = NamedTemporaryFile(delete=False)
+    tmp.write(upload.read())
+    tmp.close()
+    tmp2 = NamedTemporaryFile(delete=False)
+    try:
+        measured = load_measured_sample(tmp.name)
+        add_zvar(measured, "10g")
+        measured.data.to_csv(tmp2.name, float_format="%.6g", index=False)
+        return Sample.from_csv(tmp2.name, xvar=XVAR, zvar=ZVAR)
+    finally:
+        remove(tmp.name)
+        remove(tmp2.name)
+
+
+def timeit(fn, content: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        upload = io.BytesIO(content)
+        start = perf_counter()
+        fn(upload)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main(sizes: list[int], repeat: int = 3):
+    print(f"{'rows':>8} {'legacy [ms]':>12} {'stream [ms]':>12} {'speedup':>8}")
+    for size in sizes:
+        content = measured_csv(size)
+        legacy = timeit(legacy_ingest, content, repeat)
+        stream = timeit(read_measured_sample, content, repeat)
+        print(
+            f"{size:>8} {legacy * 1e3:>12.1f} {stream * 1e3:>12.1f} "
+            f"{legacy / stream:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000])
@@ -0,0 +1,72 @@
+"""Model files: JSON vs the npz container, size and load time
+
+A model is fitted to a synthetic training sample of each size, exported in both
+formats, then loaded the way /model/load does: Work.load_model on the JSON
+file, Model.from_json on the decoded npz. The round trips themselves are
+checked by tests/test_modelformat.py.
+
+python -m benchmarks.bench_model_format [sizes...]
+"""
+
+import io
+import sys
+from json import dumps as jdumps
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from iec62209_service.utils.common import ModelInterface, ModelMetadata, SampleInterface
+
+from .synthetic import MODEL_METADATA, measured_csv
+
+
+def fitted_model(size: int) -> ModelInterface:
+    model = ModelInterface(SampleInterface())
+    model.load_init_sample(io.BytesIO(measured_csv(size)))
+    model.make_model()
+    model.set_metadata(ModelMetadata(**MODEL_METADATA))
+    return model
+
+
+def load_json(path: Path):
+    ModelInterface(SampleInterface()).load_model_from_json(str(path))
+
+
+def load_npz(content: bytes):
+    ModelInterface(SampleInterface()).load_model_from_npz(io.BytesIO(content))
+
+
+def timeit(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        fn(arg)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main(sizes: list[int], repeat: int = 3):
+    print(
+        f"{'rows':>8} {'json [kB]':>10} {'npz [kB]':>9} "
+        f"{'json [ms]':>10} {'npz [ms]':>9} {'speedup':>8}"
+    )
+    for size in sizes:
+        model = fitted_model(size)
+        as_json = jdumps(model.dump_model_to_json()).encode()
+        as_npz = model.dump_model_to_npz()
+
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "model.json"
+            path.write_bytes(as_json)
+            json_time = timeit(load_json, path, repeat)
+        npz_time = timeit(load_npz, as_npz, repeat)
+
+        print(
+            f"{size:>8} {len(as_json) / 1024:>10.0f} {len(as_npz) / 1024:>9.0f} "
+            f"{json_time * 1e3:>10.1f} {npz_time * 1e3:>9.1f} "
+            f"{json_time / npz_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000])
@@ -0,0 +1,313 @@
+"""The ModelInterface pipeline and the HTTP routes, stage by stage
+
+Every stage (ingestion, from_dataframe, make_model, goodfit, residuals,
+explore, each plot and each report) is timed on synthetic measured data of
+each size, then the routes are timed through an in-process test client, with a
+fresh application per repetition so that caches start cold. Stages that need a
+model are skipped above --model-rows-max rows.
+
+Results are saved as JSON, with the versions they were measured with, so that
+runs of different versions can be compared:
+
+python -m benchmarks.bench_pipeline [sizes...] [--output FILE]
+python -m benchmarks.bench_pipeline --compare BASELINE CURRENT
+"""
+
+import argparse
+import io
+import os
+import platform
+import sys
+from collections.abc import Callable
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+from json import dump as jdump
+from json import load as jload
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+
+from iec62209_service._meta import info
+from iec62209_service.reports.builder import render_report
+from iec62209_service.reports.texutils import ReportBackend, ReportStage
+from iec62209_service.utils.common import (
+    DataSetInterface,
+    ModelInterface,
+    ModelMetadata,
+    SampleInterface,
+)
+from iec62209_service.utils.ingestion import read_measured_sample
+
+from .synthetic import measured_csv
+
+SIZES = [50, 1_000, 10_000, 100_000]
+
+METADATA = {
+    "systemName": "benchmark",
+    "phantomType": "flat",
+    "hardwareVersion": "1",
+    "softwareVersion": "1",
+    "acceptanceCriteria": "pass",
+    "normalizedRMSError": "10",
+    "modelAreaX": "80",
+    "modelAreaY": "160",
+}
+
+
+class Recorder:
+    def __init__(self, suite: str, size: int, repeat: int):
+        self.suite = suite
+        self.size = size
+        self.repeat = repeat
+        self.results: list[dict] = []
+
+    def record(self, name: str, seconds: float | None, status: str, detail=""):
+        self.results.append(
+            {
+                "suite": self.suite,
+                "size": self.size,
+                "name": name,
+                "seconds": seconds,
+                "status": status,
+                "detail": detail,
+            }
+        )
+        shown = "-" if seconds is None else f"{seconds * 1e3:.1f} ms"
+        print(f"{self.suite:>7} {self.size:>8} {name:<40} {shown:>12} {status}")
+
+    def time(self, name: str, fn: Callable[[], Any], repeat: int | None = None) -> Any:
+        """best time of fn, None if it failed"""
+        best, result = float("inf"), None
+        try:
+            for _ in range(repeat or self.repeat):
+                start = perf_counter()
+                result = fn()
+                best = min(best, perf_counter() - start)
+        except Exception as e:  # pylint: disable=broad-except
+            self.record(name, None, "error", str(e))
+            return None
+        self.record(name, best, "ok")
+        return result
+
+    def skip(self, names: list[str], reason: str) -> None:
+        for name in names:
+            self.record(name, None, "skipped", reason)
+
+
+MODEL_STAGES = [
+    "make_model",
+    "goodfit_test",
+    "plot/training-distribution",
+    "plot/training-deviations",
+    "plot/training-marginals",
+    "plot/variogram",
+    "plot/goodfit",
+    "load_test_sample",
+    "compute_residuals",
+    "residuals_test",
+    "plot/residuals",
+    "plot/test-deviations",
+    "explore_space",
+    "plot/critical-distribution",
+] + [f"pdf/{stage.name.lower()}" for stage in ReportStage]
+
+
+def bench_stages(size: int, repeat: int, model_rows_max: int) -> list[dict]:
+    rec = Recorder("stages", size, repeat)
+    content = measured_csv(size)
+    sample = rec.time("ingestion", lambda: read_measured_sample(io.BytesIO(content)))
+    if sample is None:
+        return rec.results
+    rec.time("from_dataframe", lambda: DataSetInterface.from_dataframe(sample))
+
+    if size > model_rows_max:
+        rec.skip(MODEL_STAGES, f"more than {model_rows_max} rows")
+        return rec.results
+
+    model = ModelInterface(SampleInterface())
+    model.load_init_sample(io.BytesIO(content))
+    training_set = model.samples.trainingSet
+    rec.time("make_model", model.make_model)
+    rec.time("goodfit_test", model.goodfit_test)
+    model.set_metadata(ModelMetadata(**METADATA))
+    rec.time("plot/training-distribution", training_set.plot_distribution)
+    rec.time("plot/training-deviations", training_set.plot_deviations)
+    rec.time("plot/training-marginals", training_set.plot_marginals)
+    rec.time("plot/variogram", model.plot_model)
+    rec.time("plot/goodfit", model.goodfit_plot)
+
+    test_content = measured_csv(size, seed=1)
+    rec.time(
+        "load_test_sample",
+        lambda: model.load_test_sample(io.BytesIO(test_content)),
+    )
+    rec.time("compute_residuals", model.compute_residuals)
+    rec.time("residuals_test", model.residuals_test)
+    rec.time("plot/residuals", model.plot_residuals)
+    rec.time("plot/test-deviations", model.samples.testSet.plot_deviations)
+
+    # the costliest stage: once is enough
+    rec.time("explore_space", lambda: model.explore_space(seed=0), repeat=1)
+    rec.time("plot/critical-distribution", model.samples.criticalSet.plot_distribution)
+
+    for stage in ReportStage:
+        rec.time(f"pdf/{stage.name.lower()}", lambda: render_report(stage, model), 1)
+        rec.time(
+            f"pdf/{stage.name.lower()}/native",
+            lambda: render_report(stage, model, backend=ReportBackend.NATIVE),
+            1,
+        )
+    return rec.results
+
+
+def _routes(training: bytes, test: bytes) -> list[tuple[str, str, dict]]:
+    """(method, url, request arguments) in the order of the user interface"""
+    return [
+        ("post", "/training-data/load", {"files": {"file": ("t.csv", training)}}),
+        ("get", "/training-set-generation/data", {}),
+        ("post", "/analysis-creation/create", {}),
+        ("get", "/analysis-creation/variogram", {}),
+        ("get", "/analysis-creation/deviations", {}),
+        ("get", "/analysis-creation/marginals", {}),
+        ("post", "/analysis-creation/xport", {"json": METADATA}),
+        ("get", "/analysis-creation/pdf", {}),
+        ("post", "/test-data/load", {"files": {"file": ("t.csv", test)}}),
+        ("get", "/confirm-model/confirm", {}),
+        ("get", "/confirm-model/qqplot", {}),
+        ("get", "/confirm-model/deviations", {}),
+        ("get", "/confirm-model/pdf", {}),
+        ("post", "/search-space/search", {}),
+        ("get", "/search-space/data", {}),
+        ("get", "/search-space/distribution", {}),
+        ("get", "/verify/results", {}),
+        ("get", "/verify/deviations", {}),
+        ("get", "/verify/pdf", {}),
+    ]
+
+
+def bench_routes(size: int, repeat: int, model_rows_max: int) -> list[dict]:
+    rec = Recorder("routes", size, repeat)
+    routes = _routes(measured_csv(size), measured_csv(size, seed=1))
+    names = [f"{method.upper()} {url}" for method, url, _ in routes]
+    if size > model_rows_max:
+        rec.skip(names, f"more than {model_rows_max} rows")
+        return rec.results
+
+    # imported here: the application reads its settings from the environment
+    from fastapi.testclient import TestClient
+    from iec62209_service.application import create_app
+
+    timings: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, str] = {}
+    for _ in range(repeat):
+        with TemporaryDirectory() as tmp:
+            os.environ["ARTIFACTS_FOLDER"] = str(Path(tmp) / "artifacts")
+            os.environ["REPORTS_CACHE_FOLDER"] = str(Path(tmp) / "reports")
+            with TestClient(create_app()) as client:
+                for name, (method, url, kwargs) in zip(names, routes):
+                    start = perf_counter()
+                    response = getattr(client, method)(url, **kwargs)
+                    timings[name].append(perf_counter() - start)
+                    if response.status_code >= 400:
+                        errors[name] = f"HTTP {response.status_code}"
+
+    for name in names:
+        if name in errors:
+            rec.record(name, None, "error", errors[name])
+        else:
+            rec.record(name, min(timings[name]), "ok")
+    return rec.results
+
+
+def _kernel_version() -> str:
+    try:
+        return version("iec62209")
+    except PackageNotFoundError:
+        return ""
+
+
+def _client_output_dir(tmp: str) -> None:
+    # the application serves a client: an empty one does for benchmarks
+    if "CLIENT_OUTPUT_DIR" not in os.environ:
+        (Path(tmp) / "index.html").write_text("<html></html>")
+        os.environ["CLIENT_OUTPUT_DIR"] = tmp
+
+
+def run(sizes: list[int], repeat: int, model_rows_max: int, routes: bool) -> dict:
+    results = []
+    with TemporaryDirectory() as tmp:
+        _client_output_dir(tmp)
+        for size in sizes:
+            results += bench_stages(size, repeat, model_rows_max)
+            if routes:
+                results += bench_routes(size, repeat, model_rows_max)
+    return {
+        "service": info.__version__,
+        "kernel": _kernel_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_ms: float) -> int:
+    """prints the ratios of the times of current to baseline, returns regressions
+
+    Slowdowns by less than min_ms are noise, whatever their ratio
+    """
+    print(f"baseline {baseline['service']} ({baseline['date']})")
+    print(f"current  {current['service']} ({current['date']})")
+
+    def times(run: dict) -> dict:
+        return {
+            (r["suite"], r["size"], r["name"]): r["seconds"]
+            for r in run["results"]
+            if r["status"] == "ok"
+        }
+
+    before, after = times(baseline), times(current)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        ratio = after[key] / before[key] if before[key] > 0 else float("inf")
+        flag = ""
+        if ratio > threshold and (after[key] - before[key]) * 1e3 > min_ms:
+            flag = "REGRESSION"
+            regressions += 1
+        suite, size, name = key
+        print(
+            f"{suite:>7} {size:>8} {name:<40} {before[key] * 1e3:>10.1f} ms "
+            f"{after[key] * 1e3:>10.1f} ms {ratio:>6.2f}x {flag}"
+        )
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_pipeline")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--model-rows-max", type=int, default=10_000)
+    parser.add_argument("--no-routes", action="store_true")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", nargs=2, type=Path)
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--min-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        baseline, current = (jload(path.open()) for path in args.compare)
+        return 1 if compare(baseline, current, args.threshold, args.min_ms) else 0
+
+    report = run(args.sizes, args.repeat, args.model_rows_max, not args.no_routes)
+    output = args.output or Path(f"bench-pipeline-{report['service']}.json")
+    with output.open("w") as f:
+        jdump(report, f, indent=1)
+    print(f"saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
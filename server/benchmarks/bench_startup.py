@@ -0,0 +1,118 @@
+"""Cold start: import and creation of the app, and first healthy response
+
+Every measure runs in a fresh interpreter, as a restarted container would:
+ - import: importing the application module and creating the app
+ - first response: starting uvicorn until GET /meta answers
+The slowest modules to import are listed last (python -X importtime).
+
+python -m benchmarks.bench_startup [--repeat N] [--top N]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from urllib.error import URLError
+from urllib.request import urlopen
+
+IMPORT_APP = """
+from time import perf_counter
+start = perf_counter()
+from iec62209_service.application import create_app
+create_app()
+print(perf_counter() - start)
+"""
+
+
+def time_import(env: dict) -> float:
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_APP], env=env, text=True
+    )
+    return float(output.split()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_first_response(env: dict, timeout: float = 60.0) -> float:
+    port = _free_port()
+    start = perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "iec62209_service.main:the_app"]
+        + ["--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while perf_counter() - start < timeout:
+            try:
+                with urlopen(f"http://127.0.0.1:{port}/meta", timeout=1) as r:
+                    if r.status == 200:
+                        return perf_counter() - start
+            except (URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError("the server exited")
+                sleep(0.01)
+        raise TimeoutError(f"no response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def slowest_imports(env: dict, top: int) -> list[tuple[float, str]]:
+    """(cumulative seconds, module) of the modules slowest to import"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import iec62209_service.main"],
+        env=env,
+        capture_output=True,
+        text=True,
+    ).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                timings.append((int(cumulative) * 1e-6, module.rstrip()))
+    return sorted(timings, reverse=True)[:top]
+
+
+def _summary(name: str, times: list[float]) -> None:
+    print(
+        f"{name:<16} best {min(times) * 1e3:>8.0f} ms   "
+        f"median {statistics.median(times) * 1e3:>8.0f} ms"
+    )
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_startup")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    with TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        if "CLIENT_OUTPUT_DIR" not in env:
+            # the application serves a client: an empty one does for benchmarks
+            (Path(tmp) / "index.html").write_text("<html></html>")
+            env["CLIENT_OUTPUT_DIR"] = tmp
+
+        _summary("import", [time_import(env) for _ in range(args.repeat)])
+        _summary(
+            "first response", [time_first_response(env) for _ in range(args.repeat)]
+        )
+        print("\nslowest imports (cumulative)")
+        for seconds, module in slowest_imports(env, args.top):
+            print(f"{seconds * 1e3:>8.0f} ms {module}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,63 @@
+"""Synthetic measured data in the csv format expected by load_measured_sample"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+FREQUENCIES = [
+    300,
+    450,
+    750,
+    835,
+    900,
+    1450,
+    1750,
+    1950,
+    2300,
+    2450,
+    2600,
+    3500,
+    5200,
+    5800,
+]
+MODULATIONS = ["M1", "M2", "M5", "M12", "M23"]
+
+# as entered when exporting a model
+MODEL_METADATA = {
+    "systemName": "synthetic",
+    "phantomType": "flat",
+    "hardwareVersion": "1.0",
+    "softwareVersion": "1.0",
+    "acceptanceCriteria": "Pass",
+    "normalizedRMSError": "10.0 < 25% (Pass)",
+    "modelAreaX": "80",
+    "modelAreaY": "160",
+}
+
+
+def measured_dataframe(size: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frequency = rng.choice(FREQUENCIES, size)
+    return pd.DataFrame(
+        {
+            "antenna": [f"D{f}" for f in frequency],
+            "frequency": frequency,
+            "power": rng.integers(0, 31, size),
+            "modulation": rng.choice(MODULATIONS, size),
+            "par": rng.uniform(0.0, 10.0, size).round(1),
+            "bandwidth": rng.choice([0.0, 5.0, 20.0, 80.0, 100.0], size),
+            "distance": rng.choice([5, 10, 15, 25], size),
+            "angle": rng.integers(0, 24, size) * 15,
+            "x": rng.integers(-40, 41, size),
+            "y": rng.integers(-80, 81, size),
+            "sar10g": rng.uniform(0.05, 5.0, size).round(3),
+            "u10g": np.full(size, 0.25),
+        }
+    )
+
+
+def measured_csv(size: int, seed: int = 0) -> bytes:
+    buf = io.StringIO()
+    measured_dataframe(size, seed).to_csv(buf, index=False)
+    return buf.getvalue().encode()
@@ -38,7 +38,14 @@ SETUP = dict(
     },
     python_requires="~=3.10.0",
     install_requires=INSTALL_REQUIREMENTS,
+    extras_require={
+        # optional dataset encodings (see iec62209_service.utils.encoding)
+        "encodings": ["brotli", "msgpack", "pyarrow"],
+    },
     include_package_data=True,
+    entry_points={
+        "console_scripts": ["iec62209-batch = iec62209_service.batch:main"],
+    },
 )
 
 
@@ -1,13 +1,12 @@
 from contextlib import suppress
+from importlib.metadata import Distribution, distribution
 from typing import Final
 
-import pkg_resources
 from packaging.version import Version
-from pkg_resources import Distribution
 
 
 class PackageInfo:
-    """Thin wrapper around pgk_resources.Distribution to access package distribution metadata
+    """Thin wrapper around importlib.metadata.Distribution to access package distribution metadata
 
     Usage example:
 
@@ -25,11 +24,11 @@ class PackageInfo:
         """
         package_name: as defined in 'setup.name'
         """
-        self._distribution: Distribution = pkg_resources.get_distribution(package_name)
+        self._distribution: Distribution = distribution(package_name)
 
     @property
     def project_name(self) -> str:
-        return self._distribution.project_name
+        return self._distribution.metadata["Name"]
 
     @property
     def version(self) -> Version:
@@ -46,12 +45,7 @@ class PackageInfo:
 
     def get_summary(self) -> str:
         with suppress(Exception):
-            try:
-                metadata = self._distribution.get_metadata_lines("METADATA")
-            except FileNotFoundError:
-                metadata = self._distribution.get_metadata_lines("PKG-INFO")
-
-            return next(x.split(":") for x in metadata if x.startswith("Summary:"))[-1]
+            return self._distribution.metadata["Summary"] or ""
         return ""
 
     def get_finished_banner(self) -> str:
@@ -1,7 +1,15 @@
+from collections.abc import Iterator
+
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
 
+from .artifacts import ArtifactStore
+from .jobs import JobManager
+from .reports.cache import ReportCache
 from .settings import ApplicationSettings
+from .utils.plotcache import PlotCache
+from .utils.progress import ProgressHub
+from .workspaces import Workspace, WorkspaceRegistry
 
 #
 # Dependency injection
@@ -13,6 +21,60 @@ def get_app_settings(request: Request) -> ApplicationSettings:
     return settings
 
 
+def get_workspace_registry(request: Request) -> WorkspaceRegistry:
+    registry: WorkspaceRegistry = request.app.state.workspaces
+    return registry
+
+
+def get_session_id(request: Request) -> str:
+    session_id: str = request.state.session_id
+    return session_id
+
+
+def get_workspace(
+    session_id: str = Depends(get_session_id),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+) -> Iterator[Workspace]:
+    # held for the whole request: with shared workspaces, saved back after it
+    with registry.session(session_id) as workspace:
+        yield workspace
+
+
+def get_readonly_workspace(
+    session_id: str = Depends(get_session_id),
+    registry: WorkspaceRegistry = Depends(get_workspace_registry),
+) -> Iterator[Workspace]:
+    # for requests that do not change the workspace (plots, data, reports...):
+    # with shared workspaces, it is not saved back
+    with registry.session(session_id, readonly=True) as workspace:
+        yield workspace
+
+
+def get_plot_cache(request: Request) -> PlotCache:
+    plots: PlotCache = request.app.state.plots
+    return plots
+
+
+def get_report_cache(request: Request) -> ReportCache:
+    reports: ReportCache = request.app.state.reports
+    return reports
+
+
+def get_artifact_store(request: Request) -> ArtifactStore:
+    artifacts: ArtifactStore = request.app.state.artifacts
+    return artifacts
+
+
+def get_job_manager(request: Request) -> JobManager:
+    jobs: JobManager = request.app.state.jobs
+    return jobs
+
+
+def get_progress_hub(request: Request) -> ProgressHub:
+    hub: ProgressHub = request.app.state.progress
+    return hub
+
+
 #
 # API Handlers
 #
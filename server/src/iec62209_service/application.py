@@ -10,20 +10,33 @@ from ._meta import (
     PROJECT_NAME,
 )
 from .api import router
+from .artifacts import setup_artifacts
+from .jobs import setup_jobs
+from .reports import figures
+from .reports.cache import setup_report_cache
 from .routers import (
     analysis_creation,
     confirm_model,
+    events,
+    jobs,
     load_critical_data,
     load_model,
     load_test_data,
     load_training_data,
     meta,
+    sample_generation,
     search_space,
     test_set_generation,
     training_set_generation,
     verify,
 )
 from .settings import ApplicationSettings
+from .sharedstate import setup_shared_state
+from .telemetry import setup_telemetry
+from .utils import progress
+from .utils.plotcache import PlotCache
+from .utils.progress import ProgressHub
+from .workspaces import setup_workspaces
 
 
 @asynccontextmanager
@@ -32,6 +45,10 @@ async def _lifespan(app: FastAPI):
 
     yield
 
+    app.state.jobs.shutdown()
+    app.state.artifacts.close()
+    figures.shutdown()
+
     print(APP_FINISHED_BANNER_MSG, flush=True)
 
 
@@ -43,11 +60,23 @@ def create_app():
     )
     app.state.settings = settings = ApplicationSettings()
 
+    setup_workspaces(app, settings)
+    setup_telemetry(app)
+    app.state.progress = ProgressHub()
+    setup_shared_state(app, settings)
+    progress.set_sink(app.state.progress.publish)
+    setup_jobs(app, settings)
+    app.state.plots = PlotCache(max_bytes=settings.PLOT_CACHE_MAX_MB * 1024 * 1024)
+    setup_report_cache(app, settings)
+    figures.PARALLEL = settings.REPORTS_PARALLEL_FIGURES
+    setup_artifacts(app, settings)
+
     # routes
     app.include_router(router)
     app.include_router(meta.router)
     app.include_router(training_set_generation.router)
     app.include_router(test_set_generation.router)
+    app.include_router(sample_generation.router)
     app.include_router(load_training_data.router)
     app.include_router(analysis_creation.router)
     app.include_router(load_model.router)
@@ -57,6 +86,8 @@ def create_app():
     app.include_router(search_space.router)
     app.include_router(load_critical_data.router)
     app.include_router(verify.router)
+    app.include_router(jobs.router)
+    app.include_router(events.router)
 
     # static files
     app.mount("/", StaticFiles(directory=settings.CLIENT_OUTPUT_DIR), name="static")
@@ -0,0 +1,206 @@
+"""On-disk store of fitted models and explored critical samples
+
+Fitting a model and exploring its critical space are the costliest operations of
+the service. Their outcomes are stored under a content hash of their inputs, so
+fitting the same training sample, or exploring the same model, again is a lookup.
+
+Entries are pickled files. An index file keeps their size and last access, and
+is loaded once so lookups do not scan the folder. The least recently used entries
+are evicted when the store exceeds its size. Several workers may share the folder:
+entries another worker wrote are picked up on a miss of the index, and every
+change of the index (a new entry, evictions) is made under a lock file, on the
+index as saved by all the workers, so the size bound holds for the whole folder.
+"""
+
+import fcntl
+import os
+import pickle
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from importlib.metadata import PackageNotFoundError, version
+from json import dumps as jdumps
+from json import loads as jloads
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from threading import Lock
+from time import time
+from typing import Any
+
+from fastapi import FastAPI
+
+from ._meta import info
+from .settings import ApplicationSettings
+from .utils.common import ModelInterface
+from .utils.hashing import fingerprint
+
+
+def _kernel_version() -> str:
+    try:
+        return version("iec62209")
+    except PackageNotFoundError:
+        return ""
+
+
+def fit_key(model: ModelInterface) -> str:
+    """key of the model (and goodfit) fitted to the training sample"""
+    return fingerprint(
+        "fit",
+        info.__version__,
+        _kernel_version(),
+        model.samples.trainingSet.fingerprint(),
+    )
+
+
+def explore_key(model: ModelInterface, partitions: int, seed: int) -> str:
+    """key of the critical sample found exploring the model"""
+    return fingerprint(
+        "explore",
+        info.__version__,
+        _kernel_version(),
+        model.model_fingerprint(),
+        f"{partitions}:{seed}",
+    )
+
+
+class ArtifactStore:
+    INDEX = "index.json"
+    LOCK = "index.lock"
+
+    def __init__(self, folder: Path, max_bytes: int):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self.folder.mkdir(parents=True, exist_ok=True)
+        # key -> (size, last access), from least to most recently used
+        self._index: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._size: int = 0
+        self._lock = Lock()
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            if key not in self._index and not self._adopt(key):
+                return None
+            try:
+                value = pickle.loads(self._path(key).read_bytes())
+            except (OSError, pickle.UnpicklingError, EOFError):
+                value = None
+            else:
+                self._index[key] = (self._index[key][0], time())
+                self._index.move_to_end(key)
+                return value
+        # lost (e.g. evicted by another worker) or corrupted entry
+        self.discard(key)
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        content = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(content) > self.max_bytes:
+            return
+        with self._locked():
+            # entries written and evicted by the other workers meanwhile
+            self._load_index()
+            self._discard(key)
+            path = self._path(key)
+            path.parent.mkdir(exist_ok=True)
+            self._write(path, content)
+            self._index[key] = (len(content), time())
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                self._discard(next(iter(self._index)))
+            self._save_index()
+
+    def discard(self, key: str) -> None:
+        with self._locked():
+            self._load_index()
+            self._discard(key)
+            self._save_index()
+
+    def close(self) -> None:
+        """persists the last accesses"""
+        with self._locked():
+            self._load_index()
+            self._save_index()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """this store, and the index of the folder across the workers"""
+        with self._lock, open(self.folder / self.LOCK, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _path(self, key: str) -> Path:
+        return self.folder / key[:2] / f"{key}.pkl"
+
+    def _discard(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._size -= entry[0]
+            self._path(key).unlink(missing_ok=True)
+
+    def _adopt(self, key: str) -> bool:
+        """indexes an entry written by another worker sharing the folder"""
+        try:
+            size = self._path(key).stat().st_size
+        except OSError:
+            return False
+        self._index[key] = (size, time())
+        self._size += size
+        return True
+
+    def _write(self, path: Path, content: bytes) -> None:
+        # write aside and rename, so that no partial file is ever read
+        with NamedTemporaryFile(dir=self.folder, delete=False) as tmp:
+            tmp.write(content)
+        os.replace(tmp.name, path)
+
+    def _load_index(self) -> None:
+        """the index saved in the folder, with the last accesses seen here"""
+        try:
+            entries = jloads((self.folder / self.INDEX).read_text())
+        except (OSError, ValueError):
+            entries = {}
+        for key, (size, atime) in self._index.items():
+            if key in entries:
+                entries[key] = (size, max(atime, entries[key][1]))
+            elif self._path(key).exists():
+                # adopted here, not yet in the saved index
+                entries[key] = (size, atime)
+        self._index.clear()
+        self._size = 0
+        for key, (size, atime) in sorted(entries.items(), key=lambda e: e[1][1]):
+            if self._path(key).exists():
+                self._index[key] = (size, atime)
+                self._size += size
+
+    def _save_index(self) -> None:
+        self._write(self.folder / self.INDEX, jdumps(self._index).encode())
+
+
+def setup_artifacts(app: FastAPI, settings: ApplicationSettings) -> None:
+    folder = settings.ARTIFACTS_FOLDER
+    if folder is None and settings.STATE_FOLDERS:
+        # survives restarts of the service
+        folder = settings.STATE_FOLDERS[0] / "artifacts"
+    if folder is None and settings.SHARED_STATE_FOLDER is not None:
+        # shared by the workers
+        folder = settings.SHARED_STATE_FOLDER / "artifacts"
+    if folder is None:
+        app.state.artifacts_folder = TemporaryDirectory(ignore_cleanup_errors=True)
+        folder = Path(app.state.artifacts_folder.name)
+    app.state.artifacts = ArtifactStore(
+        folder, max_bytes=settings.ARTIFACTS_MAX_MB * 1024 * 1024
+    )
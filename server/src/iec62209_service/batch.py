@@ -0,0 +1,277 @@
+"""Headless batch pipeline
+
+Runs creation, confirmation and verification, as the web interface does, for
+every measurement system of a folder, without the server:
+
+    iec62209-batch SYSTEMS OUTPUT [--workers N] [--backend latex|native]
+    python -m iec62209_service.batch SYSTEMS OUTPUT [--workers N]
+
+Every sub-folder of SYSTEMS is a system with
+ - training.csv: the measured training sample (required)
+ - metadata.json: the model metadata, as entered in the interface (required)
+ - test.csv: the measured test sample, for the confirmation
+ - critical.csv: the measured critical data, for the verification. Without
+   it, the critical space of the model is searched instead, and the critical
+   configurations to measure are exported
+
+For every system, OUTPUT/<system> gets the model (model.json), the pdf reports,
+the critical configurations (critical.csv) when searched, and a summary.json
+with the results and timings of every stage. Systems are processed in parallel
+worker processes and OUTPUT/summary.json gathers their summaries. The exit
+status is non-zero if any system failed, e.g. with test or critical data
+outside the domain of the model, which the interface rejects too.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from json import dump as jdump
+from json import loads as jloads
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from traceback import format_exc
+
+from .reports import figures
+from .reports.builder import build_report
+from .reports.texutils import ReportBackend, ReportStage
+from .utils import metrics
+from .utils.common import (
+    ModelInterface,
+    ModelMetadata,
+    SampleInterface,
+)
+
+TRAINING = "training.csv"
+TEST = "test.csv"
+CRITICAL = "critical.csv"
+METADATA = "metadata.json"
+
+
+def find_systems(folder: Path) -> list[Path]:
+    """sub-folders of folder with a training sample"""
+    return sorted(p for p in folder.iterdir() if (p / TRAINING).is_file())
+
+
+def _report(
+    stage: ReportStage, model: ModelInterface, output: Path, backend: ReportBackend
+) -> str:
+    with TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        mainpdf = build_report(stage, model, Path(tmp), backend=backend)
+        target = output / f"{stage.name.lower()}.pdf"
+        target.write_bytes(mainpdf.read_bytes())
+    return target.name
+
+
+def _create(
+    model: ModelInterface, folder: Path, output: Path, backend: ReportBackend
+) -> dict:
+    with (folder / TRAINING).open("rb") as f:
+        model.load_init_sample(f)
+    model.make_model()
+    goodfit = model.goodfit_test()
+    model.set_metadata(ModelMetadata(**jloads((folder / METADATA).read_text())))
+
+    with (output / "model.json").open("w") as f:
+        jdump(model.dump_model_to_json(), f)
+    return {
+        "accept": bool(goodfit.accept),
+        "normalized_rms_error": float(goodfit.gfres[1]),
+        "rms_error_ok": bool(goodfit.gfres[0]),
+        "violations": len(goodfit.acceptance.violations()),
+        "report": _report(ReportStage.CREATION, model, output, backend),
+    }
+
+
+def _confirm(
+    model: ModelInterface, folder: Path, output: Path, backend: ReportBackend
+) -> dict:
+    with (folder / TEST).open("rb") as f:
+        model.load_test_sample(f)
+    model.check_coverage(model.samples.testSet, "test data")
+    if not model.compute_residuals():
+        raise Exception("Error computing residuals")
+    residuals = model.residuals_test()
+    acceptance = model.acceptance(model.samples.testSet)
+    return {
+        "accept": bool(acceptance.accept),
+        "residuals_ok": bool(residuals.all_ok()),
+        "violations": len(acceptance.violations()),
+        "report": _report(ReportStage.CONFIRMATION, model, output, backend),
+    }
+
+
+def _verify(
+    model: ModelInterface, folder: Path, output: Path, backend: ReportBackend
+) -> dict:
+    with (folder / CRITICAL).open("rb") as f:
+        model.load_critical_sample(f)
+    model.check_coverage(model.samples.criticalSet, "critical data")
+    acceptance = model.acceptance(model.samples.criticalSet)
+    return {
+        "accept": bool(acceptance.accept),
+        "violations": len(acceptance.violations()),
+        "report": _report(ReportStage.VERIFICATION, model, output, backend),
+    }
+
+
+def _search(model: ModelInterface, output: Path, partitions: int, seed: int) -> dict:
+    # one worker per system: the systems already run in parallel. Partitions
+    # still run in a process of their own, which they seed; a single one runs
+    # in place, seeded as well
+    model.explore_space(partitions, 1, seed)
+    model.samples.criticalSet.export_to_csv(output / CRITICAL)
+    return {"configurations": model.samples.criticalSet.size, "critical": CRITICAL}
+
+
+def run_system(
+    folder: Path,
+    output: Path,
+    partitions: int,
+    seed: int,
+    backend: ReportBackend = ReportBackend.LATEX,
+) -> dict:
+    """creates, confirms and verifies the model of one system, never raises"""
+    output.mkdir(parents=True, exist_ok=True)
+    model = ModelInterface(SampleInterface())
+    summary: dict = {"system": folder.name, "ok": True}
+    start = perf_counter()
+
+    with metrics.collect_timings() as timings:
+        stages = [("creation", lambda: _create(model, folder, output, backend))]
+        if (folder / TEST).is_file():
+            stages.append(
+                ("confirmation", lambda: _confirm(model, folder, output, backend))
+            )
+        if (folder / CRITICAL).is_file():
+            stages.append(
+                ("verification", lambda: _verify(model, folder, output, backend))
+            )
+        else:
+            stages.append(("search", lambda: _search(model, output, partitions, seed)))
+        for name, stage in stages:
+            try:
+                with metrics.timed(name):
+                    summary[name] = stage()
+            except Exception as e:  # pylint: disable=broad-except
+                summary.update(ok=False, error=f"{name}: {e}", traceback=format_exc())
+                break
+
+    summary["seconds"] = round(perf_counter() - start, 3)
+    summary["timings"] = {}
+    for phase, seconds in timings:
+        summary["timings"][phase] = round(
+            summary["timings"].get(phase, 0.0) + seconds, 3
+        )
+    with (output / "summary.json").open("w") as f:
+        jdump(summary, f, indent=1)
+    return summary
+
+
+def _init_worker() -> None:
+    # the systems are the unit of parallelism: no nested pools per report
+    figures.PARALLEL = False
+
+
+def run_batch(
+    systems: list[Path],
+    output: Path,
+    workers: int,
+    partitions: int,
+    seed: int,
+    backend: ReportBackend = ReportBackend.LATEX,
+) -> list[dict]:
+    summaries = []
+    if workers == 1:
+        _init_worker()
+        for system in systems:
+            summaries.append(
+                run_system(system, output / system.name, partitions, seed, backend)
+            )
+            _print_summary(summaries[-1])
+        return summaries
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker
+    ) as pool:
+        futures = [
+            pool.submit(run_system, s, output / s.name, partitions, seed, backend)
+            for s in systems
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            _print_summary(summary)
+            summaries.append(summary)
+    return sorted(summaries, key=lambda s: s["system"])
+
+
+def _print_summary(summary: dict) -> None:
+    error = summary.get("error", "").splitlines()[:1]
+    status = "ok" if summary["ok"] else f"FAILED ({error[0] if error else ''})"
+    stages = " ".join(
+        f"{name}={summary['timings'][name]:.1f}s"
+        for name in ("creation", "confirmation", "verification", "search")
+        if name in summary["timings"]
+    )
+    print(f"{summary['system']:<30} {summary['seconds']:>8.1f}s  {stages}  {status}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="iec62209-batch",
+        description="creates, confirms and verifies the models of many systems",
+    )
+    parser.add_argument("systems", type=Path, help="folder of system folders")
+    parser.add_argument("output", type=Path, help="folder of the results")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="parallel systems (default: cpus)"
+    )
+    parser.add_argument(
+        "--partitions", type=int, default=1, help="of the search of critical space"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="of the critical space search"
+    )
+    parser.add_argument(
+        "--backend",
+        type=ReportBackend,
+        choices=[b.value for b in ReportBackend],
+        default=ReportBackend.LATEX,
+        help="of the pdf reports: latex (pdflatex) or native (no TeX needed)",
+    )
+    args = parser.parse_args(argv)
+
+    systems = find_systems(args.systems)
+    if not systems:
+        parser.error(f"no folder with a {TRAINING} in {args.systems}")
+    workers = max(1, min(len(systems), args.workers or os.cpu_count() or 1))
+
+    start = perf_counter()
+    summaries = run_batch(
+        systems, args.output, workers, args.partitions, args.seed, args.backend
+    )
+
+    failed = [s["system"] for s in summaries if not s["ok"]]
+    args.output.mkdir(parents=True, exist_ok=True)
+    with (args.output / "summary.json").open("w") as f:
+        jdump(
+            {
+                "seconds": round(perf_counter() - start, 3),
+                "workers": workers,
+                "failed": failed,
+                "systems": summaries,
+            },
+            f,
+            indent=1,
+        )
+    print(
+        f"{len(systems) - len(failed)}/{len(systems)} systems processed "
+        f"in {perf_counter() - start:.1f}s, see {args.output / 'summary.json'}"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
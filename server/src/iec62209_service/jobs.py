@@ -0,0 +1,339 @@
+"""Asynchronous jobs
+
+CPU-bound operations (model fitting, space exploration, report typesetting) can
+be submitted to a pool of worker processes instead of running in the event loop.
+
+A job function is a module-level callable returning a tuple (outputs, result):
+ - outputs: if not None, what the job computed for the workspace (e.g. a fitted
+   model), merged into it by the merge callback of the job once it succeeds.
+   The worker operates on a copy of the workspace: the outputs are only merged
+   if the inputs of the job (e.g. the fingerprint of the training sample) are
+   still those of the workspace. Otherwise the workspace changed while the job
+   ran (a new sample, a reset...), the outputs are dropped and the job is stale
+ - result: what the client retrieves from the result endpoint
+
+Progress reported by jobs (see utils.progress) and the timings of their phases
+(see utils.metrics) are sent back from the workers over a queue: progress is
+published to the session of the job, timings to the metrics of the server.
+
+With shared state (see sharedstate), jobs still run in the pool of the worker
+that submitted them, but their status and results are also recorded in the
+shared database, so that any worker can answer for them.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from enum import Enum
+from multiprocessing import get_context
+from threading import Lock, Thread
+from time import time
+from typing import Any
+from uuid import uuid4
+
+from fastapi import FastAPI
+
+from .reports import figures
+from .settings import ApplicationSettings
+from .sharedstate import JobRecords, job_future
+from .utils import metrics, progress
+from .utils.progress import ProgressHub
+from .workspaces import Workspace, WorkspaceRegistry
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    # succeeded, but on inputs the workspace no longer has
+    STALE = "stale"
+
+
+class Job:
+    def __init__(
+        self, session_id: str, name: str, future: Future, media_type: str
+    ) -> None:
+        self.id: str = uuid4().hex
+        self.session_id = session_id
+        self.name = name
+        self.media_type = media_type
+        self.future = future
+        self.cancelled: bool = False
+        self.stale: bool = False
+        # wall clock: compared across the workers with shared state
+        self.created: float = time()
+        self.finished: float | None = None
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Job":
+        """a job of another worker, as recorded in the shared state"""
+        job = cls(
+            record["session_id"],
+            record["name"],
+            job_future(record),
+            record["media_type"],
+        )
+        job.id = record["job_id"]
+        job.cancelled = record["status"] == JobStatus.CANCELLED.value
+        job.stale = record["status"] == JobStatus.STALE.value
+        job.created = record["created"]
+        job.finished = record["finished"]
+        return job
+
+    @property
+    def status(self) -> JobStatus:
+        if self.cancelled or self.future.cancelled():
+            return JobStatus.CANCELLED
+        if not self.future.done():
+            return JobStatus.RUNNING if self.future.running() else JobStatus.PENDING
+        if self.future.exception() is not None:
+            return JobStatus.FAILED
+        if self.stale:
+            return JobStatus.STALE
+        return JobStatus.SUCCESS
+
+    @property
+    def error(self) -> str | None:
+        job_status = self.status
+        if job_status == JobStatus.FAILED:
+            return str(self.future.exception())
+        if job_status == JobStatus.STALE:
+            return "The workspace changed while the job ran, its outcome was dropped"
+        return None
+
+    @property
+    def result(self) -> Any:
+        return self.future.result()[1]
+
+    def elapsed(self) -> float:
+        return (self.finished or time()) - self.created
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "status": self.status.value,
+            "elapsed": round(self.elapsed(), 3),
+            "error": self.error,
+        }
+
+
+def _init_worker(events) -> None:
+    # the workers already build reports in parallel: no pool of figures in each
+    figures.PARALLEL = False
+    progress.set_sink(lambda channel, event: events.put(("progress", channel, event)))
+    metrics.set_forward(lambda *timing: events.put(("timing", *timing)))
+
+
+def _run(session_id: str, fn: Callable, *args) -> tuple[Any, Any]:
+    token = progress.bind(session_id)
+    try:
+        return fn(*args)
+    finally:
+        progress.unbind(token)
+
+
+class JobManager:
+    def __init__(
+        self,
+        max_workers: int | None,
+        result_ttl: float,
+        workspaces: WorkspaceRegistry,
+        progress_hub: ProgressHub | None = None,
+        records: JobRecords | None = None,
+    ):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.workspaces = workspaces
+        self.progress_hub = progress_hub
+        self.records = records
+        self._executor: ProcessPoolExecutor | None = None
+        self._events = None
+        self._jobs: dict[str, Job] = {}
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # NOTE: spawned workers do not inherit the server threads nor pyplot state
+        if self._executor is None:
+            context = get_context("spawn")
+            if self._events is None:
+                self._events = context.Queue()
+                Thread(target=self._forward_events, daemon=True).start()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._events,),
+            )
+        return self._executor
+
+    def _forward_events(self) -> None:
+        while True:
+            kind, *event = self._events.get()
+            if kind == "timing":
+                metrics.observe_phase(*event)
+            elif self.progress_hub is not None:
+                self.progress_hub.publish(*event)
+
+    def submit(
+        self,
+        workspace: Workspace,
+        fn: Callable,
+        *args,
+        media_type: str = "application/json",
+        on_success: Callable[[Any, Any], None] | None = None,
+        merge: Callable[[Workspace, Any], None] | None = None,
+        inputs: Callable[[Workspace], str] | None = None,
+    ) -> Job:
+        """runs fn(*args) in a worker process
+
+        on_success: called here with the (outputs, result) of the job once it
+        succeeds, e.g. to store its outcome
+        merge: merges the outputs of the job into the live workspace
+        inputs: fingerprint of what the job depends on in a workspace, compared
+        between the workspace submitting the job and the live one before merging
+        """
+        submitted = None if inputs is None else inputs(workspace)
+        try:
+            future = self.executor.submit(_run, workspace.session_id, fn, *args)
+        except BrokenProcessPool:
+            # a worker died (e.g. out of memory): start over with a fresh pool
+            self.shutdown()
+            future = self.executor.submit(_run, workspace.session_id, fn, *args)
+        job = Job(workspace.session_id, fn.__name__.strip("_"), future, media_type)
+
+        def _on_done(fut: Future):
+            job.finished = time()
+            if self._cancelled_elsewhere(job):
+                job.cancelled = True
+            if job.cancelled or fut.cancelled() or fut.exception() is not None:
+                self._record_outcome(job)
+                return
+            outputs, result = fut.result()
+            if merge is not None and outputs is not None:
+                job.stale = not self._merge(job, outputs, merge, inputs, submitted)
+            if on_success is not None:
+                # outcomes are stored by their inputs: valid even if stale
+                on_success(outputs, result)
+            self._record_outcome(job, result)
+
+        self._register(job)
+        future.add_done_callback(_on_done)
+        return job
+
+    def resolved(
+        self,
+        workspace: Workspace,
+        name: str,
+        result: Any,
+        media_type: str = "application/json",
+    ) -> Job:
+        """registers a job whose result is already known (e.g. cached)"""
+        future: Future = Future()
+        future.set_result((None, result))
+        job = Job(workspace.session_id, name, future, media_type)
+        job.finished = time()
+        self._register(job)
+        self._record_outcome(job, result)
+        return job
+
+    def get(self, job_id: str, session_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None and self.records is not None:
+            # submitted to another worker
+            record = self.records.get(job_id)
+            if record is not None:
+                job = Job.from_record(record)
+        if job is None or job.session_id != session_id:
+            raise KeyError(f"Job {job_id} not found")
+        return job
+
+    def cancel(self, job_id: str, session_id: str) -> Job:
+        """cancels a job
+
+        A pending job is dropped from the queue. A running one cannot be
+        interrupted: it runs to completion but its outcome is discarded
+        """
+        job = self.get(job_id, session_id)
+        if not job.future.done():
+            job.future.cancel()
+            job.cancelled = True
+        if job.cancelled and self.records is not None:
+            # if it runs in another worker, that one discards its outcome
+            self.records.cancel(job.id)
+        return job
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _register(self, job: Job) -> None:
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        if self.records is not None:
+            self.records.add(job)
+
+    def _merge(
+        self,
+        job: Job,
+        outputs: Any,
+        merge: Callable[[Workspace, Any], None],
+        inputs: Callable[[Workspace], str] | None,
+        submitted: str | None,
+    ) -> bool:
+        """merges the outputs of a job, if its inputs are still the workspace's"""
+        merged = False
+
+        def _apply(workspace: Workspace) -> None:
+            nonlocal merged
+            if inputs is not None:
+                try:
+                    current = inputs(workspace)
+                except Exception:
+                    # e.g. the model was cleared meanwhile
+                    return
+                if current != submitted:
+                    return
+            merge(workspace, outputs)
+            merged = True
+
+        self.workspaces.update(job.session_id, _apply)
+        return merged
+
+    def _cancelled_elsewhere(self, job: Job) -> bool:
+        if self.records is None:
+            return False
+        record = self.records.get(job.id)
+        return record is not None and record["status"] == JobStatus.CANCELLED.value
+
+    def _record_outcome(self, job: Job, result: Any = None) -> None:
+        if self.records is not None:
+            self.records.finish(
+                job, result if job.status == JobStatus.SUCCESS else None
+            )
+
+    def _prune(self) -> None:
+        deadline = time() - self.result_ttl
+        if self.records is not None:
+            self.records.prune(deadline)
+        for job_id in [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished is not None and job.finished < deadline
+        ]:
+            del self._jobs[job_id]
+
+
+def setup_jobs(app: FastAPI, settings: ApplicationSettings) -> None:
+    app.state.jobs = JobManager(
+        max_workers=settings.JOBS_MAX_WORKERS,
+        result_ttl=settings.JOBS_RESULT_TTL_SECONDS,
+        workspaces=app.state.workspaces,
+        progress_hub=getattr(app.state, "progress", None),
+        records=getattr(app.state, "job_records", None),
+    )
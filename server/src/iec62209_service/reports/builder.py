@@ -0,0 +1,370 @@
+from importlib.resources import files
+from pathlib import Path
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+
+from .. import reports
+from .._meta import info
+from ..utils import metrics, progress
+from ..utils.common import ModelInterface, Residuals
+from ..utils.plotcache import PlotCache, plot_key
+from . import pdfwriter, texwriter
+from .cache import ReportCache
+from .figures import render_figures
+from .pdfdocument import Document
+from .texutils import ReportBackend, ReportStage, typeset
+
+
+def build_creation_report(
+    model: ModelInterface,
+    texpath: Path,
+    cache: ReportCache | None = None,
+    backend: ReportBackend = ReportBackend.LATEX,
+    pngs: dict[str, bytes] | None = None,
+) -> Path:
+    training_set = model.samples.trainingSet
+
+    # print images
+
+    imgpath = texpath / "images"
+    imgpath.mkdir()
+
+    render_figures(
+        imgpath,
+        {
+            "model-creation-distribution.png": (training_set, "plot_distribution"),
+            "model-creation-acceptance.png": (training_set, "plot_deviations"),
+            "model-creation-semivariogram.png": (model, "plot_model"),
+            "model-creation-marginals.png": (training_set, "plot_marginals"),
+        },
+        pngs=pngs,
+    )
+
+    if backend == ReportBackend.NATIVE:
+        return _write_native(
+            texpath,
+            pdfwriter.write_creation_report(
+                imgpath,
+                training_set,
+                model.get_metadata(),
+                model.goodfit,
+                info.__version__,
+            ),
+        )
+
+    # print tables
+
+    (texpath / "metadata.tex").write_text(
+        texwriter.write_model_metadata_tex(model.get_metadata())
+    )
+
+    (texpath / "summary.tex").write_text(
+        texwriter.write_creation_summary_tex(model.goodfit)
+    )
+
+    (texpath / "sample_parameters.tex").write_text(
+        texwriter.write_sample_parameters_tex(
+            training_set.config,
+            model.get_metadata(),
+            ReportStage.CREATION,
+        )
+    )
+
+    accepted = model.goodfit.accept
+    gfres = model.goodfit.gfres
+    allgood = accepted and gfres[0]
+
+    (texpath / "onelinesummary.tex").write_text(
+        texwriter.write_one_line_summary(allgood, ReportStage.CREATION)
+    )
+
+    (texpath / "acceptance.tex").write_text(
+        texwriter.write_sample_acceptance_tex(accepted)
+    )
+
+    (texpath / "gfres.tex").write_text(texwriter.write_model_fitting_tex(gfres))
+
+    (texpath / "sample_table.tex").write_text(
+        texwriter.write_sample_table_tex(training_set, ReportStage.CREATION)
+    )
+
+    (texpath / "version.tex").write_text(info.__version__)
+
+    # typeset report
+
+    return _typeset_main(texpath, "creation.tex", cache)
+
+
+def build_confirmation_report(
+    model: ModelInterface,
+    texpath: Path,
+    cache: ReportCache | None = None,
+    backend: ReportBackend = ReportBackend.LATEX,
+    pngs: dict[str, bytes] | None = None,
+) -> Path:
+    test_set = model.samples.testSet
+
+    # images
+
+    imgpath = texpath / "images"
+    imgpath.mkdir()
+
+    render_figures(
+        imgpath,
+        {
+            "model-confirm-acceptance.png": (test_set, "plot_deviations"),
+            "model-confirm-qqplot.png": (model, "plot_residuals"),
+        },
+        pngs=pngs,
+    )
+
+    # tables
+
+    accepted: bool = model.acceptance_criteria(test_set)
+    residuals: Residuals = model.residuals_test()
+
+    if backend == ReportBackend.NATIVE:
+        return _write_native(
+            texpath,
+            pdfwriter.write_confirmation_report(
+                imgpath,
+                test_set,
+                model.get_metadata(),
+                accepted,
+                residuals,
+                info.__version__,
+            ),
+        )
+
+    allgood = accepted and residuals.all_ok()
+
+    (texpath / "onelinesummary.tex").write_text(
+        texwriter.write_one_line_summary(allgood, ReportStage.CONFIRMATION)
+    )
+
+    (texpath / "metadata.tex").write_text(
+        texwriter.write_model_metadata_tex(model.get_metadata())
+    )
+
+    (texpath / "summary.tex").write_text(
+        texwriter.write_confirmation_summary_tex(accepted, residuals)
+    )
+
+    (texpath / "sample_parameters.tex").write_text(
+        texwriter.write_sample_parameters_tex(
+            test_set.config,
+            model.get_metadata(),
+            ReportStage.CONFIRMATION,
+        )
+    )
+
+    (texpath / "acceptance.tex").write_text(
+        texwriter.write_sample_acceptance_tex(accepted)
+    )
+
+    (texpath / "normality.tex").write_text(texwriter.write_normality_tex(residuals))
+
+    (texpath / "similarity.tex").write_text(texwriter.write_similarity_tex(residuals))
+
+    (texpath / "sample_table.tex").write_text(
+        texwriter.write_sample_table_tex(test_set, ReportStage.CONFIRMATION)
+    )
+
+    (texpath / "version.tex").write_text(info.__version__)
+
+    # typeset report
+
+    return _typeset_main(texpath, "confirmation.tex", cache)
+
+
+def build_verification_report(
+    model: ModelInterface,
+    texpath: Path,
+    cache: ReportCache | None = None,
+    backend: ReportBackend = ReportBackend.LATEX,
+    pngs: dict[str, bytes] | None = None,
+) -> Path:
+    critical_set = model.samples.criticalSet
+    trivial_case: bool = critical_set.size == 0
+
+    # images
+
+    imgpath = texpath / "images"
+    imgpath.mkdir()
+
+    if not trivial_case:
+        render_figures(
+            imgpath,
+            {"critical-acceptance.png": (critical_set, "plot_deviations")},
+            pngs=pngs,
+        )
+
+    # tables
+
+    accepted: bool = model.acceptance_criteria(critical_set)
+
+    if backend == ReportBackend.NATIVE:
+        return _write_native(
+            texpath,
+            pdfwriter.write_verification_report(
+                imgpath,
+                critical_set,
+                model.get_metadata(),
+                accepted,
+                info.__version__,
+            ),
+        )
+
+    (texpath / "onelinesummary.tex").write_text(
+        texwriter.write_one_line_summary(accepted, ReportStage.VERIFICATION)
+    )
+
+    (texpath / "metadata.tex").write_text(
+        texwriter.write_model_metadata_tex(model.get_metadata())
+    )
+
+    (texpath / "summary.tex").write_text(
+        texwriter.write_verification_summary_tex(accepted)
+    )
+
+    (texpath / "sample_parameters.tex").write_text(
+        texwriter.write_sample_parameters_tex(
+            critical_set.config,
+            model.get_metadata(),
+            ReportStage.VERIFICATION,
+        )
+    )
+
+    (texpath / "outcome_critical.tex").write_text(
+        texwriter.write_outcome_critical(critical_set.config.sampleSize)
+    )
+
+    (texpath / "acceptance.tex").write_text(
+        texwriter.write_sample_acceptance_tex(accepted)
+    )
+
+    if not trivial_case:
+        (texpath / "sample_table.tex").write_text(
+            texwriter.write_sample_table_tex(critical_set, ReportStage.VERIFICATION)
+        )
+
+    (texpath / "version.tex").write_text(info.__version__)
+
+    # main tex
+
+    if trivial_case:
+        return _typeset_main(texpath, "verification_trivial.tex", cache)
+    return _typeset_main(texpath, "verification.tex", cache)
+
+
+BUILDERS = {
+    ReportStage.CREATION: build_creation_report,
+    ReportStage.CONFIRMATION: build_confirmation_report,
+    ReportStage.VERIFICATION: build_verification_report,
+}
+
+
+def build_report(
+    stage: ReportStage,
+    model: ModelInterface,
+    texpath: Path,
+    cache: ReportCache | None = None,
+    backend: ReportBackend = ReportBackend.LATEX,
+    pngs: dict[str, bytes] | None = None,
+) -> Path:
+    """returns the pdf of a report, typesetting it only if not in cache"""
+    if cache is None:
+        return BUILDERS[stage](model, texpath, None, backend, pngs)
+
+    key = cache.key(stage, model, backend)
+    mainpdf = cache.get(key)
+    if mainpdf is None:
+        mainpdf = cache.put(key, BUILDERS[stage](model, texpath, cache, backend, pngs))
+    return mainpdf
+
+
+def render_report(
+    stage: ReportStage,
+    model: ModelInterface,
+    cache: ReportCache | None = None,
+    backend: ReportBackend = ReportBackend.LATEX,
+    pngs: dict[str, bytes] | None = None,
+) -> tuple[None, bytes]:
+    """builds a report in a private folder and returns the pdf content
+
+    Used as job entry point, hence the (state, result) return value
+    """
+    with TemporaryDirectory(ignore_cleanup_errors=True) as tmp:
+        mainpdf = build_report(stage, model, Path(tmp), cache, backend, pngs)
+        return None, mainpdf.read_bytes()
+
+
+def report_plots(stage: ReportStage, model: ModelInterface) -> dict[str, str]:
+    """figure of a report -> key of the same plot served to the interface
+
+    The kinds are those of the plot routes (see routers)
+    """
+    if stage == ReportStage.CREATION:
+        training = model.samples.trainingSet.fingerprint()
+        return {
+            "model-creation-distribution.png": plot_key(
+                "training-set/distribution", training
+            ),
+            "model-creation-acceptance.png": plot_key(
+                "analysis-creation/deviations", training
+            ),
+            "model-creation-semivariogram.png": plot_key(
+                "analysis-creation/model", model.model_fingerprint()
+            ),
+            "model-creation-marginals.png": plot_key(
+                "analysis-creation/marginals", training
+            ),
+        }
+    if stage == ReportStage.CONFIRMATION:
+        return {
+            "model-confirm-acceptance.png": plot_key(
+                "confirm-model/deviations", model.samples.testSet.fingerprint()
+            ),
+            "model-confirm-qqplot.png": plot_key(
+                "confirm-model/residuals", model.residuals_fingerprint()
+            ),
+        }
+    return {
+        "critical-acceptance.png": plot_key(
+            "verify/deviations", model.samples.criticalSet.fingerprint()
+        )
+    }
+
+
+def cached_figures(
+    stage: ReportStage, model: ModelInterface, plots: PlotCache
+) -> dict[str, bytes]:
+    """the figures of a report already rendered for the interface"""
+    pngs = {}
+    for name, key in report_plots(stage, model).items():
+        png = plots.get(key)
+        if png is not None:
+            pngs[name] = png
+    return pngs
+
+
+def _typeset_main(
+    texpath: Path, template: str, cache: ReportCache | None = None
+) -> Path:
+    mainres = files(reports).joinpath(template)
+    maintex = "report.tex"
+    copyfile(mainres, texpath / maintex)
+    if cache is not None:
+        cache.load_aux(template, texpath, maintex)
+    mainpdf = texpath / typeset(texpath, maintex)
+    if cache is not None:
+        cache.save_aux(template, texpath, maintex)
+    return mainpdf
+
+
+def _write_native(texpath: Path, document: Document) -> Path:
+    mainpdf = texpath / "report.pdf"
+    with progress.phase("typeset"), metrics.timed("pdfwriter"):
+        with mainpdf.open("wb") as f:
+            document.write(f)
+    return mainpdf
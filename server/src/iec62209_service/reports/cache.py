@@ -0,0 +1,125 @@
+"""Cache of typeset reports
+
+Finished pdfs are stored on disk under a key hashing everything a report
+depends on, so downloading an unchanged report twice does not typeset it again.
+The .aux file of the last build of each template is kept as well: seeding a new
+build with it resolves references on the first pdflatex pass, and only builds
+whose references moved need another one.
+
+The cache is a plain folder so that worker processes running report jobs share
+it with the server.
+"""
+
+import os
+import pickle
+from json import dumps as jdumps
+from pathlib import Path
+from shutil import copyfile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+
+from fastapi import FastAPI
+
+from .._meta import info
+from ..settings import ApplicationSettings
+from ..utils.common import ModelInterface
+from ..utils.hashing import fingerprint
+from .texutils import ReportBackend, ReportStage
+
+
+def _stage_inputs(stage: ReportStage, model: ModelInterface) -> list:
+    """what the report of a stage renders, besides the model and its metadata"""
+    if stage == ReportStage.CREATION:
+        dataset = model.samples.trainingSet
+        results = pickle.dumps((model.goodfit.accept, model.goodfit.gfres))
+    elif stage == ReportStage.CONFIRMATION:
+        dataset = model.samples.testSet
+        # the residuals of the test sample, computed when it is confirmed
+        results = model.residuals_fingerprint() if len(model.residuals) else ""
+    else:
+        dataset = model.samples.criticalSet
+        results = b""
+    return [
+        dataset.fingerprint(),
+        jdumps(dict(dataset.config), sort_keys=True),
+        results,
+    ]
+
+
+class ReportCache:
+    def __init__(self, folder: Path, max_entries: int):
+        self.folder = Path(folder)
+        self.max_entries = max_entries
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def key(
+        self,
+        stage: ReportStage,
+        model: ModelInterface,
+        backend: ReportBackend = ReportBackend.LATEX,
+    ) -> str:
+        """hash of the inputs of a report, and of the backend typesetting it"""
+        return fingerprint(
+            str(int(stage)),
+            backend.value,
+            info.__version__,
+            jdumps(dict(model.get_metadata()), sort_keys=True),
+            model.model_fingerprint(),
+            *_stage_inputs(stage, model),
+        )
+
+    def get(self, key: str) -> Path | None:
+        pdf = self.folder / f"{key}.pdf"
+        try:
+            # mtime orders entries from least to most recently used
+            os.utime(pdf)
+        except FileNotFoundError:
+            return None
+        return pdf
+
+    def put(self, key: str, pdf: Path) -> Path:
+        target = self.folder / f"{key}.pdf"
+        self._copy(pdf, target)
+        self._prune()
+        return target
+
+    def load_aux(self, template: str, texpath: Path, main: str) -> None:
+        """seeds a build folder with the .aux of the last build of template"""
+        aux = self.folder / f"{Path(template).stem}.aux"
+        if aux.exists():
+            copyfile(aux, texpath / Path(main).with_suffix(".aux"))
+
+    def save_aux(self, template: str, texpath: Path, main: str) -> None:
+        aux = texpath / Path(main).with_suffix(".aux")
+        if aux.exists():
+            self._copy(aux, self.folder / f"{Path(template).stem}.aux")
+
+    def clear(self) -> None:
+        for path in self.folder.glob("*.pdf"):
+            path.unlink(missing_ok=True)
+
+    def _copy(self, source: Path, target: Path) -> None:
+        # write aside and rename, so concurrent readers never see a partial file
+        with NamedTemporaryFile(dir=self.folder, delete=False) as tmp:
+            tmp.write(source.read_bytes())
+        os.replace(tmp.name, target)
+
+    def _prune(self) -> None:
+        pdfs = []
+        for pdf in self.folder.glob("*.pdf"):
+            try:
+                pdfs.append((pdf.stat().st_mtime, pdf))
+            except FileNotFoundError:
+                # pruned meanwhile by another process
+                continue
+        pdfs.sort()
+        for _, pdf in pdfs[: max(0, len(pdfs) - self.max_entries)]:
+            pdf.unlink(missing_ok=True)
+
+
+def setup_report_cache(app: FastAPI, settings: ApplicationSettings) -> None:
+    folder = settings.REPORTS_CACHE_FOLDER
+    if folder is None:
+        # removed with the app
+        app.state.reports_folder = TemporaryDirectory(ignore_cleanup_errors=True)
+        folder = Path(app.state.reports_folder.name)
+    app.state.reports = ReportCache(folder, settings.REPORTS_CACHE_MAX_ENTRIES)
@@ -0,0 +1,102 @@
+"""Concurrent rendering of report figures
+
+The figures of a report do not depend on each other: if enabled, they are
+rendered in a pool of spawned processes, each worker with its own pyplot state,
+and the pngs are gathered into the build folder. The pool is created on first
+use and kept for the next reports. It is off by default: no speedup over the
+serial path has been measured yet (see benchmarks/bench_figures.py).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+from ..utils import metrics
+
+# a report has at most this many figures
+MAX_FIGURES = 4
+
+# default of render_figures, set by the REPORTS_PARALLEL_FIGURES setting: off
+# unless enabled, and always off where reports are already built in parallel
+# (the batch runner, the workers of jobs)
+PARALLEL = False
+
+# file name -> (object, name of its plot method returning a png buffer)
+Figures = dict[str, tuple[Any, str]]
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _render(owner: Any, method: str) -> bytes:
+    return getattr(owner, method)().getvalue()
+
+
+def _render_timed(owner: Any, method: str) -> tuple[bytes, list[tuple[str, float]]]:
+    # timings of the worker are replayed in the process that asked for the figure
+    with metrics.collect_timings() as timings:
+        png = _render(owner, method)
+    return png, timings
+
+
+def available_cpus() -> int:
+    """the CPUs this process may run on (e.g. those of its container)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=min(MAX_FIGURES, available_cpus()),
+            mp_context=get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_figures(
+    imgpath: Path,
+    figures: Figures,
+    parallel: bool | None = None,
+    pngs: dict[str, bytes] | None = None,
+) -> None:
+    """renders figures into imgpath, concurrently if worth it
+
+    pngs: figures already rendered (e.g. plots served to the interface), by
+    file name, which are written as they are
+    """
+    if parallel is None:
+        parallel = PARALLEL
+    if pngs:
+        for name in figures.keys() & pngs.keys():
+            (imgpath / name).write_bytes(pngs[name])
+        figures = {k: v for k, v in figures.items() if k not in pngs}
+    if parallel and len(figures) > 1 and available_cpus() > 1:
+        try:
+            futures = {
+                name: _get_executor().submit(_render_timed, owner, method)
+                for name, (owner, method) in figures.items()
+            }
+            for name, future in futures.items():
+                png, timings = future.result()
+                (imgpath / name).write_bytes(png)
+                for phase, seconds in timings:
+                    metrics.observe_phase(phase, seconds)
+            return
+        except BrokenProcessPool:
+            # a worker died: drop the pool and render here instead
+            shutdown()
+
+    for name, (owner, method) in figures.items():
+        (imgpath / name).write_bytes(_render(owner, method))
@@ -0,0 +1,696 @@
+"""Native typesetting of pdf reports
+
+A Document is a list of blocks (headings, paragraphs, tables, figures and long
+tables) laid out on A4 pages in a single pass, straight into pdf. pdflatex runs
+again until references settle. Here, tables, figures and sections are numbered
+when they are added, and pages are written only once all are laid out, so
+references and the page count are known on the first and only pass.
+
+Text uses the standard pdf fonts (Helvetica and Symbol), measured with the font
+metrics shipped with matplotlib, and figures are embedded from the pngs already
+rendered for the report. Text may contain
+ - [[label]]: the number of the table, figure or section of that label
+ - _{...}: a subscript
+ - **...**, as a whole table cell: bold
+"""
+
+import re
+import struct
+import unicodedata
+import zlib
+from collections.abc import Callable
+from functools import cache
+from io import BytesIO
+from itertools import groupby
+from pathlib import Path
+from typing import BinaryIO
+
+PAGE_WIDTH = 595.28  # A4, in points
+PAGE_HEIGHT = 841.89
+MARGIN = 56.69  # 2 cm
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+FOOTER = 24.0
+
+SIZE = 10.0
+LEADING = 13.0
+PARSKIP = 6.0
+SUBSCRIPT = 0.7
+
+# name -> (pdf resource, base font, afm file)
+FONTS = {
+    "regular": ("F1", "Helvetica", "phvr8a"),
+    "bold": ("F2", "Helvetica-Bold", "phvb8a"),
+    "italic": ("F3", "Helvetica-Oblique", "phvro8a"),
+    "bolditalic": ("F4", "Helvetica-BoldOblique", "phvbo8a"),
+    "symbol": ("F5", "Symbol", "psyr"),
+}
+
+# characters drawn with the Symbol font, and their code in it
+SYMBOLS = {
+    "Δ": 0x44,
+    "θ": 0x71,
+    "∈": 0xCE,
+    "≥": 0xB3,
+    "≤": 0xA3,
+    "−": 0x2D,
+    "≈": 0xBB,
+}
+
+# widths of Helvetica glyphs out of ASCII, in 1/1000 of the font size
+_EXTRA_WIDTHS = {
+    "°": 400,
+    "±": 584,
+    "×": 584,
+    "µ": 556,
+    "–": 556,
+    "—": 1000,
+    "‘": 222,
+    "’": 222,
+    "“": 333,
+    "”": 333,
+    "•": 350,
+}
+
+_REFERENCE = re.compile(r"\[\[([\w:-]+)\]\]")
+_SUBSCRIPT = re.compile(r"_\{([^}]*)\}")
+# text that is not a single run of its font
+_MARKUP = re.compile("_\\{|[" + "".join(SYMBOLS) + "]")
+# bytes escaped in pdf strings
+_UNSAFE = re.compile(rb"[()\\\x00-\x1f\x7f-\xff]")
+_AFM_CHAR = re.compile(rb"^C (-?\d+) ; WX (\d+) ;", re.MULTILINE)
+
+
+@cache
+def _widths(font: str) -> dict[int, int]:
+    """code -> width of the glyphs of a font"""
+    # matplotlib only ships the metrics here: not imported until text is measured
+    import matplotlib
+
+    afm = Path(matplotlib.get_data_path()) / "fonts" / "afm" / f"{FONTS[font][2]}.afm"
+    return {
+        int(code): int(width)
+        for code, width in _AFM_CHAR.findall(afm.read_bytes())
+        if int(code) >= 0
+    }
+
+
+def _encode(text: str) -> bytes:
+    return text.encode("cp1252", errors="replace")
+
+
+def _char_width(widths: dict[int, int], char: str) -> int:
+    code = ord(char)
+    if code < 127:
+        return widths.get(code, 556)
+    if char in _EXTRA_WIDTHS:
+        return _EXTRA_WIDTHS[char]
+    # accented letters are as wide as the letter
+    base = unicodedata.normalize("NFKD", char)[:1]
+    return widths.get(ord(base), 556) if base and ord(base) < 127 else 556
+
+
+@cache
+def _char_widths(font: str) -> dict[str, int]:
+    """char -> width, of printable ASCII (of the symbols, for Symbol)"""
+    widths = _widths(font)
+    if font == "symbol":
+        return {c: widths.get(code, 556) for c, code in SYMBOLS.items()}
+    return {chr(code): widths.get(code, 556) for code in range(32, 127)}
+
+
+def _units(text: str, font: str) -> int:
+    table = _char_widths(font)
+    try:
+        return sum(map(table.__getitem__, text))
+    except KeyError:
+        widths = _widths(font)
+        return sum(table.get(c) or _char_width(widths, c) for c in text)
+
+
+class _Run:
+    """text in one font, maybe a subscript"""
+
+    __slots__ = ("font", "subscript", "text")
+
+    def __init__(self, font: str, subscript: bool, text: str):
+        self.font = font
+        self.subscript = subscript
+        self.text = text
+
+    def width(self, size: float) -> float:
+        scale = SUBSCRIPT if self.subscript else 1.0
+        return _units(self.text, self.font) * size * scale / 1000
+
+    def content(self, size: float) -> bytes:
+        if self.font == "symbol":
+            encoded = bytes(SYMBOLS[c] for c in self.text)
+        else:
+            encoded = _encode(self.text)
+        run_size = size * SUBSCRIPT if self.subscript else size
+        ops = f"/{FONTS[self.font][0]} {run_size:.2f} Tf ".encode()
+        if self.subscript:
+            return (
+                ops
+                + f"{-0.25 * size:.2f} Ts ".encode()
+                + _string(encoded)
+                + b" Tj 0 Ts "
+            )
+        return ops + _string(encoded) + b" Tj "
+
+
+def _escape(match: re.Match) -> bytes:
+    byte = match.group()
+    return b"\\" + byte if byte in b"()\\" else b"\\%03o" % byte[0]
+
+
+def _string(encoded: bytes) -> bytes:
+    return b"(" + _UNSAFE.sub(_escape, encoded) + b")"
+
+
+def _runs(text: str, font: str) -> tuple[_Run, ...]:
+    if not _MARKUP.search(text):
+        return (_Run(font, False, text),)
+    runs = []
+    for i, part in enumerate(_SUBSCRIPT.split(text)):
+        for symbol, chars in groupby(part, key=lambda c: c in SYMBOLS):
+            runs.append(_Run("symbol" if symbol else font, i % 2 == 1, "".join(chars)))
+    return tuple(runs)
+
+
+def text_width(text: str, font: str = "regular", size: float = SIZE) -> float:
+    if not _MARKUP.search(text):
+        return _units(text, font) * size / 1000
+    return sum(run.width(size) for run in _runs(text, font))
+
+
+def _text_op(x: float, y: float, text: str, font: str, size: float) -> bytes:
+    ops = b"".join(run.content(size) for run in _runs(text, font))
+    return b"BT 1 0 0 1 %.2f %.2f Tm " % (x, y) + ops + b"ET\n"
+
+
+def _line_op(x0: float, y0: float, x1: float, y1: float) -> bytes:
+    return b"%.2f %.2f m %.2f %.2f l S\n" % (x0, y0, x1, y1)
+
+
+def wrap(text: str, width: float, font: str = "regular", size: float = SIZE) -> list:
+    """lines of text no wider than width, but for words wider than that"""
+    space = text_width(" ", font, size)
+    lines: list[str] = []
+    line, line_width = [], 0.0
+    for word in text.split():
+        word_width = text_width(word, font, size)
+        if line and line_width + space + word_width > width:
+            lines.append(" ".join(line))
+            line, line_width = [], 0.0
+        line_width += word_width + (space if line else 0.0)
+        line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines or [""]
+
+
+def _cell(text: str | None, font: str) -> tuple[str, str]:
+    text = text or ""
+    if len(text) > 4 and text.startswith("**") and text.endswith("**"):
+        return text[2:-2], "bold"
+    return text, font
+
+
+def png_size(png: Path) -> tuple[int, int]:
+    with png.open("rb") as f:
+        header = f.read(24)
+    if header[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError(f"{png.name} is not a png")
+    return struct.unpack(">II", header[16:24])
+
+
+def _png_chunks(data: bytes):
+    position = 8
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position : position + 8])
+        yield kind, data[position + 8 : position + 8 + length]
+        position += length + 12
+
+
+def _png_image(png: Path) -> tuple[bytes, bytes]:
+    """the dictionary and stream of an image XObject of a png
+
+    8-bit grey or rgb pngs are embedded as they are: pdf decodes their
+    compressed data with the png predictors. Others (e.g. with transparency)
+    are flattened on white first.
+    """
+    data = png.read_bytes()
+    chunks = list(_png_chunks(data))
+    width, height, depth, color, _, _, interlace = struct.unpack(
+        ">IIBBBBB", chunks[0][1]
+    )
+    kinds = {kind for kind, _ in chunks}
+    if depth == 8 and color in (0, 2) and not interlace and b"tRNS" not in kinds:
+        colors = 1 if color == 0 else 3
+        stream = b"".join(chunk for kind, chunk in chunks if kind == b"IDAT")
+        params = b"/DecodeParms << /Predictor 15 /Colors %d /Columns %d >> " % (
+            colors,
+            width,
+        )
+    else:
+        # pillow comes with matplotlib
+        from PIL import Image
+
+        with Image.open(BytesIO(data)) as image:
+            rgba = image.convert("RGBA")
+        flat = Image.new("RGBA", rgba.size, "white")
+        flat.alpha_composite(rgba)
+        colors = 3
+        stream = zlib.compress(flat.convert("RGB").tobytes(), 6)
+        params = b""
+    space = b"/DeviceGray" if colors == 1 else b"/DeviceRGB"
+    head = (
+        b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+        b"/BitsPerComponent 8 /Filter /FlateDecode %s/Length %d >>"
+        % (width, height, space, params, len(stream))
+    )
+    return head, stream
+
+
+class Document:
+    """a report, laid out and written to pdf by write()"""
+
+    def __init__(self, title: str, subtitle: str, date: str, footer: str):
+        self.title = title
+        self.subtitle = subtitle
+        self.date = date
+        self.footer = footer
+        self._blocks: list[tuple[Callable, tuple]] = []
+        self._labels: dict[str, str] = {}
+        self._tables = 0
+        self._figures = 0
+        self._sections = [0, 0]
+        self._appendix = False
+        # content of each page, and png path -> image resource name
+        self._pages: list[list[bytes]] = []
+        self._images: dict[str, str] = {}
+        self._y = 0.0
+
+    # blocks
+
+    def heading(self, text: str, level: int = 1, label: str | None = None) -> None:
+        if level == 1:
+            self._sections = [self._sections[0] + 1, 0]
+            number = self._section_number()
+        else:
+            self._sections[1] += 1
+            number = f"{self._section_number()}.{self._sections[1]}"
+        if label:
+            self._labels[label] = number
+        self._blocks.append((self._layout_heading, (f"{number}  {text}", level)))
+
+    def appendix(self) -> None:
+        """sections are lettered from here on"""
+        self._appendix = True
+        self._sections = [0, 0]
+
+    def paragraph(self, text: str, font: str = "regular", align: str = "left") -> None:
+        self._blocks.append((self._layout_paragraph, (text, font, align)))
+
+    def item(self, label: str, text: str) -> None:
+        """a paragraph of a list, hanging behind its label"""
+        self._blocks.append((self._layout_item, (label, text)))
+
+    def table(
+        self, rows: list[list[str | None]], caption: str, label: str | None = None
+    ) -> None:
+        """a table with a header row, kept on one page
+
+        A None cell continues the cell above it.
+        """
+        number = self._number_table(label)
+        self._blocks.append((self._layout_table, (rows, f"Table {number}: {caption}")))
+
+    def long_table(
+        self,
+        header: list[list[str]],
+        rows: list[list[str]],
+        caption: str,
+        label: str | None = None,
+        size: float = 7.0,
+    ) -> None:
+        """a table over pages, its header repeated on each"""
+        number = self._number_table(label)
+        self._blocks.append(
+            (self._layout_long_table, (header, rows, number, caption, size))
+        )
+
+    def figure(self, png: Path, caption: str, label: str | None = None) -> None:
+        self._figures += 1
+        if label:
+            self._labels[label] = str(self._figures)
+        self._blocks.append(
+            (self._layout_figure, (png, f"Figure {self._figures}: {caption}"))
+        )
+
+    def page_break(self) -> None:
+        self._blocks.append((self._new_page, ()))
+
+    def _section_number(self) -> str:
+        if self._appendix:
+            return chr(ord("A") + self._sections[0] - 1)
+        return str(self._sections[0])
+
+    def _number_table(self, label: str | None) -> int:
+        self._tables += 1
+        if label:
+            self._labels[label] = str(self._tables)
+        return self._tables
+
+    def _resolve(self, text: str) -> str:
+        return _REFERENCE.sub(lambda m: self._labels.get(m.group(1), "??"), text)
+
+    # layout
+
+    def _new_page(self) -> None:
+        self._pages.append([])
+        self._y = PAGE_HEIGHT - MARGIN
+
+    def _fits(self, height: float) -> bool:
+        return self._y - height >= MARGIN + FOOTER
+
+    def _need(self, height: float) -> None:
+        """starts a new page unless height fits on this one"""
+        if not self._fits(height) and self._y < PAGE_HEIGHT - MARGIN:
+            self._new_page()
+
+    def _draw(self, op: bytes) -> None:
+        self._pages[-1].append(op)
+
+    def _text(self, x, y, text, font="regular", size=SIZE, align="left") -> None:
+        if align != "left":
+            width = text_width(text, font, size)
+            x -= width if align == "right" else width / 2
+        self._draw(_text_op(x, y, text, font, size))
+
+    def _layout_title(self) -> None:
+        right = PAGE_WIDTH - MARGIN
+        for line in (self.title, self.subtitle):
+            self._y -= 18
+            self._text(right, self._y, line, "bold", 15, "right")
+        for line in self.date.splitlines():
+            self._y -= 11
+            self._text(right, self._y, line, "regular", 9, "right")
+        self._y -= 8
+
+    def _layout_heading(self, text: str, level: int) -> None:
+        size = 14.0 if level == 1 else 11.5
+        space = 14.0 if level == 1 else 10.0
+        # kept with a few lines of what follows
+        self._need(space + size + 3 * LEADING)
+        self._y -= space + size
+        self._text(MARGIN, self._y, text, "bold", size)
+        self._y -= PARSKIP
+
+    def _layout_lines(self, lines, x, font, size, leading, align="left") -> None:
+        for line in lines:
+            self._need(leading)
+            self._y -= leading
+            if align == "center":
+                self._text(x + TEXT_WIDTH / 2, self._y, line, font, size, "center")
+            else:
+                self._text(x, self._y, line, font, size)
+
+    def _layout_paragraph(self, text: str, font: str, align: str) -> None:
+        lines = wrap(self._resolve(text), TEXT_WIDTH, font)
+        self._layout_lines(lines, MARGIN, font, SIZE, LEADING, align)
+        self._y -= PARSKIP
+
+    def _layout_item(self, label: str, text: str) -> None:
+        indent = 18.0
+        lines = wrap(self._resolve(text), TEXT_WIDTH - indent)
+        self._need(LEADING)
+        self._text(MARGIN, self._y - LEADING, label)
+        self._layout_lines(lines, MARGIN + indent, "regular", SIZE, LEADING)
+        self._y -= PARSKIP / 2
+
+    def _caption(self, caption: str) -> list[str]:
+        return wrap(self._resolve(caption), TEXT_WIDTH - 40, "regular", 9)
+
+    def _layout_table(self, rows: list[list[str | None]], caption: str) -> None:
+        size, leading, pad = 9.0, 11.0, 4.0
+        ncols = max(len(row) for row in rows)
+        rows = [row + [""] * (ncols - len(row)) for row in rows]
+        cells = [
+            [
+                _cell(self._resolve(c) if c else c, "bold" if i == 0 else "regular")
+                for c in row
+            ]
+            for i, row in enumerate(rows)
+        ]
+        widths = [
+            max(text_width(text, font, size) for text, font in column) + 2 * pad
+            for column in zip(*cells)
+        ]
+        if sum(widths) > TEXT_WIDTH:
+            widths = [w * TEXT_WIDTH / sum(widths) for w in widths]
+        wrapped = [
+            [
+                wrap(text, w - 2 * pad, font, size)
+                for (text, font), w in zip(row, widths)
+            ]
+            for row in cells
+        ]
+        heights = [
+            2 * pad + size + (max(len(lines) for lines in row) - 1) * leading
+            for row in wrapped
+        ]
+        captions = self._caption(caption)
+        self._need(sum(heights) + PARSKIP + len(captions) * 11 + 2 * LEADING)
+
+        self._y -= PARSKIP
+        left = MARGIN + (TEXT_WIDTH - sum(widths)) / 2
+        edges = [left]
+        for w in widths:
+            edges.append(edges[-1] + w)
+        top = self._y
+        self._draw(b"0.5 w\n")
+        for row, row_cells, cell_lines, height in zip(rows, cells, wrapped, heights):
+            for c in range(ncols):
+                if row[c] is not None:
+                    self._draw(_line_op(edges[c], top, edges[c + 1], top))
+                font = row_cells[c][1]
+                for n, line in enumerate(cell_lines[c]):
+                    y = top - pad - 0.8 * size - n * leading
+                    if c == 0:
+                        self._text(edges[c] + pad, y, line, font, size)
+                    else:
+                        center = (edges[c] + edges[c + 1]) / 2
+                        self._text(center, y, line, font, size, "center")
+            for x in edges:
+                self._draw(_line_op(x, top, x, top - height))
+            top -= height
+        self._draw(_line_op(edges[0], top, edges[-1], top))
+        self._y = top - 4
+        self._layout_lines(captions, MARGIN, "regular", 9, 11, "center")
+        self._y -= LEADING
+
+    def _layout_long_table(self, header, rows, number, caption, size) -> None:
+        pad = 2.5
+        # widths of the cells at a size of 1, measured once
+        measured = [[text_width(c, "regular", 1.0) for c in row] for row in rows]
+        widths = [
+            max(text_width(c, "bold", 1.0) for c in column) for column in zip(*header)
+        ]
+        for row_widths in measured:
+            widths = list(map(max, widths, row_widths))
+        widths = [w * size + 2 * pad for w in widths]
+        total = sum(widths)
+        if total > TEXT_WIDTH:
+            size *= TEXT_WIDTH / total
+            widths = [w * TEXT_WIDTH / total for w in widths]
+        leading = size * 1.35
+        left = MARGIN + (TEXT_WIDTH - sum(widths)) / 2
+        edges = [left]
+        for w in widths:
+            edges.append(edges[-1] + w)
+        centers = [(a + b) / 2 for a, b in zip(edges, edges[1:])]
+        first = f"Table {number}: {caption}."
+        continued = f"Table {number}: {caption}, continued from previous page."
+
+        def start(caption: str) -> None:
+            self._need(2 * 11 + (len(header) + 2) * leading)
+            for line in self._caption(caption):
+                self._y -= 11
+                self._text(PAGE_WIDTH / 2, self._y, line, "regular", 9, "center")
+            self._y -= 4
+            self._draw(b"0.5 w\n")
+            self._draw(_line_op(edges[0], self._y, edges[-1], self._y))
+            for line in header:
+                self._y -= leading
+                for x, text in zip(centers, line):
+                    self._text(x, self._y + 0.3 * size, text, "bold", size, "center")
+            self._y -= 0.35 * size
+            self._draw(b"1 w\n")
+            self._draw(_line_op(edges[0], self._y, edges[-1], self._y))
+            self._draw(b"0.5 w\n")
+
+        def close(top: float) -> None:
+            for x in edges:
+                self._draw(_line_op(x, top, x, self._y))
+
+        start(first)
+        top = self._y
+        for row, row_widths in zip(rows, measured):
+            if not self._fits(leading):
+                close(top)
+                self._new_page()
+                start(continued)
+                top = self._y
+            self._y -= leading
+            baseline = self._y + 0.3 * size
+            ops = [_text_op(edges[0] + pad, baseline, row[0], "regular", size)]
+            for x, text, w in zip(centers[1:], row[1:], row_widths[1:]):
+                ops.append(_text_op(x - w * size / 2, baseline, text, "regular", size))
+            ops.append(_line_op(edges[0], self._y, edges[-1], self._y))
+            self._draw(b"".join(ops))
+        close(top)
+        self._y -= LEADING
+
+    def _layout_figure(self, png: Path, caption: str) -> None:
+        width, height = png_size(png)
+        captions = self._caption(caption)
+        below = 6 + len(captions) * 11 + LEADING
+        box_width = TEXT_WIDTH
+        box_height = box_width * height / width
+        room = PAGE_HEIGHT - 2 * MARGIN - FOOTER - below
+        if box_height > room:
+            box_width *= room / box_height
+            box_height = room
+        self._need(box_height + below)
+        name = self._images.setdefault(str(png), f"Im{len(self._images) + 1}")
+        self._y -= box_height
+        x = MARGIN + (TEXT_WIDTH - box_width) / 2
+        self._draw(
+            b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q\n"
+            % (box_width, box_height, x, self._y, name.encode())
+        )
+        self._y -= 6
+        self._layout_lines(captions, MARGIN, "regular", 9, 11, "center")
+        self._y -= LEADING
+
+    # output
+
+    def write(self, target: BinaryIO) -> None:
+        """lays the document out and writes it as pdf, in one pass"""
+        self._pages = []
+        self._images = {}
+        self._new_page()
+        self._layout_title()
+        for layout, args in self._blocks:
+            layout(*args)
+
+        total = len(self._pages)
+        for number, page in enumerate(self._pages, 1):
+            y = MARGIN - 4
+            page.append(
+                b"0.5 w\n" + _line_op(MARGIN, y + 10, PAGE_WIDTH - MARGIN, y + 10)
+            )
+            page.append(_text_op(MARGIN, y, self.footer, "regular", 8))
+            label = f"Page {number} of {total}"
+            x = PAGE_WIDTH - MARGIN - text_width(label, "regular", 8)
+            page.append(_text_op(x, y, label, "regular", 8))
+        _PdfWriter(target).write(self._pages, self._images, self.title, self.subtitle)
+
+
+class _PdfWriter:
+    """pdf objects, written as they are made"""
+
+    def __init__(self, target: BinaryIO):
+        self.target = target
+        self.offsets: list[int] = []
+        self.position = 0
+
+    def _emit(self, content: bytes) -> None:
+        self.target.write(content)
+        self.position += len(content)
+
+    def _reserve(self) -> int:
+        self.offsets.append(0)
+        return len(self.offsets)
+
+    def _object(self, number: int, head: bytes, stream: bytes | None = None) -> None:
+        self.offsets[number - 1] = self.position
+        self._emit(b"%d 0 obj\n" % number + head)
+        if stream is not None:
+            self._emit(b"\nstream\n" + stream + b"\nendstream")
+        self._emit(b"\nendobj\n")
+
+    def _stream(self, content: bytes) -> int:
+        number = self._reserve()
+        stream = zlib.compress(content, 6)
+        head = b"<< /Filter /FlateDecode /Length %d >>" % len(stream)
+        self._object(number, head, stream)
+        return number
+
+    def write(
+        self,
+        pages: list[list[bytes]],
+        images: dict[str, str],
+        title: str,
+        subtitle: str,
+    ) -> None:
+        self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        catalog, root = self._reserve(), self._reserve()
+
+        fonts = []
+        for resource, base, _ in FONTS.values():
+            number = self._reserve()
+            encoding = b"" if base == "Symbol" else b" /Encoding /WinAnsiEncoding"
+            self._object(
+                number,
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s%s >>"
+                % (base.encode(), encoding),
+            )
+            fonts.append(b"/%s %d 0 R" % (resource.encode(), number))
+
+        xobjects = []
+        for png, name in images.items():
+            number = self._reserve()
+            self._object(number, *_png_image(Path(png)))
+            xobjects.append(b"/%s %d 0 R" % (name.encode(), number))
+
+        resources = self._reserve()
+        self._object(
+            resources,
+            b"<< /Font << %s >> /XObject << %s >> >>"
+            % (b" ".join(fonts), b" ".join(xobjects)),
+        )
+
+        kids = []
+        for page in pages:
+            content = self._stream(b"".join(page))
+            number = self._reserve()
+            self._object(
+                number,
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+                b"/Resources %d 0 R /Contents %d 0 R >>"
+                % (root, PAGE_WIDTH, PAGE_HEIGHT, resources, content),
+            )
+            kids.append(b"%d 0 R" % number)
+
+        self._object(
+            root,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids)),
+        )
+        self._object(catalog, b"<< /Type /Catalog /Pages %d 0 R >>" % root)
+        info = self._reserve()
+        self._object(
+            info,
+            b"<< /Title %s /Producer (iec62209 service) >>"
+            % _string(_encode(f"{title} - {subtitle}")),
+        )
+
+        xref = self.position
+        self._emit(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.offsets) + 1))
+        for offset in self.offsets:
+            self._emit(b"%010d 00000 n \n" % offset)
+        self._emit(
+            b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(self.offsets) + 1, catalog, info, xref)
+        )
@@ -0,0 +1,689 @@
+"""Reports of the native backend, from the inputs of texwriter
+
+The same tables, figures and outcomes as the LaTeX reports, and the essentials
+of their text: the certified layout, with the full description of the
+procedure, is the LaTeX one.
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+from ..utils.common import (
+    DataSetInterface,
+    Goodfit,
+    ModelMetadata,
+    Residuals,
+    SampleConfig,
+)
+from .pdfdocument import Document
+from .texutils import ReportStage
+from .texwriter import sample_table_caption, sample_table_rows
+
+TITLE = "IEC 62209-3 Validation Results"
+
+SUBTITLES = {
+    ReportStage.CREATION: "GPI Model Creation",
+    ReportStage.CONFIRMATION: "GPI Model Confirmation",
+    ReportStage.VERIFICATION: "Critical Data Space Search",
+}
+
+STEPS = {
+    ReportStage.CREATION: "GPI model creation",
+    ReportStage.CONFIRMATION: "model confirmation",
+    ReportStage.VERIFICATION: "critical data space search",
+}
+
+ACCEPTANCE_CRITERION = "ΔSAR ∈ [−U, +O]"
+
+SITE = "http://sarvalidation.site/"
+SOURCES = "https://github.com/ITISFoundation/publication-IEC62209"
+
+REFERENCES = [
+    "[1] IEC 62209-3, “Measurement procedure for the assessment of specific "
+    "absorption rate of human exposure to radio frequency fields from hand-held "
+    "and body-mounted wireless communication devices - Part 3: Vector "
+    "measurement-based systems (Frequency range of 600 MHz to 6 GHz)”, "
+    "Committee Draft, February 2023.",
+    "[2] C. Bujard, E. Neufeld, M. Douglas, J. Wiart, N. Kuster, “A "
+    "Gaussian-process-model-based approach for robust, independent, and "
+    "implementation-agnostic validation of complex multi-variable measurement "
+    "systems: application to SAR measurement systems,” online "
+    "https://arxiv.org/abs/2211.12907, uploaded April 12, 2023.",
+]
+
+SAMPLE_TABLE_HEADER = [
+    [
+        "",
+        "P_{f}",
+        "",
+        "PAPR",
+        "BW",
+        "s",
+        "θ",
+        "x",
+        "y",
+        "SAR",
+        "u_{s}",
+        "ΔSAR",
+        "mpe",
+        "Pass",
+    ],
+    [
+        "antenna",
+        "(dB)",
+        "Mod",
+        "(dB)",
+        "(MHz)",
+        "(mm)",
+        "(°)",
+        "(mm)",
+        "(mm)",
+        "(W/kg)",
+        "(%)",
+        "(dB)",
+        "(dB)",
+        "?",
+    ],
+]
+
+
+def _outcome(ok: bool) -> str:
+    return "**Pass**" if ok else "**Fail**"
+
+
+def new_document(stage: ReportStage, version: str) -> Document:
+    now = datetime.now()
+    return Document(
+        TITLE,
+        SUBTITLES[stage],
+        now.strftime("%Y/%m/%d\n%H:%M:%S"),
+        f"{TITLE}: {SUBTITLES[stage]} ({SITE} version {version})",
+    )
+
+
+def write_one_line_summary(doc: Document, success: bool, stage: ReportStage) -> None:
+    line = "The SAR measurement system described in Table [[tab:system]] "
+    line += "successfully completed" if success else "failed to complete"
+    if stage == ReportStage.CREATION:
+        line += " the GPI model creation step."
+    elif stage == ReportStage.CONFIRMATION:
+        line += " the GPI model confirmation step."
+    elif stage == ReportStage.VERIFICATION:
+        line += " the critical data space search."
+        if success:
+            line += (
+                " In combination with the model confirmation step, the system "
+                "can therefore be considered successfully validated."
+            )
+    doc.paragraph(line, font="bolditalic")
+
+
+def write_model_metadata(doc: Document, mm: ModelMetadata) -> None:
+    doc.table(
+        [
+            ["Measurement system", "Value"],
+            ["Measurement system name", mm.systemName],
+            ["Manufacturer", mm.manufacturer],
+            ["Phantom type", mm.phantomType],
+            ["Hardware version", mm.hardwareVersion],
+            ["Software version", mm.softwareVersion],
+        ],
+        "Measurement system analyzed in this report.",
+        label="tab:system",
+    )
+
+
+def _summary_header(outcome: str = "Outcome") -> list[str | None]:
+    return ["Test", "Success Criterion", outcome, "Pass / Fail"]
+
+
+def write_creation_summary(doc: Document, data: Goodfit) -> None:
+    doc.table(
+        [
+            _summary_header(),
+            [
+                "Acceptance of data",
+                ACCEPTANCE_CRITERION,
+                "See Table [[tab:acceptance]]",
+                _outcome(data.accept),
+            ],
+            [
+                "Model fitting",
+                "nrmse < 25 %",
+                f"{float(data.gfres[1]) * 100:.1f} %",
+                _outcome(data.gfres[0]),
+            ],
+        ],
+        "Summary of the GPI Model creation outcomes for the measurement system "
+        "described in Table [[tab:system]].",
+        label="tab:summary",
+    )
+
+
+def _similarity_rows(residuals: Residuals) -> list[list[str | None]]:
+    return [
+        [
+            "Similarity",
+            "location ∈ [−1, 1]",
+            f"{residuals.location():.3f}",
+            _outcome(residuals.qq_location_ok()),
+        ],
+        [
+            None,
+            "scale ∈ [0.5, 1.5]",
+            f"{residuals.scale():.3f}",
+            _outcome(residuals.qq_scale_ok()),
+        ],
+    ]
+
+
+def write_confirmation_summary(
+    doc: Document, accepted: bool, residuals: Residuals
+) -> None:
+    doc.table(
+        [
+            _summary_header(),
+            [
+                "Acceptance of data",
+                ACCEPTANCE_CRITERION,
+                "See Table [[tab:test]]",
+                _outcome(accepted),
+            ],
+            [
+                "Normality",
+                "p ≥ 0.05",
+                f"{residuals.normality():.3f}",
+                _outcome(residuals.normality_ok()),
+            ],
+            *_similarity_rows(residuals),
+        ],
+        "Summary of the GPI Model confirmation outcomes for the measurement "
+        "system described in Table [[tab:system]].",
+        label="tab:summary",
+    )
+
+
+def write_verification_summary(doc: Document, accepted: bool) -> None:
+    doc.table(
+        [
+            _summary_header("Outcomes"),
+            [
+                "Acceptance of data",
+                ACCEPTANCE_CRITERION,
+                "See Section [[sec:acceptance_criteria]]",
+                _outcome(accepted),
+            ],
+        ],
+        "Summary of the critical data space search outcomes for the measurement "
+        "system described in Table [[tab:system]].",
+        label="tab:summary",
+    )
+
+
+def write_sample_parameters(
+    doc: Document, cfg: SampleConfig, md: ModelMetadata, stage: ReportStage
+) -> None:
+    stagestring = {
+        ReportStage.CREATION: "relevant",
+        ReportStage.CONFIRMATION: "confirmed",
+        ReportStage.VERIFICATION: "critically examined",
+    }[stage]
+    rows: list[list[str | None]] = [
+        ["Parameter", "Value"],
+        ["Measurement area: x, y (mm)", f"{md.modelAreaX}, {md.modelAreaY}"],
+        ["Frequency range (MHz)", f"{cfg.fRangeMin} – {cfg.fRangeMax}"],
+    ]
+    if stage is ReportStage.CREATION:
+        rows.append(["Size of training data", f"{cfg.sampleSize}"])
+    elif stage is ReportStage.CONFIRMATION:
+        rows.append(["Size of test data", f"{cfg.sampleSize}"])
+    doc.table(
+        rows,
+        "Range of the exposure parameter space covered by the test "
+        "configurations. The GPI model can therefore be considered to be "
+        f"{stagestring} within this range.",
+        label="tab:params",
+    )
+
+
+def write_outcome_critical(doc: Document, sampleSize: int) -> None:
+    doc.table(
+        [
+            ["Parameter", "Value"],
+            ["Minimum failure risk", "5 %"],
+            ["Number of critical cases", f"{sampleSize:.0f}"],
+        ],
+        "Outcome of the critical data space search.",
+        label="tab:outcome_critical",
+    )
+
+
+def write_sample_acceptance(doc: Document, accepted: bool) -> None:
+    doc.table(
+        [
+            _summary_header(),
+            [
+                "Acceptance of data",
+                ACCEPTANCE_CRITERION,
+                "See Table [[tab:test]]",
+                "Pass" if accepted else "Fail",
+            ],
+        ],
+        "Result for the acceptance criterion.",
+        label="tab:acceptance",
+    )
+
+
+def write_model_fitting(doc: Document, gfres: tuple) -> None:
+    doc.table(
+        [
+            _summary_header(),
+            [
+                "Model fitting",
+                "nrmse < 25 %",
+                f"{float(gfres[1]) * 100:.1f} %",
+                _outcome(gfres[0]),
+            ],
+        ],
+        "Quantification (normalized mean squared error) of the semi-variogram "
+        "fitting quality, which affects the GPI model quality.",
+        label="tab:nrmse",
+    )
+
+
+def write_normality(doc: Document, residuals: Residuals) -> None:
+    doc.table(
+        [
+            ["Test", "Specification", "Value", "Pass / Fail"],
+            [
+                "Normality",
+                "p ≥ 5 %",
+                f"{residuals.normality() * 100:.1f} %",
+                _outcome(residuals.normality_ok()),
+            ],
+        ],
+        "Summary results of the GPI Model Confirmation step for the measurement "
+        "system described in Table [[tab:system]].",
+        label="tab:normality",
+    )
+
+
+def write_similarity(doc: Document, residuals: Residuals) -> None:
+    doc.table(
+        [_summary_header(), *_similarity_rows(residuals)],
+        "Summary of the GPI model confirmation results for the measurement "
+        "system described in Table [[tab:system]].",
+        label="tab:qq",
+    )
+
+
+def write_sample_table(doc: Document, ds: DataSetInterface, stage: ReportStage):
+    rows = [cells + ["N" if fail else "Y"] for cells, fail in sample_table_rows(ds)]
+    doc.long_table(
+        SAMPLE_TABLE_HEADER, rows, sample_table_caption(stage), label="tab:test"
+    )
+
+
+#
+# reports
+#
+
+
+def _write_introduction(doc: Document, stage: ReportStage) -> None:
+    doc.heading("Executive Summary", label="sec:exec_summary")
+    doc.paragraph(
+        "The SAR measurement system validation procedure described in IEC "
+        "62209-3 [1] is a three step procedure that consists of a) GPI model "
+        "creation, b) model confirmation, and c) the critical data space search. "
+        "This automatically generated document reports on the outcome of the "
+        f"{STEPS[stage]}."
+    )
+
+
+def _write_about(doc: Document, stage: ReportStage, version: str) -> None:
+    doc.heading("Introduction", label="sec:start")
+    doc.paragraph(
+        "The GPI model is a model that describes the expected measurement error "
+        "and uncertainty for the given SAR measurement system of interest as a "
+        "function of exposure parameters. This report provides the results of "
+        f"the {STEPS[stage]} step of the validation procedure of IEC 62209-3 "
+        "[1]. It has been automatically generated by an online-accessible, "
+        f"GUI-based validation application ({SITE} version {version}) using "
+        "measured data obtained with the SAR measurement system described in "
+        "Table [[tab:system]]."
+    )
+    doc.paragraph(
+        "Background and additional information on the methodology can be found "
+        "in the open-access paper [2]. The open-source software leveraged by the "
+        "online application is provided with IEC 62209-3 and can be found at "
+        f"{SOURCES}."
+    )
+
+
+def _write_acceptance_criterion(doc: Document) -> None:
+    doc.item(
+        "•",
+        "acceptance: all deviations ΔSAR_{j} between the measured SAR and the "
+        "numerical target values must be within the acceptance criteria of "
+        "Clause D.4.7 of [1], −U < r_{s,j} < +O, where r_{s,j} is the linear "
+        "deviation of the measured SAR from its target, +O = 2 × u_{s} + 15 % "
+        "and 2 × u_{s} is the reported measurement uncertainty with a 95 % "
+        "confidence level. In dB, the requirement simplifies to |ΔSAR_{j}| ≤ "
+        "10 × log_{10}(+O).",
+    )
+
+
+def _write_references(doc: Document) -> None:
+    doc.heading("References")
+    for reference in REFERENCES:
+        doc.paragraph(reference)
+
+
+def write_creation_report(
+    imgpath: Path,
+    training_set: DataSetInterface,
+    metadata: ModelMetadata,
+    goodfit: Goodfit,
+    version: str,
+) -> Document:
+    stage = ReportStage.CREATION
+    doc = new_document(stage, version)
+    accepted = goodfit.accept
+    gfres = goodfit.gfres
+
+    _write_introduction(doc, stage)
+    write_one_line_summary(doc, accepted and gfres[0], stage)
+    doc.paragraph(
+        "The results of the two test criteria of the GPI model creation are "
+        "shown in Table [[tab:summary]]."
+    )
+    write_model_metadata(doc, metadata)
+    write_creation_summary(doc, goodfit)
+
+    _write_about(doc, stage, version)
+    doc.heading("Success Criteria", level=2, label="sec:quantities")
+    doc.paragraph("Two criteria must be met for the model creation to be successful:")
+    _write_acceptance_criterion(doc)
+    doc.item(
+        "•",
+        "nrmse ≤ 25 %: the normalized root-mean-square error of the model must "
+        "be less than or equal to 25 %. Otherwise, it is recommended not to "
+        "continue with the model confirmation or critical data space search.",
+    )
+
+    doc.heading("Model Creation")
+    doc.heading("Limits of Relevant Exposure Parameter Space", level=2)
+    doc.paragraph(
+        "The test configurations were generated for measurement on the system "
+        "detailed in Table [[tab:system]] according to the parameters in Table "
+        "[[tab:params]], which therefore define the extent of the exposure "
+        "parameter space for which the GPI model can be considered relevant."
+    )
+    write_sample_parameters(doc, training_set.config, metadata, stage)
+
+    doc.heading("Test Configurations", level=2)
+    doc.paragraph(
+        "Figure [[fig:training-dist]] illustrates how the test configuration "
+        "sample used for GPI model construction is distributed along the "
+        "different exposure parameter space dimensions. The complete details on "
+        "the exposure conditions and measurement results are shown in Annex "
+        "[[sec:training-data]]."
+    )
+    doc.figure(
+        imgpath / "model-creation-distribution.png",
+        "Distribution of the test configurations showing how they uniformly, but "
+        "pseudo-randomly, cover the exposure parameter space dimensions.",
+        label="fig:training-dist",
+    )
+
+    doc.heading("Performance on Acceptance Criteria", level=2)
+    doc.paragraph(
+        "The obtained deviations (ΔSAR_{10g}) of the test configuration "
+        "measurements from the target values are shown in Figure "
+        "[[fig:creation-acc]], along with the acceptance thresholds. The raw "
+        "data are tabulated in Table [[tab:test]] in the Appendix. The pass/fail "
+        "result is shown in Table [[tab:acceptance]]."
+    )
+    write_sample_acceptance(doc, accepted)
+    doc.figure(
+        imgpath / "model-creation-acceptance.png",
+        "Deviations in SAR_{10g} compared to the target values for the test "
+        "configurations. The deviations are compared to the maximum permissible "
+        "errors (mpe; dashed lines). Blue dots are inside the mpe. Any red dots "
+        "are outside the mpe.",
+        label="fig:creation-acc",
+    )
+
+    doc.heading("Model Fitting Quality", level=2)
+    doc.paragraph(
+        "The obtained SAR-error semivariogram is shown in Figure "
+        "[[fig:creation-variogram]]. The upper graph shows the fit of the model "
+        "to the model errors, the lower bar graph the distribution of the "
+        "errors. The quality of that fit (quantified as nrmse) is relevant with "
+        "regard to the GPI model quality. Figure [[fig:creation-marginals]] "
+        "shows how the errors are distributed along the different dimensions of "
+        "the parameter space. The pass/fail result is shown in Table "
+        "[[tab:nrmse]]."
+    )
+    write_model_fitting(doc, gfres)
+    doc.figure(
+        imgpath / "model-creation-semivariogram.png",
+        "GPI semi-variogram construction: fitting (top), and histogram of the "
+        "lags available for the semi-variogram construction (bottom).",
+        label="fig:creation-variogram",
+    )
+    doc.figure(
+        imgpath / "model-creation-marginals.png",
+        "Marginals showing the distribution of measurement errors in the "
+        "training data.",
+        label="fig:creation-marginals",
+    )
+
+    _write_references(doc)
+    doc.page_break()
+    doc.appendix()
+    doc.heading("Training Data Set", label="sec:training-data")
+    write_sample_table(doc, training_set, stage)
+    return doc
+
+
+def write_confirmation_report(
+    imgpath: Path,
+    test_set: DataSetInterface,
+    metadata: ModelMetadata,
+    accepted: bool,
+    residuals: Residuals,
+    version: str,
+) -> Document:
+    stage = ReportStage.CONFIRMATION
+    doc = new_document(stage, version)
+
+    _write_introduction(doc, stage)
+    write_one_line_summary(doc, accepted and residuals.all_ok(), stage)
+    doc.paragraph(
+        "The results of the GPI model confirmation are shown in Table "
+        "[[tab:summary]]."
+    )
+    write_model_metadata(doc, metadata)
+    write_confirmation_summary(doc, accepted, residuals)
+
+    _write_about(doc, stage, version)
+    doc.heading("Success Criteria", level=2, label="sec:quantities")
+    doc.paragraph(
+        "All of the following criteria must be met for the model confirmation "
+        "step to be successfully concluded:"
+    )
+    _write_acceptance_criterion(doc)
+    doc.item(
+        "•",
+        "normality: the deviations between measured and target SAR values are "
+        "expected to be normally distributed (Shapiro-Wilk test, p ≥ 5 %).",
+    )
+    doc.item(
+        "•",
+        "similarity: the distribution of the measured deviations of the test "
+        "data should be similar to that of the configurations used for model "
+        "construction. The location of their Q-Q plot must be within [−1, 1] "
+        "and its scale within [0.5, 1.5].",
+    )
+
+    doc.heading("Model Confirmation")
+    doc.heading("Limits of Relevant Exposure Parameter Space", level=2)
+    doc.paragraph(
+        "The test configurations for model confirmation were generated for "
+        "measurement on the system detailed in Table [[tab:system]] according to "
+        "the parameters in Table [[tab:params]], which therefore define the "
+        "extent of the exposure parameter space for which the GPI model can be "
+        "considered to be confirmed."
+    )
+    write_sample_parameters(doc, test_set.config, metadata, stage)
+
+    doc.heading("Performance on Acceptance Criteria", level=2)
+    doc.paragraph(
+        "The obtained deviations (ΔSAR_{10g}) of the test configuration "
+        "measurements from the target values are shown in Figure "
+        "[[fig:confirm-acc]], along with the acceptance thresholds. The complete "
+        "details on the exposure conditions and measurement results are "
+        "tabulated in Table [[tab:test]] in Appendix [[sec:test-data]]. The "
+        "pass/fail result is shown in Table [[tab:acceptance]]."
+    )
+    write_sample_acceptance(doc, accepted)
+    doc.figure(
+        imgpath / "model-confirm-acceptance.png",
+        "Deviations of the measured SAR_{10g} from the target values for the "
+        "confirmation test configurations. The deviations are compared to the "
+        "maximum permissible errors (mpe; dashed lines). Blue dots are inside "
+        "the mpe. Any red dots are outside the mpe.",
+        label="fig:confirm-acc",
+    )
+
+    doc.heading("Normality", level=2)
+    doc.paragraph(
+        "If the GPI model is generally valid, the deviations between measured "
+        "and target SAR values are expected to be non-systematic and normally "
+        "distributed. The Shapiro-Wilk test is applied to test for normality. "
+        "Table [[tab:normality]] shows its p-value and the pass/fail result."
+    )
+    write_normality(doc, residuals)
+
+    doc.heading("Similarity", level=2)
+    doc.paragraph(
+        "The QQ-plot in Figure [[fig:confirm-qqplot]] compares the distribution "
+        "of the deviations between the GPI model prediction and the measurement "
+        "results against the expected standard normal distribution. The location "
+        "and scale of the fitted linear relationship should be within the "
+        "acceptance ranges of Table [[tab:qq]]."
+    )
+    write_similarity(doc, residuals)
+    doc.figure(
+        imgpath / "model-confirm-qqplot.png",
+        "QQ-plot of the SAR deviations, comparing the probability distributions "
+        "of the created validation model and the test set. These SAR deviations "
+        "are expected to be normally distributed. The linear regression line "
+        "(red) through the resulting points (blue) should be close to the "
+        "reference line (black).",
+        label="fig:confirm-qqplot",
+    )
+
+    _write_references(doc)
+    doc.page_break()
+    doc.appendix()
+    doc.heading(
+        "Test Data Set Configurations and Measurement Outcomes", label="sec:test-data"
+    )
+    write_sample_table(doc, test_set, stage)
+    return doc
+
+
+def write_verification_report(
+    imgpath: Path,
+    critical_set: DataSetInterface,
+    metadata: ModelMetadata,
+    accepted: bool,
+    version: str,
+) -> Document:
+    stage = ReportStage.VERIFICATION
+    doc = new_document(stage, version)
+    trivial_case = critical_set.size == 0
+
+    _write_introduction(doc, stage)
+    write_one_line_summary(doc, accepted, stage)
+    doc.paragraph("The results of this procedure are shown in Table [[tab:summary]].")
+    write_model_metadata(doc, metadata)
+    write_verification_summary(doc, accepted)
+
+    _write_about(doc, stage, version)
+    doc.paragraph(
+        "The goal of this step is to test the SAR measurement system performance "
+        "in regions of the exposure configuration space where the system is "
+        "likely (5 % or more) to exceed the acceptable measurement error "
+        "according to the GPI model."
+    )
+    doc.heading("Success Criterion", level=2, label="sec:quantities")
+    doc.paragraph(
+        "The following criterion must be met for the system to successfully "
+        "pass the critical data space search:"
+    )
+    _write_acceptance_criterion(doc)
+
+    doc.heading("Critical Cases")
+    doc.heading("Limits of Relevant Exposure Parameter Space", level=2)
+    doc.paragraph(
+        "The test configurations for the critical testing of the measurement "
+        "system detailed in Table [[tab:system]] were chosen within the "
+        "parameter range defined in Table [[tab:params]], which therefore "
+        "defines the extent of the exposure parameter space for which the GPI "
+        "model can be considered to have been critically examined."
+    )
+    write_sample_parameters(doc, critical_set.config, metadata, stage)
+
+    doc.heading("Outcome of Critical Data Space Search", level=2)
+    doc.paragraph(
+        "Table [[tab:outcome_critical]] shows the results of the critical data "
+        "space search, showing the number of test conditions that have been "
+        "identified as having at least the given risk of failing the acceptance "
+        "criteria."
+    )
+    write_outcome_critical(doc, critical_set.config.sampleSize)
+
+    doc.heading(
+        "Performance on Acceptance Criteria",
+        level=2,
+        label="sec:acceptance_criteria",
+    )
+    if trivial_case:
+        doc.paragraph(
+            "Since the critical data space search found no cases with at least "
+            "5 % risk of exceeding the acceptance criteria, the SAR measurement "
+            "system successfully passes the critical data space search without "
+            "testing."
+        )
+        _write_references(doc)
+        return doc
+
+    doc.paragraph(
+        "The obtained deviations (ΔSAR_{10g}) of the critical test configuration "
+        "measurements from the target values are shown in Figure "
+        "[[fig:critical-acc]], along with the acceptance thresholds. The "
+        "complete details on the exposure conditions and measurement results are "
+        "tabulated in Table [[tab:test]] in Appendix [[sec:critical-data]]. The "
+        "pass/fail result is shown in Table [[tab:acceptance]]."
+    )
+    write_sample_acceptance(doc, accepted)
+    doc.figure(
+        imgpath / "critical-acceptance.png",
+        "Deviations of the measured SAR_{10g} from the target values for the "
+        "critical test configurations. The deviations are compared to the "
+        "maximum permissible errors (mpe; dashed lines). Blue dots are inside "
+        "the mpe. Any red dots are outside the mpe.",
+        label="fig:critical-acc",
+    )
+
+    _write_references(doc)
+    doc.page_break()
+    doc.appendix()
+    doc.heading(
+        "Critical Configurations and Measurement Outcomes", label="sec:critical-data"
+    )
+    write_sample_table(doc, critical_set, stage)
+    return doc
@@ -2,6 +2,8 @@ from enum import Enum
 from subprocess import PIPE, run
 from tempfile import TemporaryDirectory
 
+from ..utils import metrics, progress
+
 
 class ReportStage(int, Enum):
     CREATION = 0
@@ -9,15 +11,28 @@ class ReportStage(int, Enum):
     VERIFICATION = 2
 
 
+class ReportBackend(str, Enum):
+    # typeset by pdflatex: the certified layout
+    LATEX = "latex"
+    # laid out in python, in one pass, without TeX
+    NATIVE = "native"
+
+
 def typeset(folder, main: str) -> str:
     rerun = True
-    while rerun:
-        proc = run(
-            ["pdflatex", "-interaction=nonstopmode", main],
-            cwd=folder,
-            stdout=PIPE,
-        )
-        rerun = proc.stdout.find(b"Rerun") != -1
+    passes = 0
+    with progress.phase("typeset"):
+        while rerun:
+            with metrics.timed("pdflatex"):
+                proc = run(
+                    ["pdflatex", "-interaction=nonstopmode", main],
+                    cwd=folder,
+                    stdout=PIPE,
+                )
+            passes += 1
+            rerun = proc.stdout.find(b"Rerun") != -1
+            # the number of passes is not known in advance
+            progress.update(passes=passes)
     return main.replace(".tex", ".pdf")
 
 
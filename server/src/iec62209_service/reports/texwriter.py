@@ -1,7 +1,5 @@
 # fmt: off
 
-from math import fabs
-
 from ..utils.common import (
     DataSetInterface,
     Goodfit,
@@ -181,12 +179,44 @@ def write_similarity_tex(residuals: Residuals) -> str:
     ]
     return '\n'.join(lines)
 
-def write_sample_table_tex(ds: DataSetInterface, stage: ReportStage) -> str:
-    caption = "Training Data Set for 10-gram average SAR" if stage == ReportStage.CREATION else (
+SAMPLE_TABLE_COLUMNS = ["antenna", "power", "modulation", "par", "bandwidth", "distance", "angle", "x", "y", "sar10g", "u10g", "sard10g", "mpe10g"]
+
+def sample_table_caption(stage: ReportStage) -> str:
+    return "Training Data Set for 10-gram average SAR" if stage == ReportStage.CREATION else (
         "Test configurations and measurement outcomes for 10-gram average SAR" if stage == ReportStage.CONFIRMATION else
         "Critical Configurations and Measurement Outcomes for 10-gram average SAR"
     )
 
+def sample_table_rows(ds: DataSetInterface) -> list[tuple[list[str], bool]]:
+    """the formatted cells of each row of the sample table, and if it failed"""
+    for col in SAMPLE_TABLE_COLUMNS:
+        if col not in ds.headings:
+            raise Exception(f"Dataset must contain '{col}'")
+    data = ds.sample.data
+    failed = (data["sard10g"].abs() > data["mpe10g"]).to_numpy()
+    rows = []
+    for row, fail in zip(data[SAMPLE_TABLE_COLUMNS].itertuples(index=False, name=None), failed):
+        cells = [
+            f"{row[0]}",
+            f"{row[1]}",
+            f"{row[2]}",
+            f"{row[3]:.2f}",
+            f"{row[4]:.1f}",
+            f"{row[5]:.0f}",
+            f"{row[6]:.0f}",
+            f"{row[7]:.0f}",
+            f"{row[8]:.0f}",
+            f"{row[9]:.3f}",
+            f"{100 * row[10]:.0f}",
+            f"{row[11]:.1f}",
+            f"{row[12]:.1f}",
+        ]
+        rows.append((cells, bool(fail)))
+    return rows
+
+def write_sample_table_tex(ds: DataSetInterface, stage: ReportStage) -> str:
+    caption = sample_table_caption(stage)
+
     lines = [
         r"\begin{center}",
         r"\begin{longtable}{|l|c|c|c|c|c|c|c|c|c|c|c|c|c|}",
@@ -205,33 +235,10 @@ def write_sample_table_tex(ds: DataSetInterface, stage: ReportStage) -> str:
         r"\endlastfoot",
     ]
 
-    cols = ["antenna", "power", "modulation", "par", "bandwidth", "distance", "angle", "x", "y", "sar10g", "u10g", "sard10g", "mpe10g"]
-    mpecol = ds.headings.index("mpe10g")
-    sardcol = ds.headings.index("sard10g")
-    idx = []
-    for col in cols:
-        try:
-            i = ds.headings.index(col)
-            assert(i>=0)
-        except:
-            raise Exception(f"Dataset must contain '{col}'")
-        idx.append(i)
-    for row in ds.rows:
-        line = "{" + row[idx[0]] + "} & " + \
-            f"{row[idx[1]]} & " + \
-            f"{row[idx[2]]} & " + \
-            f"{row[idx[3]]:.2f} & " + \
-            f"{row[idx[4]]:.1f} & " + \
-            f"{row[idx[5]]:.0f} & " + \
-            f"{row[idx[6]]:.0f} & " + \
-            f"{row[idx[7]]:.0f} & " + \
-            f"{row[idx[8]]:.0f} & " + \
-            f"{row[idx[9]]:.3f} & " + \
-            f"{100 * row[idx[10]]:.0f} & " + \
-            f"{row[idx[11]]:.1f} & " + \
-            f"{row[idx[12]]:.1f} & "
-
-        if fabs(row[sardcol]) > row[mpecol]:
+    for cells, fail in sample_table_rows(ds):
+        line = "{" + cells[0] + "} & " + " & ".join(cells[1:]) + " & "
+
+        if fail:
             line += r"N	\\\hline"
         else:
             line += r"Y \\\hline"
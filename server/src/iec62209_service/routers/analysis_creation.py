@@ -1,45 +1,105 @@
-from importlib.resources import files
 from json import dumps as jdumps
-from os import mkdir
 from pathlib import Path
-from shutil import copyfile
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import (
     FileResponse,
     JSONResponse,
     PlainTextResponse,
     Response,
-    StreamingResponse,
 )
 
-from .._meta import info
+from ..api import (
+    get_app_settings,
+    get_artifact_store,
+    get_job_manager,
+    get_plot_cache,
+    get_readonly_workspace,
+    get_report_cache,
+    get_workspace,
+)
+from ..artifacts import ArtifactStore, fit_key
+from ..jobs import JobManager
 from ..reports import texutils
-from ..utils.common import Goodfit, ModelInterface, ModelMetadata, SampleInterface
+from ..reports.builder import build_report, cached_figures, render_report
+from ..reports.cache import ReportCache
+from ..settings import ApplicationSettings
+from ..utils import modelformat
+from ..utils.common import Goodfit, ModelFormat, ModelInterface, ModelMetadata
+from ..utils.plotcache import PlotCache, png_response
+from ..workspaces import Workspace
+from .jobs import job_submitted
 
 router = APIRouter(prefix="/analysis-creation", tags=["analysis-creation"])
 
 
 @router.get("/reset", response_class=Response)
-async def analysis_creation_reset() -> Response:
-    ModelInterface.clear()
+async def analysis_creation_reset(
+    workspace: Workspace = Depends(get_workspace),
+) -> Response:
+    workspace.model.clear()
+
+
+def _goodfit_response(result: Goodfit) -> dict:
+    return {
+        "Acceptance criteria": "Pass" if result.accept else "Fail",
+        "Normalized RMS error": f"{float((result.gfres[1]) * 100):.1f} "
+        + ("< 25% " if result.gfres[0] else "> 25% ")
+        + ("(Pass)" if result.gfres[0] else "(Fail)"),
+        "violations": result.acceptance.violations(),
+    }
+
+
+def _create_model(model: ModelInterface) -> tuple[tuple, dict]:
+    if not model.has_init_sample():
+        raise Exception("no sample loaded")
+    model.make_model()
+    result: Goodfit = model.goodfit_test()
+    return model.fitted(), _goodfit_response(result)
+
+
+def _fit_inputs(workspace: Workspace) -> str:
+    if not workspace.model.has_init_sample():
+        raise Exception("no sample loaded")
+    return fit_key(workspace.model)
 
 
 @router.post("/create", response_class=JSONResponse)
-async def analysis_creation_create() -> JSONResponse:
+async def analysis_creation_create(
+    asynchronous: bool = False,
+    workspace: Workspace = Depends(get_workspace),
+    jobs: JobManager = Depends(get_job_manager),
+    artifacts: ArtifactStore = Depends(get_artifact_store),
+) -> JSONResponse:
     end_status = status.HTTP_200_OK
     try:
-        if not ModelInterface.has_init_sample():
+        if not workspace.model.has_init_sample():
             raise Exception("no sample loaded")
-        ModelInterface.make_model()
-        result: Goodfit = ModelInterface.goodfit_test()
-
-        response = {
-            "Acceptance criteria": "Pass" if result.accept else "Fail",
-            "Normalized RMS error": f"{float((result.gfres[1]) * 100):.1f} "
-            + ("< 25% " if result.gfres[0] else "> 25% ")
-            + ("(Pass)" if result.gfres[0] else "(Fail)"),
-        }
+
+        key = fit_key(workspace.model)
+        fitted = artifacts.get(key)
+        if fitted is not None:
+            # same training sample as an earlier fit
+            workspace.model.restore_fitted(*fitted)
+            response = _goodfit_response(workspace.model.goodfit)
+            if asynchronous:
+                return job_submitted(jobs.resolved(workspace, "create_model", response))
+
+        elif asynchronous:
+            job = jobs.submit(
+                workspace,
+                _create_model,
+                workspace.model,
+                on_success=lambda fitted, _: artifacts.put(key, fitted),
+                merge=lambda ws, fitted: ws.model.restore_fitted(*fitted),
+                inputs=_fit_inputs,
+            )
+            return job_submitted(job)
+
+        else:
+            _, response = await run_in_threadpool(_create_model, workspace.model)
+            artifacts.put(key, workspace.model.fitted())
 
     except Exception as e:
         response = {"error": str(e)}
@@ -48,14 +108,20 @@ async def analysis_creation_create() -> JSONResponse:
 
 
 @router.get("/variogram", response_class=Response)
-async def analysis_creation_variogram(timestamp: str = ""):
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def analysis_creation_variogram(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+):
     try:
-        ModelInterface.raise_if_no_model()
-        buf = ModelInterface.plot_model()
-        return StreamingResponse(buf, media_type="image/png")
+        workspace.model.raise_if_no_model()
+        return png_response(
+            request,
+            plots,
+            "analysis-creation/model",
+            workspace.model.model_fingerprint(),
+            workspace.model.plot_model,
+        )
     except Exception as e:
         return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -63,40 +129,54 @@ async def analysis_creation_variogram(timestamp: str = ""):
 
 
 @router.get("/deviations", response_class=Response)
-async def analysis_creation_deviations(timestamp: str = ""):
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def analysis_creation_deviations(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+):
     try:
-        ModelInterface.raise_if_no_model()
-        buf = SampleInterface.trainingSet.plot_deviations()
-        return StreamingResponse(buf, media_type="image/png")
+        workspace.model.raise_if_no_model()
+        return png_response(
+            request,
+            plots,
+            "analysis-creation/deviations",
+            workspace.samples.trainingSet.fingerprint(),
+            workspace.samples.trainingSet.plot_deviations,
+        )
     except Exception as e:
-        return Response(
+        return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 
 @router.get("/marginals", response_class=Response)
-async def analysis_creation_marginals(timestamp: str = ""):
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def analysis_creation_marginals(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+):
     try:
-        ModelInterface.raise_if_no_model()
-        buf = SampleInterface.trainingSet.plot_marginals()
-        return StreamingResponse(buf, media_type="image/png")
+        workspace.model.raise_if_no_model()
+        return png_response(
+            request,
+            plots,
+            "analysis-creation/marginals",
+            workspace.samples.trainingSet.fingerprint(),
+            workspace.samples.trainingSet.plot_marginals,
+        )
     except Exception as e:
-        return Response(
+        return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 
 @router.get("/model-constraint", response_class=JSONResponse)
-async def analysis_creation_constraints() -> JSONResponse:
+async def analysis_creation_constraints(
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> JSONResponse:
     constraints = {}
     try:
-        samp = SampleInterface.trainingSet.sample
+        samp = workspace.samples.trainingSet.sample
         if samp is None:
             raise Exception("No training data sample found")
         md = samp.metadata()
@@ -115,13 +195,21 @@ async def analysis_creation_constraints() -> JSONResponse:
 
 
 @router.post("/xport", response_class=Response)
-async def analysis_creation_xport(metadata: ModelMetadata) -> Response:
+async def analysis_creation_xport(
+    metadata: ModelMetadata,
+    model_format: ModelFormat = Query(ModelFormat.JSON, alias="format"),
+    workspace: Workspace = Depends(get_workspace),
+) -> Response:
     response = ""
     end_status = status.HTTP_200_OK
     try:
-        ModelInterface.raise_if_no_model()
-        ModelInterface.set_metadata(metadata)
-        data = ModelInterface.dump_model_to_json()
+        workspace.model.raise_if_no_model()
+        workspace.model.set_metadata(metadata)
+        if model_format == ModelFormat.NPZ:
+            return Response(
+                workspace.model.dump_model_to_npz(), media_type=modelformat.MEDIA_TYPE
+            )
+        data = workspace.model.dump_model_to_json()
         response = jdumps(data)
         return PlainTextResponse(
             response, media_type="application/json", status_code=end_status
@@ -133,83 +221,51 @@ async def analysis_creation_xport(metadata: ModelMetadata) -> Response:
 
 
 @router.get("/pdf", response_class=Response)
-async def analysis_creation_pdf(tmp=Depends(texutils.create_temp_folder)) -> Response:
-    from .. import reports
-    from ..reports import texwriter
-    from ..reports.texutils import typeset
-
+async def analysis_creation_pdf(
+    asynchronous: bool = False,
+    backend: texutils.ReportBackend | None = None,
+    tmp=Depends(texutils.create_temp_folder),
+    workspace: Workspace = Depends(get_readonly_workspace),
+    jobs: JobManager = Depends(get_job_manager),
+    reports: ReportCache = Depends(get_report_cache),
+    plots: PlotCache = Depends(get_plot_cache),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> Response:
     try:
-        texpath = Path(tmp.name)
-
-        # print images
-
-        imgpath = texpath / "images"
-        mkdir(imgpath.as_posix())
-
-        (imgpath / "model-creation-distribution.png").write_bytes(
-            SampleInterface.trainingSet.plot_distribution().getvalue()
-        )
-
-        (imgpath / "model-creation-acceptance.png").write_bytes(
-            SampleInterface.trainingSet.plot_deviations().getvalue()
-        )
-
-        (imgpath / "model-creation-semivariogram.png").write_bytes(
-            ModelInterface.plot_model().getvalue()
-        )
-
-        (imgpath / "model-creation-marginals.png").write_bytes(
-            SampleInterface.trainingSet.plot_marginals().getvalue()
-        )
-
-        # print tables
-
-        (texpath / "metadata.tex").write_text(
-            texwriter.write_model_metadata_tex(ModelInterface.get_metadata())
-        )
-
-        (texpath / "summary.tex").write_text(
-            texwriter.write_creation_summary_tex(ModelInterface.goodfit)
-        )
-
-        (texpath / "sample_parameters.tex").write_text(
-            texwriter.write_sample_parameters_tex(
-                SampleInterface.trainingSet.config,
-                ModelInterface.get_metadata(),
-                texutils.ReportStage.CREATION,
-            )
-        )
-
-        accepted = ModelInterface.goodfit.accept
-        gfres = ModelInterface.goodfit.gfres
-        allgood = accepted and gfres[0]
-
-        (texpath / "onelinesummary.tex").write_text(
-            texwriter.write_one_line_summary(allgood, texutils.ReportStage.CREATION)
-        )
-
-        (texpath / "acceptance.tex").write_text(
-            texwriter.write_sample_acceptance_tex(accepted)
-        )
-
-        (texpath / "gfres.tex").write_text(texwriter.write_model_fitting_tex(gfres))
-
-        (texpath / "sample_table.tex").write_text(
-            texwriter.write_sample_table_tex(
-                SampleInterface.trainingSet, texutils.ReportStage.CREATION
-            )
+        stage = texutils.ReportStage.CREATION
+        backend = backend or settings.REPORTS_BACKEND
+        if asynchronous:
+            cached = reports.get(reports.key(stage, workspace.model, backend))
+            if cached is not None:
+                job = jobs.resolved(
+                    workspace,
+                    "render_report",
+                    cached.read_bytes(),
+                    media_type="application/pdf",
+                )
+            else:
+                job = jobs.submit(
+                    workspace,
+                    render_report,
+                    stage,
+                    workspace.model,
+                    reports,
+                    backend,
+                    cached_figures(stage, workspace.model, plots),
+                    media_type="application/pdf",
+                )
+            return job_submitted(job)
+
+        mainpdf = await run_in_threadpool(
+            build_report,
+            stage,
+            workspace.model,
+            Path(tmp.name),
+            reports,
+            backend,
+            cached_figures(stage, workspace.model, plots),
         )
 
-        (texpath / "version.tex").write_text(info.__version__)
-
-        # typeset report
-
-        mainres = files(reports).joinpath("creation.tex")
-        maintex = "report.tex"
-        copyfile(mainres, texpath / maintex)
-
-        mainpdf = texpath / typeset(texpath, maintex)
-
         return FileResponse(mainpdf, media_type="application/pdf")
 
     except Exception as e:
@@ -1,33 +1,46 @@
-from importlib.resources import files
-from os import mkdir
 from pathlib import Path
-from shutil import copyfile
 
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
-
-from .._meta import info
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from ..api import (
+    get_app_settings,
+    get_job_manager,
+    get_plot_cache,
+    get_readonly_workspace,
+    get_report_cache,
+    get_workspace,
+)
+from ..jobs import JobManager
 from ..reports import texutils
-from ..utils.common import ModelInterface, Residuals, SampleInterface
+from ..reports.builder import build_report, cached_figures, render_report
+from ..reports.cache import ReportCache
+from ..settings import ApplicationSettings
+from ..utils.common import Acceptance, Residuals
+from ..utils.plotcache import PlotCache, png_response
+from ..workspaces import Workspace
+from .jobs import job_submitted
 
 router = APIRouter(prefix="/confirm-model", tags=["confirm-model"])
 
 
 @router.get("/confirm", response_class=JSONResponse)
-async def confirm_model() -> JSONResponse:
+async def confirm_model(workspace: Workspace = Depends(get_workspace)) -> JSONResponse:
     response = {}
     end_status = status.HTTP_200_OK
     try:
         # storing these for later
-        if not ModelInterface.compute_residuals():
+        if not await run_in_threadpool(workspace.model.compute_residuals):
             raise Exception("Error computing residuals")
-        residuals: Residuals = ModelInterface.residuals_test()
-        accepted = ModelInterface.acceptance_criteria(SampleInterface.testSet)
+        residuals: Residuals = workspace.model.residuals_test()
+        acceptance: Acceptance = workspace.model.acceptance(workspace.samples.testSet)
         response = {
-            "Acceptance criteria": "Pass" if accepted else "Fail",
+            "Acceptance criteria": "Pass" if acceptance.accept else "Fail",
             "Normality": residuals.print_normality(),
             "QQ location": residuals.print_qq_location(),
             "QQ scale": residuals.print_qq_scale(),
+            "violations": acceptance.violations(),
         }
 
     except Exception as e:
@@ -38,108 +51,91 @@ async def confirm_model() -> JSONResponse:
 
 
 @router.get("/qqplot", response_class=Response)
-async def confirm_model_qqplot(timestamp: str = "") -> Response:
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def confirm_model_qqplot(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+) -> Response:
     try:
-        buf = ModelInterface.plot_residuals()
-        return StreamingResponse(buf, media_type="image/png")
+        return png_response(
+            request,
+            plots,
+            "confirm-model/residuals",
+            workspace.model.residuals_fingerprint(),
+            workspace.model.plot_residuals,
+        )
     except Exception as e:
-        return Response(
+        return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 
 @router.get("/deviations", response_class=Response)
-async def confirm_model_deviations(timestamp: str = "") -> Response:
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def confirm_model_deviations(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+) -> Response:
     try:
-        buf = SampleInterface.testSet.plot_deviations()
-        return StreamingResponse(buf, media_type="image/png")
+        return png_response(
+            request,
+            plots,
+            "confirm-model/deviations",
+            workspace.samples.testSet.fingerprint(),
+            workspace.samples.testSet.plot_deviations,
+        )
     except Exception as e:
-        return Response(
+        return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 
 @router.get("/pdf", response_class=Response)
-async def analysis_creation_pdf(tmp=Depends(texutils.create_temp_folder)) -> Response:
-    from .. import reports
-    from ..reports import texwriter
-    from ..reports.texutils import typeset
-
+async def analysis_creation_pdf(
+    asynchronous: bool = False,
+    backend: texutils.ReportBackend | None = None,
+    tmp=Depends(texutils.create_temp_folder),
+    workspace: Workspace = Depends(get_readonly_workspace),
+    jobs: JobManager = Depends(get_job_manager),
+    reports: ReportCache = Depends(get_report_cache),
+    plots: PlotCache = Depends(get_plot_cache),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> Response:
     try:
-        texpath = Path(tmp.name)
-
-        # images
-
-        imgpath = texpath / "images"
-        mkdir(imgpath.as_posix())
-
-        (imgpath / "model-confirm-acceptance.png").write_bytes(
-            SampleInterface.testSet.plot_deviations().getvalue()
+        stage = texutils.ReportStage.CONFIRMATION
+        backend = backend or settings.REPORTS_BACKEND
+        if asynchronous:
+            cached = reports.get(reports.key(stage, workspace.model, backend))
+            if cached is not None:
+                job = jobs.resolved(
+                    workspace,
+                    "render_report",
+                    cached.read_bytes(),
+                    media_type="application/pdf",
+                )
+            else:
+                job = jobs.submit(
+                    workspace,
+                    render_report,
+                    stage,
+                    workspace.model,
+                    reports,
+                    backend,
+                    cached_figures(stage, workspace.model, plots),
+                    media_type="application/pdf",
+                )
+            return job_submitted(job)
+
+        mainpdf = await run_in_threadpool(
+            build_report,
+            stage,
+            workspace.model,
+            Path(tmp.name),
+            reports,
+            backend,
+            cached_figures(stage, workspace.model, plots),
         )
 
-        (imgpath / "model-confirm-qqplot.png").write_bytes(
-            ModelInterface.plot_residuals().getvalue()
-        )
-
-        # tables
-
-        accepted: bool = ModelInterface.acceptance_criteria(SampleInterface.testSet)
-        residuals: Residuals = ModelInterface.residuals_test()
-
-        allgood = accepted and residuals.all_ok()
-
-        (texpath / "onelinesummary.tex").write_text(
-            texwriter.write_one_line_summary(allgood, texutils.ReportStage.CONFIRMATION)
-        )
-
-        (texpath / "metadata.tex").write_text(
-            texwriter.write_model_metadata_tex(ModelInterface.get_metadata())
-        )
-
-        (texpath / "summary.tex").write_text(
-            texwriter.write_confirmation_summary_tex(accepted, residuals)
-        )
-
-        (texpath / "sample_parameters.tex").write_text(
-            texwriter.write_sample_parameters_tex(
-                SampleInterface.testSet.config,
-                ModelInterface.get_metadata(),
-                texutils.ReportStage.CONFIRMATION,
-            )
-        )
-
-        (texpath / "acceptance.tex").write_text(
-            texwriter.write_sample_acceptance_tex(accepted)
-        )
-
-        (texpath / "normality.tex").write_text(texwriter.write_normality_tex(residuals))
-
-        (texpath / "similarity.tex").write_text(
-            texwriter.write_similarity_tex(residuals)
-        )
-
-        (texpath / "sample_table.tex").write_text(
-            texwriter.write_sample_table_tex(
-                SampleInterface.testSet, texutils.ReportStage.CONFIRMATION
-            )
-        )
-
-        (texpath / "version.tex").write_text(info.__version__)
-
-        # typeset report
-
-        mainres = files(reports).joinpath("confirmation.tex")
-        maintex = "report.tex"
-        copyfile(mainres, texpath / maintex)
-
-        mainpdf = texpath / typeset(texpath, maintex)
-
         return FileResponse(mainpdf, media_type="application/pdf")
 
     except Exception as e:
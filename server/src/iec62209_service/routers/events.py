@@ -0,0 +1,58 @@
+import asyncio
+from collections.abc import AsyncIterator
+from json import dumps as jdumps
+from time import monotonic
+
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from ..api import get_progress_hub, get_session_id
+from ..utils.progress import ProgressHub
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+POLL_SECONDS = 0.25
+KEEPALIVE_SECONDS = 15.0
+
+
+async def _progress_stream(
+    request: Request, hub: ProgressHub, session_id: str, last_id: int
+) -> AsyncIterator[str]:
+    yield f"retry: {int(POLL_SECONDS * 4000)}\n\n"
+    idle_since = monotonic()
+    while not await request.is_disconnected():
+        # the shared hub queries its database: not on the event loop
+        for event in await run_in_threadpool(hub.since, session_id, last_id):
+            last_id = event["id"]
+            yield f"id: {last_id}\nevent: progress\ndata: {jdumps(event)}\n\n"
+            idle_since = monotonic()
+        if monotonic() - idle_since > KEEPALIVE_SECONDS:
+            # keeps proxies from closing an idle connection
+            yield ": keepalive\n\n"
+            idle_since = monotonic()
+        await asyncio.sleep(POLL_SECONDS)
+
+
+@router.get("", response_class=StreamingResponse)
+async def progress_events(
+    request: Request,
+    last_event_id: int | None = Header(None),
+    session_id: str = Depends(get_session_id),
+    hub: ProgressHub = Depends(get_progress_hub),
+) -> StreamingResponse:
+    """server-sent events reporting the phases of the operations of the session
+
+    Every event is a JSON object with the phase ('make_model', 'goodfit_test',
+    'compute_residuals', 'explore_space', 'typeset'), its status ('start',
+    'progress', 'end' or 'error'), the elapsed seconds and, where known, the
+    percentage done. Reconnecting clients resume after their Last-Event-ID
+    """
+    if last_event_id is None:
+        # new listeners only get what happens from now on
+        last_event_id = await run_in_threadpool(hub.last_id, session_id)
+    return StreamingResponse(
+        _progress_stream(request, hub, session_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse, Response
+
+from ..api import get_job_manager, get_session_id
+from ..jobs import Job, JobManager, JobStatus
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def job_submitted(job: Job) -> JSONResponse:
+    return JSONResponse(job.to_dict(), status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/{job_id}", response_class=JSONResponse)
+async def job_status(
+    job_id: str,
+    session_id: str = Depends(get_session_id),
+    jobs: JobManager = Depends(get_job_manager),
+) -> JSONResponse:
+    try:
+        job = jobs.get(job_id, session_id)
+    except KeyError as e:
+        return JSONResponse({"error": str(e)}, status_code=status.HTTP_404_NOT_FOUND)
+    return JSONResponse(job.to_dict())
+
+
+@router.get("/{job_id}/result", response_class=Response)
+async def job_result(
+    job_id: str,
+    session_id: str = Depends(get_session_id),
+    jobs: JobManager = Depends(get_job_manager),
+) -> Response:
+    try:
+        job = jobs.get(job_id, session_id)
+    except KeyError as e:
+        return JSONResponse({"error": str(e)}, status_code=status.HTTP_404_NOT_FOUND)
+
+    job_status = job.status
+    if job_status in (JobStatus.PENDING, JobStatus.RUNNING):
+        return JSONResponse(job.to_dict(), status_code=status.HTTP_202_ACCEPTED)
+    if job_status == JobStatus.CANCELLED:
+        return JSONResponse(job.to_dict(), status_code=status.HTTP_410_GONE)
+    if job_status == JobStatus.STALE:
+        return JSONResponse(job.to_dict(), status_code=status.HTTP_409_CONFLICT)
+    if job_status == JobStatus.FAILED:
+        return JSONResponse(
+            {"error": job.error}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    if job.media_type == "application/json":
+        return JSONResponse(job.result)
+    return Response(job.result, media_type=job.media_type)
+
+
+@router.post("/{job_id}/cancel", response_class=JSONResponse)
+async def job_cancel(
+    job_id: str,
+    session_id: str = Depends(get_session_id),
+    jobs: JobManager = Depends(get_job_manager),
+) -> JSONResponse:
+    try:
+        job = jobs.cancel(job_id, session_id)
+    except KeyError as e:
+        return JSONResponse({"error": str(e)}, status_code=status.HTTP_404_NOT_FOUND)
+    return JSONResponse(job.to_dict())
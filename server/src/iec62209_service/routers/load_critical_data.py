@@ -1,42 +1,48 @@
-from os import remove
-from tempfile import NamedTemporaryFile
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile, status
+from fastapi.responses import JSONResponse, Response
 
-from fastapi import APIRouter, File, UploadFile, status
-from fastapi.responses import JSONResponse
-
-from ..utils.common import ModelInterface, SampleInterface
+from ..api import get_workspace
+from ..utils.coverage import CoverageError
+from ..utils.encoding import dataset_response
+from ..utils.validation import ValidationError
+from ..workspaces import Workspace
 
 router = APIRouter(prefix="/critical-data", tags=["critical-data"])
 
 
 @router.get("/reset")
-async def critical_data_reset():
-    SampleInterface.criticalSet.clear()
+async def critical_data_reset(workspace: Workspace = Depends(get_workspace)):
+    workspace.samples.criticalSet.clear()
 
 
 @router.post("/load", response_class=JSONResponse)
-async def critical_data_load(file: UploadFile = File(...)) -> JSONResponse:
-    response = {}
-    end_status = status.HTTP_200_OK
+async def critical_data_load(
+    request: Request,
+    file: UploadFile = File(...),
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    keep_covered: bool = Query(
+        False, description="Keeps the rows within the domain of the model, if any"
+    ),
+    workspace: Workspace = Depends(get_workspace),
+) -> Response:
     try:
-        if len([x for x in file.file.readlines() if x.strip()]) < 2:
-            # only headings, empty critical sample
-            raise Exception("Empty data set")
-        file.file.seek(0)
-        # need to write to a temp file
-        tmp = NamedTemporaryFile(delete=False)
-        tmp.write(file.file.read())
-        tmp.close()
-        response = ModelInterface.load_critical_sample(tmp.name)
-        remove(tmp.name)
-
-        if not ModelInterface.model_covers_sample(SampleInterface.criticalSet):
-            SampleInterface.criticalSet.clear()
-            raise Exception(
-                "The critical data sample extends outside the range of the model"
-            )
-
+        # parsed straight from the upload stream
+        workspace.model.load_critical_sample(file.file)
+
+        dropped = workspace.model.check_coverage(
+            workspace.samples.criticalSet, "critical data", keep_covered
+        )
+        response = dataset_response(
+            request, workspace.samples.criticalSet, offset=offset, limit=limit
+        )
+        response.headers["X-Rows-Dropped"] = str(dropped)
+        return response
+    except (ValidationError, CoverageError) as e:
+        return JSONResponse(
+            e.to_dict(), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
     except Exception as e:
-        response = {"error": str(e)}
-        end_status = status.HTTP_500_INTERNAL_SERVER_ERROR
-    return JSONResponse(response, status_code=end_status)
+        return JSONResponse(
+            {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -1,45 +1,107 @@
 from os import remove
+from shutil import copyfileobj
 from tempfile import NamedTemporaryFile
+from typing import BinaryIO
 
-from fastapi import APIRouter, File, UploadFile, status
-from fastapi.responses import JSONResponse, Response
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from ..utils.common import ModelInterface, SampleInterface
+from ..api import get_app_settings, get_readonly_workspace, get_workspace
+from ..settings import ApplicationSettings
+from ..utils import modelformat, prediction
+from ..utils.encoding import dataset_response, negotiate_stream_type, stream_frames
+from ..workspaces import Workspace
 
 router = APIRouter(prefix="/model", tags=["model"])
 
 
-@router.post("/load", response_class=JSONResponse)
-async def load_model_load(file: UploadFile = File(...)) -> JSONResponse:
-    response = {}
-    end_status = status.HTTP_200_OK
-    tmp = NamedTemporaryFile(delete=False)
+def _load_json_model(workspace: Workspace, source: BinaryIO) -> None:
+    # the iec62209 package reads json models from a file
+    tmp = NamedTemporaryFile(suffix=".json", delete=False)
     try:
-        tmp.write(file.file.read())
+        copyfileobj(source, tmp)
+        tmp.close()
+        workspace.model.load_model_from_json(tmp.name)
+    finally:
         tmp.close()
+        remove(tmp.name)
+
 
-        ModelInterface.load_model_from_json(tmp.name)
+@router.post("/load", response_class=JSONResponse)
+async def load_model_load(
+    request: Request,
+    file: UploadFile = File(...),
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    workspace: Workspace = Depends(get_workspace),
+) -> Response:
+    try:
+        head = file.file.read(4)
+        file.file.seek(0)
+        if modelformat.is_npz(head):
+            # binary models are decoded straight from the upload
+            workspace.model.load_model_from_npz(file.file)
+        else:
+            _load_json_model(workspace, file.file)
 
-        ModelInterface.raise_if_no_model()
+        workspace.model.raise_if_no_model()
 
-        loaded = ModelInterface.get_metadata()
+        loaded = workspace.model.get_metadata()
         # fix filename
         loaded.filename = file.filename
         metadata = loaded.dict()
 
-        response = {"metadata": metadata, "data": SampleInterface.trainingSet.to_dict()}
+        return dataset_response(
+            request,
+            workspace.samples.trainingSet,
+            metadata=metadata,
+            offset=offset,
+            limit=limit,
+        )
 
     except Exception as e:
-        response = {"message": str(e)}
-        end_status = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return JSONResponse(
+            {"message": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
     finally:
         file.file.close()
-        remove(tmp.name)
 
-    return JSONResponse(response, status_code=end_status)
+
+@router.post("/predict", response_class=StreamingResponse)
+async def load_model_predict(
+    request: Request,
+    file: UploadFile = File(...),
+    workspace: Workspace = Depends(get_readonly_workspace),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> Response:
+    media_type = negotiate_stream_type(request.headers.get("accept"))
+    if media_type is None:
+        return JSONResponse(
+            {"error": "Supported media types are text/csv, ndjson and Arrow"},
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        )
+    try:
+        predict = workspace.model.predictor()
+        upload_type = prediction.configurations_media_type(
+            file.filename, file.content_type
+        )
+        # the upload (spooled to disk when large) is read chunk by chunk as
+        # rows are streamed back, it is closed once the response is sent
+        frames = prediction.predict_chunks(
+            predict,
+            prediction.read_configurations(
+                file.file, upload_type, settings.PREDICT_CHUNK_ROWS
+            ),
+        )
+    except Exception as e:
+        return JSONResponse(
+            {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    return StreamingResponse(stream_frames(frames, media_type), media_type=media_type)
 
 
 @router.get("/reset", response_class=Response)
-async def load_model_reset() -> Response:
-    ModelInterface.clear()
+async def load_model_reset(workspace: Workspace = Depends(get_workspace)) -> Response:
+    workspace.model.clear()
     return Response("ok")
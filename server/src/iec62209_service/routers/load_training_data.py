@@ -1,42 +1,40 @@
-from os import remove
-from tempfile import NamedTemporaryFile
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile, status
+from fastapi.responses import JSONResponse, Response
 
-from fastapi import APIRouter, File, UploadFile, status
-from fastapi.responses import JSONResponse
-
-from ..utils.common import ModelInterface
+from ..api import get_workspace
+from ..utils.encoding import dataset_response
+from ..utils.validation import ValidationError
+from ..workspaces import Workspace
 
 router = APIRouter(prefix="/training-data", tags=["training-data"])
 
 
 @router.get("/reset")
-async def training_data_clear():
+async def training_data_clear(workspace: Workspace = Depends(get_workspace)):
     # this is correct: here we should reset the whole model
-    ModelInterface.clear()
+    workspace.model.clear()
 
 
 @router.post("/load", response_class=JSONResponse)
 async def training_data_load(
+    request: Request,
     file: UploadFile = File(...),
-) -> JSONResponse:
-    response = {}
-    end_status = status.HTTP_200_OK
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    workspace: Workspace = Depends(get_workspace),
+) -> Response:
     try:
-        ModelInterface.clear()
-
-        if len([x for x in file.file.readlines() if x.strip()]) < 2:
-            # only headings, empty critical sample
-            raise Exception("Empty data set")
-        file.file.seek(0)
-
-        # need to write to a temp file
-        tmp = NamedTemporaryFile(delete=False)
-        tmp.write(file.file.read())
-        tmp.close()
-        response = ModelInterface.load_init_sample(tmp.name)
-        remove(tmp.name)
-
+        # parsed straight from the upload stream
+        workspace.model.load_init_sample(file.file)
+
+        return dataset_response(
+            request, workspace.samples.trainingSet, offset=offset, limit=limit
+        )
+    except ValidationError as e:
+        return JSONResponse(
+            e.to_dict(), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
     except Exception as e:
-        response = {"error": str(e)}
-        end_status = status.HTTP_500_INTERNAL_SERVER_ERROR
-    return JSONResponse(response, status_code=end_status)
+        return JSONResponse(
+            {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -1,10 +1,13 @@
-import email
-import subprocess
+import re
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, distribution
 
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
 from .._meta import API_VERSION, PROJECT_NAME, info
+from ..utils.metrics import REGISTRY
 
 router = APIRouter(tags=["meta"])
 
@@ -16,21 +19,49 @@ class ServiceMetadata(BaseModel):
     kernel_meta: dict = {}
 
 
-def _pip_show(package_name: str) -> dict:
-    output = subprocess.check_output(
-        ["pip", "show", package_name], text=True, timeout=5
-    )
-    msg = email.message_from_string(output)
-    return dict(msg.items())
+_REQUIREMENT_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]*")
+
+
+def _requires(requirements: list[str]) -> set[str]:
+    # names of the requirements, leaving out those of extras
+    names = set()
+    for line in requirements:
+        marker = line.partition(";")[2]
+        if "extra" not in marker and (name := _REQUIREMENT_NAME.match(line)):
+            names.add(name.group())
+    return names
 
 
-try:
-    _KERNEL_META = _pip_show("iec62209")
-except Exception:
-    _KERNEL_META = {}
+@lru_cache
+def _package_metadata(package_name: str) -> dict:
+    """what 'pip show' reports, read from the installed distribution"""
+    try:
+        dist = distribution(package_name)
+    except PackageNotFoundError:
+        return {}
+    metadata = dist.metadata
+    return {
+        "Name": metadata["Name"],
+        "Version": dist.version,
+        "Summary": metadata["Summary"] or "",
+        "Home-page": metadata["Home-page"] or "",
+        "Author": metadata["Author"] or "",
+        "Author-email": metadata["Author-email"] or "",
+        "License": metadata["License"] or "",
+        "Location": str(dist.locate_file("")),
+        "Requires": ", ".join(sorted(_requires(dist.requires or []))),
+    }
 
 
 @router.get("/meta", response_model=ServiceMetadata)
 async def get_meta():
     """service metadata"""
-    return ServiceMetadata(kernel_meta=_KERNEL_META)
+    return ServiceMetadata(kernel_meta=_package_metadata("iec62209"))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """service metrics, in the Prometheus text format"""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
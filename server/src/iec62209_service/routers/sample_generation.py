@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+from ..api import get_app_settings, get_workspace
+from ..settings import ApplicationSettings
+from ..utils.common import SampleConfig
+from ..utils.encoding import ARROW, CSV, NDJSON, negotiate_stream_type, stream_frames
+from ..utils.generation import iter_frames, new_seed
+from ..workspaces import Workspace
+
+router = APIRouter(
+    prefix="/sample-generation",
+    tags=["sample-generation"],
+    responses={404: {"error": "Backend not ready"}},
+)
+
+EXTENSIONS = {CSV: "csv", NDJSON: "ndjson", ARROW: "arrow"}
+
+
+class SamplesConfig(BaseModel):
+    # of all the samples: random if None
+    seed: int | None = None
+    training: SampleConfig | None = None
+    test: SampleConfig | None = None
+
+    def samples(self) -> dict[str, SampleConfig]:
+        configs = {"training": self.training, "test": self.test}
+        return {name: config for name, config in configs.items() if config}
+
+
+@router.post("/generate", response_class=JSONResponse)
+async def samples_generate(
+    config: SamplesConfig,
+    workspace: Workspace = Depends(get_workspace),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> JSONResponse:
+    """generates the training and/or test samples of the workspace at once"""
+    seed = new_seed() if config.seed is None else config.seed
+    samples = config.samples()
+    try:
+        workspace.samples.generate(samples, seed, settings.GENERATE_BATCH_ROWS)
+    except Exception as e:
+        return JSONResponse(
+            {"error": f"The IEC62209 package raised an exception: {e}"},
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    datasets = {
+        "training": workspace.samples.trainingSet,
+        "test": workspace.samples.testSet,
+    }
+    return JSONResponse(
+        {"seed": seed, "sizes": {name: datasets[name].size for name in samples}}
+    )
+
+
+@router.post("/xport", response_class=StreamingResponse)
+async def samples_xport(
+    request: Request,
+    config: SamplesConfig,
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> Response:
+    """streams the samples as they are generated, without keeping them
+
+    In csv (default), ndjson or Arrow, as accepted. With several samples, the
+    column "sample" tells which one every configuration belongs to.
+    """
+    media_type = negotiate_stream_type(request.headers.get("accept"))
+    if media_type is None:
+        return JSONResponse(
+            {"error": "Supported media types are text/csv, ndjson and Arrow"},
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        )
+    samples = config.samples()
+    if not samples:
+        return JSONResponse(
+            {"error": "No sample to generate"},
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    seed = new_seed() if config.seed is None else config.seed
+    sizes = {
+        name: (c.sampleSize, 0.5 * c.measAreaX, 0.5 * c.measAreaY)
+        for name, c in samples.items()
+    }
+    frames = iter_frames(sizes, seed, settings.GENERATE_BATCH_ROWS)
+    filename = f"{'-'.join(samples)}.{EXTENSIONS[media_type]}"
+    return StreamingResponse(
+        stream_frames(frames, media_type),
+        media_type=media_type,
+        headers={
+            "X-Sample-Seed": str(seed),
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        },
+    )
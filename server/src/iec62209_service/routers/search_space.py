@@ -1,17 +1,81 @@
-from tempfile import NamedTemporaryFile
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from iec62209.work import Sample
 
-from fastapi import APIRouter, status
-from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
-
-from ..utils.common import ModelInterface, SampleInterface
+from ..api import (
+    get_app_settings,
+    get_artifact_store,
+    get_job_manager,
+    get_plot_cache,
+    get_readonly_workspace,
+    get_workspace,
+)
+from ..artifacts import ArtifactStore, explore_key
+from ..jobs import JobManager
+from ..settings import ApplicationSettings
+from ..utils.common import ModelInterface
+from ..utils.encoding import ExportFormat, dataset_response, export_response
+from ..utils.plotcache import PlotCache, png_response
+from ..workspaces import Workspace
+from .jobs import job_submitted
 
 router = APIRouter(prefix="/search-space", tags=["search-space"])
 
 
+def _explore_space(
+    model: ModelInterface, partitions: int, workers: int | None, seed: int
+) -> tuple[Sample, dict]:
+    critsample = model.explore_space(partitions, workers, seed)
+    return model.explored(), critsample
+
+
 @router.post("/search", response_class=JSONResponse)
-async def search_space() -> JSONResponse:
+async def search_space(
+    asynchronous: bool = False,
+    workspace: Workspace = Depends(get_workspace),
+    jobs: JobManager = Depends(get_job_manager),
+    artifacts: ArtifactStore = Depends(get_artifact_store),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> JSONResponse:
+    search = (
+        settings.EXPLORE_PARTITIONS,
+        settings.EXPLORE_WORKERS,
+        settings.EXPLORE_SEED,
+    )
     try:
-        critsample = ModelInterface.explore_space()
+        key = explore_key(
+            workspace.model, settings.EXPLORE_PARTITIONS, settings.EXPLORE_SEED
+        )
+        explored = artifacts.get(key)
+        if explored is not None:
+            # this model has been explored before
+            critsample = workspace.model.restore_explored(explored)
+            if asynchronous:
+                return job_submitted(
+                    jobs.resolved(workspace, "explore_space", critsample)
+                )
+
+        elif asynchronous:
+            job = jobs.submit(
+                workspace,
+                _explore_space,
+                workspace.model,
+                *search,
+                on_success=lambda explored, _: artifacts.put(key, explored),
+                merge=lambda ws, explored: ws.model.restore_explored(explored),
+                inputs=lambda ws: explore_key(
+                    ws.model, settings.EXPLORE_PARTITIONS, settings.EXPLORE_SEED
+                ),
+            )
+            return job_submitted(job)
+
+        else:
+            _, critsample = await run_in_threadpool(
+                _explore_space, workspace.model, *search
+            )
+            artifacts.put(key, workspace.model.explored())
+
         return JSONResponse(critsample)
     except Exception as e:
         return JSONResponse(
@@ -19,31 +83,52 @@ async def search_space() -> JSONResponse:
         )
 
 
+@router.get("/data", response_class=JSONResponse)
+async def critical_set_data(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> Response:
+    return dataset_response(
+        request, workspace.samples.criticalSet, offset=offset, limit=limit
+    )
+
+
 @router.get("/distribution", response_class=Response)
-async def search_space_distribution(timestamp: str = "") -> Response:
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def search_space_distribution(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+) -> Response:
     try:
-        buf = SampleInterface.criticalSet.plot_distribution()
-        return StreamingResponse(buf, media_type="image/png")
+        return png_response(
+            request,
+            plots,
+            "search-space/distribution",
+            workspace.samples.criticalSet.fingerprint(),
+            workspace.samples.criticalSet.plot_distribution,
+        )
     except Exception as e:
         return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 
-@router.get("/xport", response_class=FileResponse)
-async def critical_set_xport() -> FileResponse:
-    tmp = NamedTemporaryFile(delete=False)
-    SampleInterface.criticalSet.export_to_csv(tmp.name)
-    return FileResponse(tmp.name, media_type="text/csv")
+@router.get("/xport", response_class=StreamingResponse)
+async def critical_set_xport(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> Response:
+    return export_response(workspace.samples.criticalSet, "critical", export_format)
 
 
 @router.get("/model-area", response_class=JSONResponse)
-async def critical_set_get_model_area() -> JSONResponse:
-    ModelInterface.raise_if_no_model()
-    conf = SampleInterface.trainingSet.config
+async def critical_set_get_model_area(
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> JSONResponse:
+    workspace.model.raise_if_no_model()
+    conf = workspace.samples.trainingSet.config
     if conf.sampleSize > 0:
         return {
             "measAreaX": f"{conf.measAreaX:.0f}",
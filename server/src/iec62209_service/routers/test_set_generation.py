@@ -1,15 +1,18 @@
-from tempfile import NamedTemporaryFile
-
-from fastapi import APIRouter, status
-from fastapi.responses import (
-    FileResponse,
-    HTMLResponse,
-    JSONResponse,
-    Response,
-    StreamingResponse,
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+
+from ..api import (
+    get_app_settings,
+    get_plot_cache,
+    get_readonly_workspace,
+    get_workspace,
 )
-
-from ..utils.common import ModelInterface, ModelMetadata, SampleConfig, SampleInterface
+from ..settings import ApplicationSettings
+from ..utils.common import ModelMetadata, SampleConfig
+from ..utils.encoding import ExportFormat, dataset_response, export_response
+from ..utils.plotcache import PlotCache, png_response
+from ..workspaces import Workspace
 
 router = APIRouter(
     prefix="/test-set-generation",
@@ -19,50 +22,77 @@ router = APIRouter(
 
 
 @router.post("/generate", response_class=HTMLResponse)
-async def test_set_generate(config: SampleConfig) -> HTMLResponse:
+async def test_set_generate(
+    config: SampleConfig,
+    workspace: Workspace = Depends(get_workspace),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> HTMLResponse:
     message = ""
     end_status = status.HTTP_200_OK
     try:
-        SampleInterface.testSet.generate(config)
-        SampleInterface.testSet.add_columns(["sar10g", "u10g"])
+        await run_in_threadpool(
+            workspace.samples.testSet.generate,
+            config,
+            "test",
+            batch_rows=settings.GENERATE_BATCH_ROWS,
+        )
+        workspace.samples.testSet.add_columns(["sar10g", "u10g"])
     except Exception as e:
         message = f"The IEC62209 package raised an exception: {e}"
         end_status = status.HTTP_500_INTERNAL_SERVER_ERROR
-    return HTMLResponse(message, status_code=end_status)
+    # the seed drawn if none was given, to generate the same sample again
+    headers = {"X-Sample-Seed": str(config.seed)} if config.seed is not None else None
+    return HTMLResponse(message, status_code=end_status, headers=headers)
 
 
 @router.get("/data", response_class=JSONResponse)
-async def test_set_data() -> JSONResponse:
-    return JSONResponse(SampleInterface.testSet.to_dict())
+async def test_set_data(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> Response:
+    return dataset_response(
+        request, workspace.samples.testSet, offset=offset, limit=limit
+    )
 
 
 @router.get("/distribution", response_class=Response)
-async def test_set_distribution(timestamp: str = "") -> Response:
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def test_set_distribution(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+) -> Response:
     try:
-        buf = SampleInterface.testSet.plot_distribution()
-        return StreamingResponse(buf, media_type="image/png")
+        return png_response(
+            request,
+            plots,
+            "test-set/distribution",
+            workspace.samples.testSet.fingerprint(),
+            workspace.samples.testSet.plot_distribution,
+        )
     except Exception as e:
         return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
 
-@router.get("/xport", response_class=FileResponse)
-async def test_set_xport() -> FileResponse:
-    tmp = NamedTemporaryFile(delete=False)
-    SampleInterface.testSet.export_to_csv(tmp.name)
-    return FileResponse(tmp.name, media_type="text/csv")
+@router.get("/xport", response_class=StreamingResponse)
+async def test_set_xport(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> Response:
+    return export_response(workspace.samples.testSet, "test", export_format)
 
 
 @router.get("/model-area", response_class=JSONResponse)
-async def test_set_get_model_area() -> JSONResponse:
+async def test_set_get_model_area(
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> JSONResponse:
     area = {}
     try:
-        ModelInterface.raise_if_no_model()
-        md: ModelMetadata = ModelInterface.get_metadata()
+        workspace.model.raise_if_no_model()
+        md: ModelMetadata = workspace.model.get_metadata()
         if not (md.modelAreaX and md.modelAreaY):
             raise Exception(
                 "Model JSON missing area metadata. Please generate a new one."
@@ -78,5 +108,5 @@ async def test_set_get_model_area() -> JSONResponse:
 
 
 @router.get("/reset")
-async def test_set_reset():
-    SampleInterface.testSet.clear()
+async def test_set_reset(workspace: Workspace = Depends(get_workspace)):
+    workspace.samples.testSet.clear()
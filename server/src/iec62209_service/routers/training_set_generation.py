@@ -1,9 +1,18 @@
-from tempfile import NamedTemporaryFile
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from fastapi import APIRouter, status
-from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
-
-from ..utils.common import SampleConfig, SampleInterface
+from ..api import (
+    get_app_settings,
+    get_plot_cache,
+    get_readonly_workspace,
+    get_workspace,
+)
+from ..settings import ApplicationSettings
+from ..utils.common import SampleConfig
+from ..utils.encoding import ExportFormat, dataset_response, export_response
+from ..utils.plotcache import PlotCache, png_response
+from ..workspaces import Workspace
 
 router = APIRouter(
     prefix="/training-set-generation",
@@ -15,18 +24,24 @@ router = APIRouter(
 
 
 @router.get("/reset")
-async def training_set_reset():
-    SampleInterface.trainingSet.clear()
+async def training_set_reset(workspace: Workspace = Depends(get_workspace)):
+    workspace.samples.trainingSet.clear()
 
 
 @router.get("/distribution", response_class=Response)
-async def training_set_distribution(timestamp: str = "") -> Response:
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def training_set_distribution(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+) -> Response:
     try:
-        buf = SampleInterface.trainingSet.plot_distribution()
-        return StreamingResponse(buf, media_type="image/png")
+        return png_response(
+            request,
+            plots,
+            "training-set/distribution",
+            workspace.samples.trainingSet.fingerprint(),
+            workspace.samples.trainingSet.plot_distribution,
+        )
     except Exception as e:
         return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -34,26 +49,45 @@ async def training_set_distribution(timestamp: str = "") -> Response:
 
 
 @router.get("/data", response_class=JSONResponse)
-async def training_set_data() -> JSONResponse:
-    return JSONResponse(SampleInterface.trainingSet.to_dict())
+async def training_set_data(
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> Response:
+    return dataset_response(
+        request, workspace.samples.trainingSet, offset=offset, limit=limit
+    )
 
 
-@router.get("/xport", response_class=FileResponse)
-async def training_set_xport() -> FileResponse:
-    tmp = NamedTemporaryFile(delete=False)
-    SampleInterface.trainingSet.export_to_csv(tmp.name)
-    return FileResponse(tmp.name, media_type="text/csv")
+@router.get("/xport", response_class=StreamingResponse)
+async def training_set_xport(
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> Response:
+    return export_response(workspace.samples.trainingSet, "training", export_format)
 
 
 @router.post("/generate", response_class=JSONResponse)
-async def training_set_generate(config: SampleConfig) -> JSONResponse:
+async def training_set_generate(
+    config: SampleConfig,
+    workspace: Workspace = Depends(get_workspace),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> JSONResponse:
     message = ""
     end_status = status.HTTP_200_OK
     try:
-        SampleInterface.trainingSet.generate(config)
-        SampleInterface.trainingSet.add_columns(["sar10g", "u10g"])
+        await run_in_threadpool(
+            workspace.samples.trainingSet.generate,
+            config,
+            "training",
+            batch_rows=settings.GENERATE_BATCH_ROWS,
+        )
+        workspace.samples.trainingSet.add_columns(["sar10g", "u10g"])
     except Exception as e:
         message = {"error": f"The IEC62209 package raised an exception: {e}"}
         end_status = status.HTTP_500_INTERNAL_SERVER_ERROR
 
-    return JSONResponse(message, status_code=end_status)
+    # the seed drawn if none was given, to generate the same sample again
+    headers = {"X-Sample-Seed": str(config.seed)} if config.seed is not None else None
+    return JSONResponse(message, status_code=end_status, headers=headers)
@@ -1,28 +1,45 @@
-from importlib.resources import files
-from os import mkdir
 from pathlib import Path
-from shutil import copyfile
 
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
-
-from .._meta import info
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from ..api import (
+    get_app_settings,
+    get_job_manager,
+    get_plot_cache,
+    get_readonly_workspace,
+    get_report_cache,
+)
+from ..jobs import JobManager
 from ..reports import texutils
-from ..utils.common import ModelInterface, SampleInterface
+from ..reports.builder import build_report, cached_figures, render_report
+from ..reports.cache import ReportCache
+from ..settings import ApplicationSettings
+from ..utils.common import Acceptance
+from ..utils.plotcache import PlotCache, png_response
+from ..workspaces import Workspace
+from .jobs import job_submitted
 
 router = APIRouter(prefix="/verify", tags=["verify"])
 
 
 @router.get("/results", response_class=JSONResponse)
-async def verify_results() -> JSONResponse:
+async def verify_results(
+    workspace: Workspace = Depends(get_readonly_workspace),
+) -> JSONResponse:
     try:
-        ModelInterface.raise_if_no_model()
+        workspace.model.raise_if_no_model()
         # if no critical tests found, model is verified automatically
-        data = SampleInterface.criticalSet
-        dataok: bool = data.sample is not None and len(data.rows) == 0
-        if not dataok:
-            dataok = ModelInterface.acceptance_criteria(SampleInterface.criticalSet)
-        return JSONResponse({"Acceptance criteria": "Pass" if dataok else "Fail"})
+        acceptance: Acceptance = workspace.model.acceptance(
+            workspace.samples.criticalSet
+        )
+        return JSONResponse(
+            {
+                "Acceptance criteria": "Pass" if acceptance.accept else "Fail",
+                "violations": acceptance.violations(),
+            }
+        )
     except Exception as e:
         return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -30,14 +47,20 @@ async def verify_results() -> JSONResponse:
 
 
 @router.get("/deviations", response_class=Response)
-async def verify_deviations(timestamp: str = "") -> Response:
-    if not timestamp:
-        # timestamp parameter to avoid browser caching the plot
-        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+async def verify_deviations(
+    request: Request,
+    workspace: Workspace = Depends(get_readonly_workspace),
+    plots: PlotCache = Depends(get_plot_cache),
+) -> Response:
     try:
-        ModelInterface.raise_if_no_model()
-        buf = SampleInterface.criticalSet.plot_deviations()
-        return StreamingResponse(buf, media_type="image/png")
+        workspace.model.raise_if_no_model()
+        return png_response(
+            request,
+            plots,
+            "verify/deviations",
+            workspace.samples.criticalSet.fingerprint(),
+            workspace.samples.criticalSet.plot_deviations,
+        )
     except Exception as e:
         return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -45,83 +68,53 @@ async def verify_deviations(timestamp: str = "") -> Response:
 
 
 @router.get("/pdf", response_class=Response)
-async def verify_pdf(tmp=Depends(texutils.create_temp_folder)) -> Response:
-    from .. import reports
-    from ..reports import texwriter
-    from ..reports.texutils import typeset
-
+async def verify_pdf(
+    asynchronous: bool = False,
+    backend: texutils.ReportBackend | None = None,
+    tmp=Depends(texutils.create_temp_folder),
+    workspace: Workspace = Depends(get_readonly_workspace),
+    jobs: JobManager = Depends(get_job_manager),
+    reports: ReportCache = Depends(get_report_cache),
+    plots: PlotCache = Depends(get_plot_cache),
+    settings: ApplicationSettings = Depends(get_app_settings),
+) -> Response:
     try:
-        trivial_case: bool = len(SampleInterface.criticalSet.rows) == 0
-
-        texpath = Path(tmp.name)
-
-        # images
-
-        imgpath = texpath / "images"
-        mkdir(imgpath.as_posix())
-
-        if not trivial_case:
-            (imgpath / "critical-acceptance.png").write_bytes(
-                SampleInterface.criticalSet.plot_deviations().getvalue()
-            )
-
-        # tables
-
-        accepted: bool = ModelInterface.acceptance_criteria(SampleInterface.criticalSet)
-
-        (texpath / "onelinesummary.tex").write_text(
-            texwriter.write_one_line_summary(
-                accepted, texutils.ReportStage.VERIFICATION
-            )
-        )
-
-        (texpath / "metadata.tex").write_text(
-            texwriter.write_model_metadata_tex(ModelInterface.get_metadata())
-        )
-
-        (texpath / "summary.tex").write_text(
-            texwriter.write_verification_summary_tex(accepted)
-        )
-
-        (texpath / "sample_parameters.tex").write_text(
-            texwriter.write_sample_parameters_tex(
-                SampleInterface.criticalSet.config,
-                ModelInterface.get_metadata(),
-                texutils.ReportStage.VERIFICATION,
-            )
-        )
-
-        (texpath / "outcome_critical.tex").write_text(
-            texwriter.write_outcome_critical(
-                SampleInterface.criticalSet.config.sampleSize
-            )
-        )
-
-        (texpath / "acceptance.tex").write_text(
-            texwriter.write_sample_acceptance_tex(accepted)
-        )
-
-        if not trivial_case:
-            (texpath / "sample_table.tex").write_text(
-                texwriter.write_sample_table_tex(
-                    SampleInterface.criticalSet, texutils.ReportStage.VERIFICATION
+        stage = texutils.ReportStage.VERIFICATION
+        backend = backend or settings.REPORTS_BACKEND
+        if asynchronous:
+            cached = reports.get(reports.key(stage, workspace.model, backend))
+            if cached is not None:
+                job = jobs.resolved(
+                    workspace,
+                    "render_report",
+                    cached.read_bytes(),
+                    media_type="application/pdf",
                 )
-            )
-
-        (texpath / "version.tex").write_text(info.__version__)
-
-        # main tex
-
-        if trivial_case:
-            mainres = files(reports).joinpath("verification_trivial.tex")
-        else:
-            mainres = files(reports).joinpath("verification.tex")
-        maintex = "report.tex"
-        copyfile(mainres, texpath / maintex)
-
-        mainpdf = texpath / typeset(texpath, maintex)
+            else:
+                job = jobs.submit(
+                    workspace,
+                    render_report,
+                    stage,
+                    workspace.model,
+                    reports,
+                    backend,
+                    cached_figures(stage, workspace.model, plots),
+                    media_type="application/pdf",
+                )
+            return job_submitted(job)
+
+        mainpdf = await run_in_threadpool(
+            build_report,
+            stage,
+            workspace.model,
+            Path(tmp.name),
+            reports,
+            backend,
+            cached_figures(stage, workspace.model, plots),
+        )
 
         return FileResponse(mainpdf, media_type="application/pdf")
+
     except Exception as e:
         return JSONResponse(
             {"error": str(e)}, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1,9 +1,11 @@
 import os
 from pathlib import Path
 
-from pydantic import Field, validator
+from pydantic import Field, PositiveInt, validator
 from pydantic_settings import BaseSettings
 
+from .reports.texutils import ReportBackend
+
 
 class OsparcServiceSettings(BaseSettings):
 
@@ -41,6 +43,105 @@ class OsparcServiceSettings(BaseSettings):
 class ApplicationSettings(OsparcServiceSettings):
     CLIENT_OUTPUT_DIR: Path | None
 
+    WORKSPACE_TTL_SECONDS: PositiveInt = Field(
+        3600,
+        description="Idle time after which a session workspace is evicted",
+    )
+    WORKSPACE_MAX_MEMORY_MB: PositiveInt = Field(
+        2048,
+        description="Memory cap for all workspaces. Least recently used are evicted first",
+    )
+
+    COMPRESSION_MIN_BYTES: PositiveInt = Field(
+        4096,
+        description="Dataset responses larger than this are compressed (gzip or brotli)",
+    )
+
+    PLOT_CACHE_MAX_MB: PositiveInt = Field(
+        64,
+        description="Size of the cache of rendered plots, shared by all sessions",
+    )
+
+    REPORTS_CACHE_FOLDER: Path | None = Field(
+        None,
+        description="Folder keeping typeset reports. Defaults to a temporary folder",
+    )
+    REPORTS_CACHE_MAX_ENTRIES: PositiveInt = Field(
+        32,
+        description="Number of typeset reports kept",
+    )
+    REPORTS_BACKEND: ReportBackend = Field(
+        ReportBackend.LATEX,
+        description="Default typesetting of pdf reports: 'latex' (pdflatex, the "
+        "certified layout) or 'native' (one pass in python, no TeX needed)",
+    )
+
+    REPORTS_PARALLEL_FIGURES: bool = Field(
+        False,
+        description="Renders the figures of a report in a pool of processes. Only "
+        "worth it with several CPUs and figures not yet served to the interface",
+    )
+
+    ARTIFACTS_FOLDER: Path | None = Field(
+        None,
+        description="Folder storing fitted models and explored samples. "
+        "Defaults to the first state folder, or else a temporary folder",
+    )
+    ARTIFACTS_MAX_MB: PositiveInt = Field(
+        1024,
+        description="Size of the artifacts store. Least recently used are evicted first",
+    )
+
+    PREDICT_CHUNK_ROWS: PositiveInt = Field(
+        10_000,
+        description="Rows of configurations evaluated at once by batch predictions",
+    )
+
+    GENERATE_BATCH_ROWS: PositiveInt = Field(
+        100_000,
+        description="Configurations drawn at once when generating training and test "
+        "samples. Larger samples are drawn, and streamed, batch by batch",
+    )
+
+    EXPLORE_PARTITIONS: PositiveInt = Field(
+        1,
+        description="Number of seeded explorations merged into the critical sample. "
+        "They share the iterations of one exploration when the iec62209 package "
+        "takes them, otherwise each one costs a whole exploration",
+    )
+    EXPLORE_WORKERS: PositiveInt | None = Field(
+        None,
+        description="Processes running explorations. Defaults to the number of CPUs",
+    )
+    EXPLORE_SEED: int = Field(
+        0,
+        description="Seed of the critical space search, which makes it reproducible",
+    )
+
+    JOBS_MAX_WORKERS: PositiveInt | None = Field(
+        None,
+        description="Size of the process pool running jobs. Defaults to the number of CPUs",
+    )
+    JOBS_RESULT_TTL_SECONDS: PositiveInt = Field(
+        600,
+        description="Time a finished job and its result are kept",
+    )
+
+    SHARED_STATE: bool = Field(
+        False,
+        description="Keeps workspaces, jobs and progress in a database shared by "
+        "several workers (e.g. uvicorn --workers N) instead of in their memory",
+    )
+    SHARED_STATE_FOLDER: Path | None = Field(
+        None,
+        description="Folder of the shared state. Defaults to the first state folder",
+    )
+    WEB_CONCURRENCY: PositiveInt = Field(
+        1,
+        description="Number of workers of the server (as read by uvicorn). With "
+        "more than one, SHARED_STATE is required",
+    )
+
     @validator("CLIENT_OUTPUT_DIR")
     @classmethod
     def is_client_output(cls, value: Path):
@@ -0,0 +1,367 @@
+"""State shared by the workers of the service
+
+With several workers (e.g. uvicorn --workers N), any worker may serve any
+request of a session. Workspaces, job records and progress events are then kept
+in a SQLite database in a state folder, instead of in the memory of a worker:
+ - workspaces are pickled, with a version incremented at every change. Workers
+   keep the last version they loaded and only load again when it changed.
+   Only requests that may change a workspace save it back (see api): plots,
+   data and reports read it without pickling it
+ - requests that may change the workspace of a session are serialized by a
+   lock file of the session (flock), held from loading the workspace to saving
+   it, across all the workers: none of their changes is lost. Requests that only
+   read it hold the lock while loading it, not while they run (e.g. a report
+   being typeset). Long computations that should not hold the lock are run as
+   jobs (asynchronous=true): they only take it to merge their result
+ - jobs run in the pool of the worker that submitted them, their records and
+   results are visible to all
+"""
+
+import fcntl
+import pickle
+import sqlite3
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from hashlib import blake2b
+from itertools import count
+from json import dumps as jdumps
+from json import loads as jloads
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Any
+
+from fastapi import FastAPI
+
+from .settings import ApplicationSettings
+from .workspaces import Workspace
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workspaces (
+    session_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    state BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    media_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    created REAL NOT NULL,
+    finished REAL,
+    result BLOB
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    time REAL NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_channel ON events (channel, id);
+"""
+
+
+class Database:
+    """a SQLite database, with a connection per operation (any thread)"""
+
+    FILENAME = "state.sqlite"
+
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.path = self.folder / self.FILENAME
+        with self.connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+class SharedWorkspaces:
+    """workspaces of all the workers, same interface as WorkspaceRegistry"""
+
+    def __init__(self, database: Database, ttl: float, max_memory: int):
+        self.database = database
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.locks = database.folder / "locks"
+        self.locks.mkdir(exist_ok=True)
+        # session_id -> (version, workspace) last seen here
+        self._loaded: OrderedDict[str, tuple[int, Workspace]] = OrderedDict()
+        self._lock = Lock()
+        self._last_sweep = 0.0
+
+    @contextmanager
+    def _session_lock(self, session_id: str) -> Iterator[None]:
+        # the session id comes from a cookie: never use it as a file name
+        name = blake2b(session_id.encode(), digest_size=16).hexdigest()
+        with open(self.locks / f"{name}.lock", "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @contextmanager
+    def session(self, session_id: str, readonly: bool = False) -> Iterator[Workspace]:
+        """the workspace of a session for one request, saved back unless readonly"""
+        self._sweep()
+        if readonly:
+            with self._session_lock(session_id):
+                _, workspace = self._load(session_id)
+            yield workspace
+            return
+
+        with self._session_lock(session_id):
+            version, workspace = self._load(session_id)
+            try:
+                yield workspace
+            finally:
+                self._save(session_id, version, workspace)
+
+    def update(self, session_id: str, fn: Callable[[Workspace], None]) -> None:
+        with self.session(session_id) as workspace:
+            fn(workspace)
+
+    def get(self, session_id: str) -> Workspace:
+        """the workspace as last saved, not saved back
+
+        It is the object this worker keeps, not a copy: changes to it are not
+        saved, but are seen by the other requests of this worker until the
+        workspace is loaded again
+        """
+        with self._session_lock(session_id):
+            return self._load(session_id)[1]
+
+    def remove(self, session_id: str) -> None:
+        with self._session_lock(session_id), self.database.connect() as db:
+            db.execute("DELETE FROM workspaces WHERE session_id = ?", (session_id,))
+        with self._lock:
+            self._loaded.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self.database.connect() as db:
+            db.execute("DELETE FROM workspaces")
+        with self._lock:
+            self._loaded.clear()
+
+    def __len__(self) -> int:
+        with self.database.connect() as db:
+            return db.execute("SELECT COUNT(*) FROM workspaces").fetchone()[0]
+
+    def __contains__(self, session_id: str) -> bool:
+        with self.database.connect() as db:
+            return (
+                db.execute(
+                    "SELECT 1 FROM workspaces WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                is not None
+            )
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(ws.memory_usage() for _, ws in self._loaded.values())
+
+    def _load(self, session_id: str) -> tuple[int, Workspace]:
+        with self.database.connect() as db:
+            row = db.execute(
+                "SELECT version FROM workspaces WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return 0, Workspace(session_id)
+            db.execute(
+                "UPDATE workspaces SET accessed = ? WHERE session_id = ?",
+                (time(), session_id),
+            )
+            with self._lock:
+                loaded = self._loaded.get(session_id)
+                if loaded is not None and loaded[0] == row[0]:
+                    self._loaded.move_to_end(session_id)
+                    return loaded
+            version, state = db.execute(
+                "SELECT version, state FROM workspaces WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        loaded = (version, pickle.loads(state))
+        self._remember(session_id, loaded)
+        return loaded
+
+    def _save(self, session_id: str, version: int, workspace: Workspace) -> None:
+        state = pickle.dumps(workspace, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.database.connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO workspaces VALUES (?, ?, ?, ?)",
+                (session_id, version + 1, time(), state),
+            )
+        self._remember(session_id, (version + 1, workspace))
+
+    def _remember(self, session_id: str, loaded: tuple[int, Workspace]):
+        with self._lock:
+            self._loaded[session_id] = loaded
+            self._loaded.move_to_end(session_id)
+            usage = {sid: ws.memory_usage() for sid, (_, ws) in self._loaded.items()}
+            total = sum(usage.values())
+            for sid in list(self._loaded):
+                if total <= self.max_memory or sid == session_id:
+                    break
+                total -= usage[sid]
+                del self._loaded[sid]
+
+    def _sweep(self) -> None:
+        """drops the workspaces idle for longer than the TTL"""
+        now = time()
+        if now - self._last_sweep < min(60.0, self.ttl):
+            return
+        self._last_sweep = now
+        with self.database.connect() as db:
+            expired = [
+                row[0]
+                for row in db.execute(
+                    "SELECT session_id FROM workspaces WHERE accessed < ?",
+                    (now - self.ttl,),
+                )
+            ]
+            db.execute("DELETE FROM workspaces WHERE accessed < ?", (now - self.ttl,))
+        with self._lock:
+            for session_id in expired:
+                self._loaded.pop(session_id, None)
+
+
+class JobRecords:
+    """status and results of the jobs of all the workers"""
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def add(self, job) -> None:
+        with self.database.connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, NULL, ?, NULL, NULL)",
+                (
+                    job.id,
+                    job.session_id,
+                    job.name,
+                    job.media_type,
+                    job.status.value,
+                    job.created,
+                ),
+            )
+
+    def finish(self, job, result: Any = None) -> None:
+        """records the outcome of a job, unless cancelled meanwhile"""
+        content = None if result is None else pickle.dumps(result)
+        with self.database.connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished = ?, result = ? "
+                "WHERE job_id = ? AND status != 'cancelled'",
+                (job.status.value, job.error, job.finished, content, job.id),
+            )
+
+    def cancel(self, job_id: str) -> None:
+        with self.database.connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ?, result = NULL "
+                "WHERE job_id = ? AND finished IS NULL",
+                (time(), job_id),
+            )
+
+    def get(self, job_id: str) -> dict | None:
+        with self.database.connect() as db:
+            db.row_factory = sqlite3.Row
+            row = db.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return None if row is None else dict(row)
+
+    def prune(self, deadline: float) -> None:
+        with self.database.connect() as db:
+            db.execute("DELETE FROM jobs WHERE finished < ?", (deadline,))
+
+
+def job_future(record: dict) -> Future:
+    """a future in the state of a job record"""
+    future: Future = Future()
+    if record["status"] in ("success", "stale"):
+        result = record["result"]
+        future.set_result((None, None if result is None else pickle.loads(result)))
+    elif record["status"] == "failed":
+        future.set_exception(Exception(record["error"]))
+    elif record["status"] == "running":
+        future.set_running_or_notify_cancel()
+    return future
+
+
+class SharedProgressHub:
+    """progress events of all the workers, same interface as ProgressHub"""
+
+    def __init__(self, database: Database, ttl: float):
+        self.database = database
+        self.ttl = ttl
+        self._published = count()
+
+    def publish(self, channel: str, event: dict) -> None:
+        now = time()
+        with self.database.connect() as db:
+            db.execute(
+                "INSERT INTO events (channel, time, event) VALUES (?, ?, ?)",
+                (channel, now, jdumps(event)),
+            )
+            if next(self._published) % 100 == 0:
+                db.execute("DELETE FROM events WHERE time < ?", (now - self.ttl,))
+
+    def last_id(self, channel: str) -> int:
+        with self.database.connect() as db:
+            row = db.execute(
+                "SELECT MAX(id) FROM events WHERE channel = ?", (channel,)
+            ).fetchone()
+        return row[0] or 0
+
+    def since(self, channel: str, last_id: int) -> list[dict]:
+        with self.database.connect() as db:
+            rows = db.execute(
+                "SELECT id, event FROM events WHERE channel = ? AND id > ? ORDER BY id",
+                (channel, last_id),
+            ).fetchall()
+        return [{"id": id_, **jloads(event)} for id_, event in rows]
+
+    def forget(self, channel: str) -> None:
+        with self.database.connect() as db:
+            db.execute("DELETE FROM events WHERE channel = ?", (channel,))
+
+
+def setup_shared_state(app: FastAPI, settings: ApplicationSettings) -> None:
+    """replaces the state of this worker by the shared one, if enabled"""
+    if not settings.SHARED_STATE:
+        if settings.WEB_CONCURRENCY > 1:
+            # every worker would keep workspaces of its own
+            raise ValueError(
+                f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY} requires SHARED_STATE"
+            )
+        return
+    folder = settings.SHARED_STATE_FOLDER
+    if folder is None and settings.STATE_FOLDERS:
+        folder = settings.STATE_FOLDERS[0] / "shared"
+    if folder is None:
+        raise ValueError("SHARED_STATE requires SHARED_STATE_FOLDER or STATE_FOLDERS")
+
+    database = Database(folder)
+    app.state.workspaces = SharedWorkspaces(
+        database,
+        ttl=settings.WORKSPACE_TTL_SECONDS,
+        max_memory=settings.WORKSPACE_MAX_MEMORY_MB * 1024 * 1024,
+    )
+    app.state.job_records = JobRecords(database)
+    app.state.progress = SharedProgressHub(
+        database, ttl=settings.JOBS_RESULT_TTL_SECONDS
+    )
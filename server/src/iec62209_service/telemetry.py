@@ -0,0 +1,49 @@
+"""Request metrics and Server-Timing
+
+Every request is timed, with its payload sizes, per router (the first segment
+of the path of its route). The phases of the pipeline run while serving it are
+reported to the browser in a Server-Timing header. Metrics are served by
+/metrics (see routers.meta).
+"""
+
+from time import perf_counter
+
+from fastapi import FastAPI, Request
+
+from .utils import metrics
+
+
+def _router_label(request: Request) -> str:
+    path = getattr(request.scope.get("route"), "path", None)
+    if path is None:
+        # keeps the cardinality of the labels bounded
+        return "unmatched"
+    return "/" + path.strip("/").split("/", 1)[0]
+
+
+def _size(headers) -> int | None:
+    try:
+        return int(headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def setup_telemetry(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def _telemetry_middleware(request: Request, call_next):
+        start = perf_counter()
+        with metrics.collect_timings() as timings:
+            response = await call_next(request)
+        elapsed = perf_counter() - start
+
+        router = _router_label(request)
+        metrics.REQUEST_SECONDS.observe(
+            elapsed, router, request.method, str(response.status_code)
+        )
+        if (size := _size(request.headers)) is not None:
+            metrics.REQUEST_BYTES.observe(size, router)
+        if (size := _size(response.headers)) is not None:
+            metrics.RESPONSE_BYTES.observe(size, router)
+
+        response.headers["Server-Timing"] = metrics.server_timing(timings, elapsed)
+        return response
@@ -1,18 +1,28 @@
+import pickle
+from collections.abc import Callable
 from enum import Enum
-from math import fabs
-from os import remove
-from tempfile import NamedTemporaryFile
-
-from iec62209.plot import (
-    plot_sample_deviations,
-    plot_sample_distribution,
-    plot_sample_marginals,
-)
-from iec62209.work import Model, Sample, Work, add_zvar, load_measured_sample
-from matplotlib import pyplot as plt
+from functools import cache, wraps
+from json import dumps as jdumps
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+from iec62209.work import Model, Sample, Work
 from pydantic import BaseModel
 
-plt.rc("font", size=14)
+from . import metrics, progress
+from .coverage import Coverage, CoverageError, ModelDomain
+from .exploration import explore_partitioned
+from .generation import (
+    BATCH_ROWS,
+    MEASURED_COLUMNS,
+    generate_sample,
+    new_seed,
+    sample_seed,
+)
+from .hashing import fingerprint
+from .ingestion import read_measured_sample
+from .modelformat import dump_model_npz, load_model_npz
 
 
 class SarFiltering(str, Enum):
@@ -20,10 +30,45 @@ class SarFiltering(str, Enum):
     SAR10G = "SAR10G"
 
 
+class ModelFormat(str, Enum):
+    JSON = "json"
+    NPZ = "npz"
+
+
+class Acceptance:
+    """outcome of the acceptance criterion |sard10g| <= mpe10g
+
+    rows are positions in the dataset, margins are mpe10g - |sard10g|
+    (negative for the violating rows)
+    """
+
+    def __init__(
+        self, rows: np.ndarray | None = None, margins: np.ndarray | None = None
+    ):
+        self.rows = np.empty(0, dtype=int) if rows is None else rows
+        self.margins = np.empty(0) if margins is None else margins
+
+    @property
+    def accept(self) -> bool:
+        return len(self.rows) == 0
+
+    def violations(self) -> list[dict]:
+        return [
+            {"row": int(row), "margin": float(margin)}
+            for row, margin in zip(self.rows, self.margins)
+        ]
+
+
 class Goodfit:
-    def __init__(self, accept: bool = False, gfres: tuple = (False, 0)):
+    def __init__(
+        self,
+        accept: bool = False,
+        gfres: tuple = (False, 0),
+        acceptance: Acceptance | None = None,
+    ):
         self.accept: bool = accept
         self.gfres: tuple = gfres
+        self.acceptance: Acceptance = acceptance or Acceptance()
 
 
 class Residuals:
@@ -77,6 +122,8 @@ class SampleConfig(BaseModel):
     measAreaX: int = 0
     measAreaY: int = 0
     sampleSize: int = 0
+    # of the generation: random if None, then set to the seed used
+    seed: int | None = None
 
 
 class ModelMetadata(BaseModel):
@@ -95,17 +142,39 @@ class ModelMetadata(BaseModel):
 ### Helpers
 
 
+@cache
+def pyplot():
+    # imported with the first plot: matplotlib is most of the startup time
+    from matplotlib import pyplot as plt
+
+    plt.rc("font", size=14)
+    return plt
+
+
+def plotting(method):
+    """loads pyplot before a method that plots"""
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        pyplot()
+        return method(*args, **kwargs)
+
+    return wrapper
+
+
 def fig2png(fig):
     import io
 
     buf = io.BytesIO()
-    fig.savefig(buf, format="png")
+    with metrics.timed("fig2png"):
+        fig.savefig(buf, format="png")
     buf.seek(0)
-    plt.close(fig)
+    pyplot().close(fig)
     return buf
 
 
 def empty_plot():
+    plt = pyplot()
     fig, ax = plt.subplots(1, 1, figsize=[12, 9])
     plt.subplots_adjust(
         left=0.09, right=0.95, bottom=0.09, top=0.95, wspace=0.2, hspace=0.4
@@ -114,102 +183,171 @@ def empty_plot():
     return fig
 
 
+def _json_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """object frame with None for NaN/inf"""
+    invalid = df.isna()
+    numeric = df.select_dtypes(include="number").columns
+    if len(numeric):
+        invalid[numeric] |= ~np.isfinite(df[numeric].to_numpy(dtype=float))
+    return df.astype(object).mask(invalid, None)
+
+
+def json_rows(df: pd.DataFrame) -> list[list]:
+    """row-major values with python scalars and None for NaN/inf (json-safe)"""
+    return _json_safe(df).to_numpy().tolist()
+
+
+def json_columns(df: pd.DataFrame) -> list[list]:
+    """column-major counterpart of json_rows"""
+    return _json_safe(df).to_numpy().T.tolist()
+
+
 class DataSetInterface:
     def __init__(self):
         # these are the columns that the iec62209 package expects:
         # headings = ['', 'antenna', 'frequency', 'power', 'modulation', 'par', 'bandwidth', 'distance', 'angle', 'x', 'y', 'sar_1g', 'sar_10g', 'u_1g', 'u_10g']
+        # NOTE: data is only held in sample.data, rows are produced on demand
         self.sample: Sample = None
-        self.headings = []
-        self.rows = []
+        self.headings: list[str] = []
         self.config = SampleConfig()
+        self._fingerprint: tuple[Sample, pd.DataFrame, str] | None = None
 
     def clear(self):
         self.sample = None
         self.headings = []
-        self.rows = []
         self.config = SampleConfig()
+        self._fingerprint = None
+
+    @property
+    def data(self) -> pd.DataFrame:
+        if self.sample is None:
+            return pd.DataFrame(columns=self.headings)
+        return self.sample.data[self.headings]
+
+    @property
+    def size(self) -> int:
+        return 0 if self.sample is None else len(self.sample.data)
+
+    @property
+    def rows(self) -> list[list]:
+        return json_rows(self.data)
+
+    def page(self, offset: int = 0, limit: int | None = None) -> pd.DataFrame:
+        """rows [offset, offset + limit) of data, leaving the other rows alone"""
+        if self.sample is None:
+            return self.data
+        stop = None if limit is None else offset + limit
+        return self.sample.data.iloc[offset:stop][self.headings]
 
-    def __dict__(self) -> dict:
-        return {"headings": self.headings, "rows": self.rows}
+    def fingerprint(self) -> str:
+        """content hash of the sample (memoized until the sample or its data change)"""
+        if self.sample is None:
+            return fingerprint(None)
+        memo = self._fingerprint
+        if (
+            memo is None
+            or memo[0] is not self.sample
+            or memo[1] is not self.sample.data
+        ):
+            memo = (
+                self.sample,
+                self.sample.data,
+                fingerprint(self.sample.data, self.sample.mdata),
+            )
+            self._fingerprint = memo
+        return memo[2]
 
     def to_dict(self) -> dict:
-        return self.__dict__()
+        # NOTE: not overriding __dict__, which would break pickling into job workers
+        return {"headings": list(self.headings), "rows": self.rows}
+
+    def keep_rows(self, mask: np.ndarray):
+        """drops the rows not in mask, e.g. those outside the domain of a model"""
+        if self.sample is None:
+            raise Exception("Sample data not present")
+        self.sample.data = self.sample.data[mask].reset_index(drop=True)
+        self.config.sampleSize = len(self.sample.data)
+        self._fingerprint = None
 
     def add_columns(self, cols: list[str]):
         if self.sample is None:
             raise Exception("Sample data not present")
         for col in cols:
-            self.headings.append(col)
+            if col not in self.headings:
+                self.headings.append(col)
             self.sample.data[col] = 0
-            for row in self.rows:
-                row.append(0)
-
-    def generate(self, config: SampleConfig):
+        # changed in place
+        self._fingerprint = None
+
+    def generate(
+        self,
+        config: SampleConfig,
+        name: str = "",
+        work: Work | None = None,
+        batch_rows: int = BATCH_ROWS,
+    ):
+        """draws a sample, in batches of batch_rows (see utils.generation)
+
+        name: of the sample, which its seed is derived from
+        work: reused to generate several samples
+        """
         self.config = SampleConfig()
-        w = Work()
-        w.generate_sample(
-            size=config.sampleSize,
-            xmax=0.5 * config.measAreaX,
-            ymax=0.5 * config.measAreaY,
-            show=False,
-            save_to=None,
+        if config.seed is None:
+            config.seed = new_seed()
+        sample = generate_sample(
+            work or Work(),
+            config.sampleSize,
+            0.5 * config.measAreaX,
+            0.5 * config.measAreaY,
+            sample_seed(config.seed, name),
+            batch_rows,
         )
-        self.sample = w.data["sample"]
-        headings = w.data["sample"].data.columns.tolist()
-        values = w.data["sample"].data.values.tolist()
-        if not isinstance(headings, list) or not isinstance(values, list):
-            raise Exception("Invalid sample generated")
-        self.headings = headings
-        self.rows = []
-        for row in values:
-            self.rows.append(row)
+        self.sample = sample
+        self.headings = sample.data.columns.tolist()
         self.config = config
 
     @classmethod
     def from_dataframe(cls, sample: Sample):
         dataset = cls()
         dataset.sample = sample
-
-        # we convert to json here to avoid issues when jsonifying numpy data types
-        data = dict(sample.to_json()["data"])
-        for key in data:
-            dataset.headings.append(key)
+        dataset.headings = sample.data.columns.tolist()
         if len(dataset.headings) == 0:
             raise Exception("Empty or ill-formed data")
 
-        nrows = len(data[dataset.headings[0]])
-        for n in range(nrows):
-            row = []
-            for heading in dataset.headings:
-                row.append(data[heading][n])
-            dataset.rows.append(row)
-
         dataset.config.measAreaX = 2 * sample.mdata["xsup"]
         dataset.config.measAreaY = 2 * sample.mdata["ysup"]
-        dataset.config.sampleSize = nrows
+        dataset.config.sampleSize = len(sample.data)
 
         return dataset
 
+    @plotting
     def plot_marginals(self):
+        from iec62209.plot import plot_sample_marginals
+
         if self.sample is None:
             raise Exception("Sample not loaded")
         fig = plot_sample_marginals(self.sample)
         return fig2png(fig)
 
+    @plotting
     def plot_deviations(self):
+        from iec62209.plot import plot_sample_deviations
 
         if self.sample is None:
             raise Exception("Sample not loaded")
-        if len(self.rows) == 0:
+        if self.size == 0:
             fig = empty_plot()
         else:
             fig = plot_sample_deviations(self.sample)
         return fig2png(fig)
 
+    @plotting
     def plot_distribution(self):
+        from iec62209.plot import plot_sample_distribution
+
         if self.sample is None:
             raise Exception("Sample not loaded")
-        if len(self.rows) == 0:
+        if self.size == 0:
             fig = empty_plot()
         else:
             fig = plot_sample_distribution(self.sample)
@@ -223,230 +361,310 @@ class DataSetInterface:
 
 
 class SampleInterface:
-    testSet = DataSetInterface()
-    trainingSet = DataSetInterface()
-    criticalSet = DataSetInterface()
+    def __init__(self):
+        self.testSet = DataSetInterface()
+        self.trainingSet = DataSetInterface()
+        self.criticalSet = DataSetInterface()
+
+    def generate(
+        self, configs: dict[str, SampleConfig], seed: int, batch_rows: int = BATCH_ROWS
+    ):
+        """generates the "training" and/or "test" samples with one Work"""
+        work = Work()
+        for name, config in configs.items():
+            dataset = {"training": self.trainingSet, "test": self.testSet}[name]
+            config.seed = seed
+            dataset.generate(config, name, work, batch_rows)
+            dataset.add_columns(MEASURED_COLUMNS)
 
 
 class ModelInterface:
-    work: Work = Work()
-    residuals = []
-    goodfit = Goodfit()
+    def __init__(self, samples: SampleInterface):
+        self.work: Work = Work()
+        self.residuals = []
+        self.goodfit = Goodfit()
+        self.samples = samples
+        self._model_fingerprint: tuple[Model, str] | None = None
+        self._model_domain: tuple[Model, ModelDomain] | None = None
 
-    @classmethod
-    def clear(cls):
-        cls.work.clear()
-        cls.work.clear_model()
-        cls.work.clear_sample()
-        cls.residuals = []
-        cls.goodfit = Goodfit()
+    def clear(self):
+        self.work.clear()
+        self.work.clear_model()
+        self.work.clear_sample()
+        self.residuals = []
+        self.goodfit = Goodfit()
 
-    @classmethod
-    def has_init_sample(cls) -> bool:
-        return cls.work.data.get("initsample") is not None
+    def has_init_sample(self) -> bool:
+        return self.work.data.get("initsample") is not None
 
-    @classmethod
-    def has_test_sample(cls) -> bool:
-        return cls.work.data.get("testsample") is not None
+    def has_test_sample(self) -> bool:
+        return self.work.data.get("testsample") is not None
 
-    @classmethod
-    def has_model(cls) -> bool:
+    def has_model(self) -> bool:
         try:
-            return cls.work.data.get("model") is not None
+            return self.work.data.get("model") is not None
         except:
             return False
 
-    @classmethod
-    def raise_if_no_model(cls) -> None:
-        if not cls.has_model():
+    def raise_if_no_model(self) -> None:
+        if not self.has_model():
             raise Exception("No model loaded")
 
-    @classmethod
-    def model_covers_sample(cls, ds: DataSetInterface) -> bool:
-        cls.raise_if_no_model()
-        return cls.work.data.get("model").contains(ds.sample)
-
-    @classmethod
-    def load_init_sample(cls, filename) -> dict:
-        tmp = NamedTemporaryFile(delete=False)
-        try:
-            measured = load_measured_sample(filename)
-            add_zvar(measured, "10g")
-            measured.data.to_csv(tmp.name, float_format="%.6g", index=False)
-            sample = cls.work.load_init_sample(tmp.name, "sard10g")
-            SampleInterface.trainingSet = DataSetInterface.from_dataframe(sample)
-        except TypeError:
-            raise Exception(
-                "Please make sure that numbers are not formatted (e.g. to percentages)"
-            )
-        finally:
-            remove(tmp.name)
-
-        if not cls.has_init_sample():
-            raise Exception("Failed to load sample")
-        if sample.data.values.size == 0:
-            raise Exception(f"Failed to load data, or {filename} is empty")
-        return {
-            "headings": sample.data.columns.tolist(),
-            "rows": sample.data.values.tolist(),
-        }
-
-    @classmethod
-    def load_test_sample(cls, filename) -> dict:
-        cls.raise_if_no_model()
-        tmp = NamedTemporaryFile(delete=False)
-        try:
-            measured = load_measured_sample(filename)
-            add_zvar(measured, "10g")
-            measured.data.to_csv(tmp.name, float_format="%.6g", index=False)
-            sample = cls.work.load_test_sample(tmp.name, "sard10g")
-            SampleInterface.testSet = DataSetInterface.from_dataframe(sample)
-        except TypeError:
-            raise Exception(
-                "Please make sure that numbers are not formatted (e.g. to percentages)"
+    def model_domain(self) -> ModelDomain:
+        """bounds of the variables of the model (indexed once per model object)"""
+        self.raise_if_no_model()
+        model: Model = self.work.data.get("model")
+        if self._model_domain is None or self._model_domain[0] is not model:
+            self._model_domain = (model, ModelDomain.from_model(model))
+        return self._model_domain[1]
+
+    def sample_coverage(self, ds: DataSetInterface) -> Coverage:
+        """which rows of the sample, and which of their parameters, are in the domain
+
+        These are diagnostics, for a sample the model does not cover: whether it
+        does is only told by the model (see model_covers_sample)
+        """
+        return self.model_domain().check(ds.sample.data)
+
+    def model_covers_sample(self, ds: DataSetInterface) -> bool:
+        return self.work.data.get("model").contains(ds.sample)
+
+    def check_coverage(
+        self, ds: DataSetInterface, name: str, keep_covered: bool = False
+    ) -> int:
+        """rejects a sample the model does not cover, the number of rows dropped
+
+        With keep_covered, the rows outside the domain of the model are dropped
+        instead, as long as some are within it and the model covers the rest.
+        A rejected sample is cleared, and a CoverageError raised.
+        """
+        if self.model_covers_sample(ds):
+            return 0
+        coverage = self.sample_coverage(ds)
+        dropped = int((~coverage.covered).sum())
+        if keep_covered and 0 < dropped < len(coverage.covered):
+            ds.keep_rows(coverage.covered)
+            if self.model_covers_sample(ds):
+                return dropped
+        ds.clear()
+        raise CoverageError(name, coverage)
+
+    def load_init_sample(self, source: str | BinaryIO) -> dict:
+        with metrics.timed("parse_csv"):
+            sample = read_measured_sample(source)
+        # a new training sample is a new model, but a rejected one changes nothing
+        self.clear()
+        self.work.data["initsample"] = sample
+        self.samples.trainingSet = DataSetInterface.from_dataframe(sample)
+        return self.samples.trainingSet.to_dict()
+
+    def load_test_sample(self, source: str | BinaryIO) -> dict:
+        self.raise_if_no_model()
+        with metrics.timed("parse_csv"):
+            sample = read_measured_sample(source)
+        self.work.data["testsample"] = sample
+        # those of the previous test sample
+        self.residuals = []
+        self.samples.testSet = DataSetInterface.from_dataframe(sample)
+        return self.samples.testSet.to_dict()
+
+    def load_critical_sample(self, source: str | BinaryIO) -> dict:
+        self.raise_if_no_model()
+        with metrics.timed("parse_csv"):
+            sample = read_measured_sample(source)
+        self.work.data["critsample"] = sample
+        self.samples.criticalSet = DataSetInterface.from_dataframe(sample)
+        return self.samples.criticalSet.to_dict()
+
+    def model_fingerprint(self) -> str:
+        """content hash of the fitted model (memoized per model object)
+
+        Only what was fitted: the metadata entered by the user changes after the
+        model is made (see set_metadata) and is keyed on separately where needed
+        """
+        self.raise_if_no_model()
+        model: Model = self.work.data.get("model")
+        if self._model_fingerprint is None or self._model_fingerprint[0] is not model:
+            params = {
+                k: v
+                for k, v in model.to_json().items()
+                if k not in ("sample", "metadata")
+            }
+            self._model_fingerprint = (
+                model,
+                fingerprint(
+                    model.sample.data, jdumps(params, sort_keys=True, default=str)
+                ),
             )
-        finally:
-            remove(tmp.name)
-
-        if not cls.has_test_sample():
-            raise Exception("Failed to load sample")
-        if sample.data.values.size == 0:
-            raise Exception(f"Failed to load data, or {filename} is empty")
-        return {
-            "headings": sample.data.columns.tolist(),
-            "rows": sample.data.values.tolist(),
-        }
+        return self._model_fingerprint[1]
 
-    @classmethod
-    def load_critical_sample(cls, filename) -> dict:
-        cls.raise_if_no_model()
-        tmp = NamedTemporaryFile(delete=False)
-        try:
-            measured = load_measured_sample(filename)
-            add_zvar(measured, "10g")
-            measured.data.to_csv(tmp.name, float_format="%.6g", index=False)
-            # cls.work.init_critsample()
-            xvar = [
-                "frequency",
-                "power",
-                "par",
-                "bandwidth",
-                "distance",
-                "angle",
-                "x",
-                "y",
-            ]
-            cls.work.data["critsample"] = Sample.from_csv(
-                tmp.name, xvar=xvar, zvar=["sard10g"]
-            )
-            SampleInterface.criticalSet = DataSetInterface.from_dataframe(
-                cls.work.data["critsample"]
-            )
-        finally:
-            remove(tmp.name)
-        return SampleInterface.criticalSet.to_dict()
+    def residuals_fingerprint(self) -> str:
+        if len(self.residuals) == 0:
+            raise Exception("Residuals have not been calculated")
+        return fingerprint(pickle.dumps(self.residuals))
 
-    @classmethod
-    def set_metadata(cls, md: ModelMetadata):
-        cls.raise_if_no_model()
-        cls.work.data.get("model").metadata = dict(md)
+    def set_metadata(self, md: ModelMetadata):
+        self.raise_if_no_model()
+        self.work.data.get("model").metadata = dict(md)
 
-    @classmethod
-    def get_metadata(cls) -> ModelMetadata:
-        cls.raise_if_no_model()
+    def get_metadata(self) -> ModelMetadata:
+        self.raise_if_no_model()
         try:
-            md = cls.work.model_metadata()
+            md = self.work.model_metadata()
             return ModelMetadata.parse_obj(md)
         except:
             raise Exception("Incomplete or missing metadata in model")
 
-    @classmethod
-    def dump_model_to_json(cls):
-        model: Model = cls.work.data.get("model")
+    def dump_model_to_json(self):
+        model: Model = self.work.data.get("model")
         if model is None:
             raise Exception("no model has been created")
         return model.to_json()
 
-    @classmethod
-    def load_model_from_json(cls, json):
-        cls.clear()
-        cls.work.load_model(json)
-        SampleInterface.trainingSet = DataSetInterface.from_dataframe(
-            cls.work.data.get("model").sample
+    def load_model_from_json(self, json):
+        self.clear()
+        self.work.load_model(json)
+        self.samples.trainingSet = DataSetInterface.from_dataframe(
+            self.work.data.get("model").sample
         )
 
-    @classmethod
-    def make_model(cls):
-        cls.work.make_model(show=False)
+    def dump_model_to_npz(self) -> bytes:
+        return dump_model_npz(self.dump_model_to_json())
 
-    @classmethod
-    def plot_model(cls):
-        cls.raise_if_no_model()
-        fig = cls.work.plot_model()
+    def load_model_from_npz(self, source: str | BinaryIO):
+        content = load_model_npz(source)
+        self.clear()
+        self.work.data["model"] = Model.from_json(content)
+        self.samples.trainingSet = DataSetInterface.from_dataframe(
+            self.work.data.get("model").sample
+        )
+
+    def make_model(self):
+        with progress.phase("make_model"):
+            self.work.make_model(show=False)
+
+    def fitted(self) -> tuple[Model, Goodfit]:
+        """the fitted model and its goodfit results, as stored in artifacts"""
+        self.raise_if_no_model()
+        return self.work.data["model"], self.goodfit
+
+    def restore_fitted(self, model: Model, goodfit: Goodfit):
+        """counterpart of fitted, for the training sample the model was fitted to"""
+        self.work.data["model"] = model
+        self.goodfit = goodfit
+
+    def predictor(self) -> Callable[[pd.DataFrame], pd.DataFrame]:
+        """vectorised evaluation of the current model over configurations
+
+        The predictor keeps evaluating this model even if another one is
+        loaded meanwhile. It returns the predicted deviation 'sard10g' and its
+        uncertainty 'err' of every row
+        """
+        self.raise_if_no_model()
+        model: Model = self.work.data["model"]
+        xvar = list(model.sample.xvar)
+
+        def predict(data: pd.DataFrame) -> pd.DataFrame:
+            missing = [col for col in xvar if col not in data.columns]
+            if missing:
+                raise Exception(f"Configurations must contain {missing}")
+            try:
+                x = data[xvar].to_numpy(dtype=float)
+            except ValueError:
+                raise Exception(f"Columns {xvar} must be numeric")
+            zval, err = model.predict(x)
+            return pd.DataFrame(
+                {"sard10g": np.ravel(zval), "err": np.ravel(err)}, index=data.index
+            )
+
+        return predict
+
+    @plotting
+    def plot_model(self):
+        self.raise_if_no_model()
+        fig = self.work.plot_model()
         return fig2png(fig)
 
+    @staticmethod
+    def acceptance(data: DataSetInterface) -> Acceptance:
+        if data is None or data.size == 0:
+            return Acceptance()
+        df = data.sample.data
+        for col in ("sard10g", "mpe10g"):
+            if col not in df.columns:
+                raise Exception(f"Dataset must contain '{col}'")
+        margins = df["mpe10g"].to_numpy(dtype=float) - np.abs(
+            df["sard10g"].to_numpy(dtype=float)
+        )
+        # NaN margins compare false, i.e. are not reported as violations
+        rows = np.flatnonzero(margins < 0)
+        return Acceptance(rows, margins[rows])
+
     @staticmethod
     def acceptance_criteria(data: DataSetInterface) -> bool:
-        dataok = True
-        if data is not None and len(data.rows) > 0:
-            mpecol = data.headings.index("mpe10g")
-            sardcol = data.headings.index("sard10g")
-            for row in data.rows:
-                if fabs(row[sardcol]) > row[mpecol]:
-                    dataok = False
-                    break
-        return dataok
+        return ModelInterface.acceptance(data).accept
 
-    @classmethod
-    def goodfit_test(cls) -> Goodfit:
-        if not cls.has_model():
+    def goodfit_test(self) -> Goodfit:
+        if not self.has_model():
             raise Exception("No model loaded")
 
-        initsample = SampleInterface.trainingSet
-        dataok = ModelInterface.acceptance_criteria(initsample)
+        initsample = self.samples.trainingSet
+        acceptance = ModelInterface.acceptance(initsample)
 
-        gfres: tuple = cls.work.goodfit_test()
+        with progress.phase("goodfit_test"):
+            gfres: tuple = self.work.goodfit_test()
 
-        cls.goodfit = Goodfit(dataok, gfres)
-        return cls.goodfit
+        self.goodfit = Goodfit(acceptance.accept, gfres, acceptance)
+        return self.goodfit
 
-    @classmethod
-    def goodfit_plot(cls):
-        if not cls.has_model():
+    @plotting
+    def goodfit_plot(self):
+        if not self.has_model():
             raise Exception("No model loaded")
-        fig = cls.work.goodfit_plot()
+        fig = self.work.goodfit_plot()
         return fig2png(fig)
 
-    @classmethod
-    def compute_residuals(cls) -> bool:
-        cls.raise_if_no_model()
-        cls.residuals = cls.work.compute_resid()
+    def compute_residuals(self) -> bool:
+        self.raise_if_no_model()
+        with progress.phase("compute_residuals"):
+            self.residuals = self.work.compute_resid()
         return True
 
-    @classmethod
-    def residuals_test(cls) -> tuple:
-        cls.raise_if_no_model()
-        if len(cls.residuals) == 0:
+    def residuals_test(self) -> tuple:
+        self.raise_if_no_model()
+        if len(self.residuals) == 0:
             raise Exception("Residuals have not been calculated")
-        swres, qqres = cls.work.resid_test(cls.residuals)
+        swres, qqres = self.work.resid_test(self.residuals)
         return Residuals((swres, qqres))
 
-    @classmethod
-    def plot_residuals(cls):
-        if len(cls.residuals) == 0:
+    @plotting
+    def plot_residuals(self):
+        if len(self.residuals) == 0:
             raise Exception("Residuals have not been calculated")
-        fig = cls.work.resid_plot(cls.residuals)
+        fig = self.work.resid_plot(self.residuals)
         return fig2png(fig)
 
-    @classmethod
-    def explore_space(cls) -> dict:
-        cls.raise_if_no_model()
-        cls.work.explore(show=False, save_to=None)
-        critsample = cls.work.data["critsample"]
+    def explore_space(
+        self, partitions: int = 1, workers: int | None = None, seed: int | None = None
+    ) -> dict:
+        self.raise_if_no_model()
+        with progress.phase("explore_space"):
+            critsample = explore_partitioned(self.work, partitions, workers, seed)
         critsample.data = critsample.data[critsample.data["pass"] >= 0.05]
         critsample.data["pass"] = critsample.data["pass"].apply(lambda x: x * 100.0)
         critsample.data = critsample.data.drop("sard10g", axis=1)
         critsample.data = critsample.data.drop("err", axis=1)
-        SampleInterface.criticalSet = DataSetInterface.from_dataframe(critsample)
-        SampleInterface.criticalSet.add_columns(["sar10g", "u10g"])
-        return SampleInterface.criticalSet.to_dict()
+        return self.restore_explored(critsample)
+
+    def explored(self) -> Sample:
+        """the critical sample found by explore_space, as stored in artifacts"""
+        critsample = self.work.data.get("critsample")
+        if critsample is None:
+            raise Exception("The space has not been explored")
+        return critsample
+
+    def restore_explored(self, critsample: Sample) -> dict:
+        self.work.data["critsample"] = critsample
+        self.samples.criticalSet = DataSetInterface.from_dataframe(critsample)
+        self.samples.criticalSet.add_columns(["sar10g", "u10g"])
+        return self.samples.criticalSet.to_dict()
@@ -0,0 +1,137 @@
+"""Coverage of samples by the domain of a model
+
+The domain of a model is indexed once per model, as the bounds of each of its
+variables: those of the sample it was fitted to, and the measurement area (from
+the metadata of the sample) for x and y. Every row of a sample is then checked
+against all the bounds in one pass over a (rows x variables) array, which tells
+which rows, and which of their parameters, fall outside the domain.
+
+Whether a model covers a sample is told by the model itself (Model.contains):
+the domain is only looked at once it does not, to report why, or to keep the
+rows within it (which the model is then asked about again, see
+ModelInterface.check_coverage).
+"""
+
+import numpy as np
+import pandas as pd
+from iec62209.work import Model
+
+from .ingestion import XVAR
+
+# values written with 6 significant digits (e.g. exported samples) may round
+# slightly past the bounds they were drawn within
+RTOL = 1e-6
+
+MAX_ISSUES = 100
+
+
+class CoverageError(Exception):
+    """a sample the model does not cover"""
+
+    def __init__(self, name: str, coverage: "Coverage"):
+        self.coverage = coverage
+        outside = int((~coverage.covered).sum())
+        rows = (
+            f" ({outside} of {len(coverage.covered)} rows, "
+            f"outside by variable: {coverage.outside_counts()})"
+            if outside
+            else ""
+        )
+        super().__init__(
+            f"The {name} sample extends outside the range of the model{rows}"
+        )
+
+    def to_dict(self) -> dict:
+        return {"error": str(self), "coverage": self.coverage.to_dict()}
+
+
+class Coverage:
+    """the rows of a sample within the domain of a model"""
+
+    def __init__(
+        self,
+        variables: list[str],
+        bounds: np.ndarray,
+        values: np.ndarray,
+        outside: np.ndarray,
+    ):
+        self.variables = variables
+        self.bounds = bounds
+        self.values = values
+        # (rows x variables): value out of bounds, or missing
+        self.outside = outside
+        self.covered: np.ndarray = ~outside.any(axis=1)
+
+    @property
+    def all_covered(self) -> bool:
+        return bool(self.covered.all())
+
+    def issues(self, limit: int = MAX_ISSUES) -> list[dict]:
+        """the rows outside the domain, with their parameters out of bounds"""
+        issues = []
+        for row in np.flatnonzero(~self.covered)[:limit]:
+            parameters = {
+                self.variables[i]: None if np.isnan(v) else float(v)
+                for i, v in zip(
+                    np.flatnonzero(self.outside[row]),
+                    self.values[row][self.outside[row]],
+                )
+            }
+            # the line of the row in a csv file, as in utils.validation
+            issues.append({"line": int(row) + 2, "parameters": parameters})
+        return issues
+
+    def outside_counts(self) -> dict[str, int]:
+        """rows outside, per variable"""
+        outside = self.outside.sum(axis=0)
+        return {var: int(n) for var, n in zip(self.variables, outside) if n > 0}
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": len(self.covered),
+            "covered": int(self.covered.sum()),
+            "bounds": {
+                var: [float(low), float(high)]
+                for var, (low, high) in zip(self.variables, self.bounds)
+            },
+            "outside": self.outside_counts(),
+            "issues": self.issues(),
+        }
+
+
+class ModelDomain:
+    """bounds of the variables of a model"""
+
+    def __init__(self, bounds: dict[str, tuple[float, float]]):
+        self.variables = list(bounds)
+        self.bounds = np.array([bounds[var] for var in self.variables], dtype=float)
+        span = np.maximum(np.abs(self.bounds), 1.0) * RTOL
+        self._low = self.bounds[:, 0] - span[:, 0]
+        self._high = self.bounds[:, 1] + span[:, 1]
+
+    @classmethod
+    def from_model(cls, model: Model) -> "ModelDomain":
+        sample = model.sample
+        variables = [var for var in (sample.xvar or XVAR) if var in sample.data]
+        values = sample.data[variables].to_numpy(dtype=float)
+        bounds = {
+            var: (low, high)
+            for var, low, high in zip(
+                variables, np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+            )
+        }
+        # the measurement area, rather than the positions that were measured
+        mdata = sample.mdata or {}
+        for var, sup in (("x", "xsup"), ("y", "ysup")):
+            if var in bounds and mdata.get(sup):
+                bounds[var] = (-float(mdata[sup]), float(mdata[sup]))
+        return cls(bounds)
+
+    def check(self, data: pd.DataFrame) -> Coverage:
+        missing = [var for var in self.variables if var not in data]
+        if missing:
+            raise Exception(f"The sample has no values of {missing}")
+        values = data[self.variables].to_numpy(dtype=float)
+        # NaN compares False: missing values are outside
+        outside = ~((values >= self._low) & (values <= self._high))
+        return Coverage(self.variables, self.bounds, values, outside)
@@ -0,0 +1,335 @@
+"""Content negotiation for dataset responses
+
+Datasets are sent in the format requested in the Accept header:
+ - application/json (default): {"headings", "rows"}, row-major, as the client expects
+ - application/vnd.iec62209.columns+json: {"headings", "columns"}, column-major
+ - application/msgpack: the column-major payload in MessagePack (needs msgpack)
+ - application/vnd.apache.arrow.stream: an Arrow IPC stream (needs pyarrow)
+ - application/x-ndjson: a {"headings"} line followed by one line per row,
+   streamed in chunks straight from the sample
+
+Responses can be paginated with offset and limit; X-Total-Count holds the size
+of the whole dataset. Payloads larger than COMPRESSION_MIN_BYTES are compressed
+according to Accept-Encoding, with brotli (if installed) or gzip.
+
+Data produced in batches (e.g. generated samples) is streamed batch by batch as
+text/csv (default), ndjson or an Arrow IPC stream (see stream_frames).
+
+Datasets are exported (downloaded) as csv, gzipped csv or Parquet (needs
+pyarrow), streamed in chunks of rows of the sample, with nothing written to disk
+(see export_response).
+"""
+
+import gzip
+import io
+import zlib
+from collections.abc import Iterator
+from enum import Enum
+from json import dumps as jdumps
+
+import pandas as pd
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .common import DataSetInterface, json_columns, json_rows
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+JSON = "application/json"
+COLUMNS_JSON = "application/vnd.iec62209.columns+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+PARQUET = "application/vnd.apache.parquet"
+GZIP = "application/gzip"
+
+# rows per line batch of ndjson streams
+NDJSON_CHUNK_ROWS = 1000
+# rows per chunk of exports
+EXPORT_CHUNK_ROWS = 10_000
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    CSV_GZ = "csv.gz"
+    PARQUET = "parquet"
+
+
+def supported_media_types() -> list[str]:
+    media_types = [JSON, COLUMNS_JSON, NDJSON]
+    if msgpack is not None:
+        media_types.append(MSGPACK)
+    if pa is not None:
+        media_types.append(ARROW)
+    return media_types
+
+
+def _parse_header(value: str) -> list[tuple[str, float]]:
+    """items of an Accept(-Encoding) header, by decreasing preference"""
+    items = []
+    for position, item in enumerate(value.split(",")):
+        name, *params = (part.strip() for part in item.split(";"))
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            items.append((name.lower(), quality, position))
+    items.sort(key=lambda item: (-item[1], item[2]))
+    return [(name, quality) for name, quality, _ in items]
+
+
+def negotiate_media_type(accept: str | None) -> str | None:
+    """best supported media type for an Accept header, None if none is acceptable"""
+    if not accept:
+        return JSON
+    supported = supported_media_types()
+    for name, _ in _parse_header(accept):
+        if name in ("*/*", "application/*"):
+            return JSON
+        if name == "application/x-msgpack":
+            name = MSGPACK
+        if name in supported:
+            return name
+    return None
+
+
+def negotiate_stream_type(accept: str | None) -> str | None:
+    """best media type to stream batches in, None if none is acceptable"""
+    if not accept:
+        return CSV
+    supported = [CSV, NDJSON] + ([ARROW] if pa is not None else [])
+    for name, _ in _parse_header(accept):
+        if name in ("*/*", "text/*"):
+            return CSV
+        if name in supported:
+            return name
+    return None
+
+
+def stream_frames(frames: Iterator[pd.DataFrame], media_type: str) -> Iterator[bytes]:
+    """frames of the same columns, encoded one after the other"""
+    if media_type in (ARROW, PARQUET):
+        yield from _arrow_batches(frames, parquet=media_type == PARQUET)
+        return
+    for index, data in enumerate(frames):
+        if media_type == NDJSON:
+            if index == 0:
+                header = {"headings": list(data.columns)}
+                yield (jdumps(header, separators=(",", ":")) + "\n").encode()
+            yield ndjson_rows(data)
+        else:
+            text = data.to_csv(header=index == 0, float_format="%.6g", index=False)
+            yield text.encode()
+
+
+class _Chunks(io.RawIOBase):
+    """a write-only file handing over what was written since it was last taken"""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, content) -> int:
+        self._chunks.append(bytes(content))
+        self._position += len(content)
+        return len(content)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        content = b"".join(self._chunks)
+        self._chunks = []
+        return content
+
+
+def _arrow_batches(
+    frames: Iterator[pd.DataFrame], parquet: bool = False
+) -> Iterator[bytes]:
+    """an Arrow IPC stream, or a Parquet file with a row group per frame"""
+    sink, writer = _Chunks(), None
+    for data in frames:
+        if writer is None:
+            schema = pa.Schema.from_pandas(data, preserve_index=False)
+            if parquet:
+                writer = pq.ParquetWriter(sink, schema)
+            else:
+                writer = pa.ipc.new_stream(sink, schema)
+        writer.write_table(
+            pa.Table.from_pandas(data, schema=schema, preserve_index=False)
+        )
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+        yield sink.take()
+
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """a gzip file of chunks, compressed as they come"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _arrow_stream(data: pd.DataFrame, metadata: dict | None) -> bytes:
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    if metadata is not None:
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), b"metadata": jdumps(metadata)}
+        )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_dataset(
+    data: pd.DataFrame, media_type: str, metadata: dict | None = None
+) -> bytes:
+    """data (and optional metadata) in the given media type"""
+    if media_type == ARROW:
+        return _arrow_stream(data, metadata)
+
+    if media_type == JSON:
+        payload = {"headings": list(data.columns), "rows": json_rows(data)}
+    else:
+        payload = {"headings": list(data.columns), "columns": json_columns(data)}
+    content = payload if metadata is None else {"metadata": metadata, "data": payload}
+    if media_type == MSGPACK:
+        return msgpack.packb(content)
+    return JSONResponse(content).body
+
+
+def ndjson_lines(
+    dataset: DataSetInterface,
+    offset: int = 0,
+    limit: int | None = None,
+    metadata: dict | None = None,
+) -> Iterator[bytes]:
+    """ndjson stream of a dataset, produced chunk by chunk"""
+    header = {"headings": list(dataset.headings)}
+    if metadata is not None:
+        header["metadata"] = metadata
+    yield (jdumps(header, separators=(",", ":")) + "\n").encode()
+
+    stop = dataset.size if limit is None else min(dataset.size, offset + limit)
+    for start in range(offset, stop, NDJSON_CHUNK_ROWS):
+        yield ndjson_rows(dataset.page(start, min(NDJSON_CHUNK_ROWS, stop - start)))
+
+
+def ndjson_rows(data: pd.DataFrame) -> bytes:
+    """one json line per row"""
+    lines = (jdumps(row, separators=(",", ":")) + "\n" for row in json_rows(data))
+    return "".join(lines).encode()
+
+
+def compress(request: Request, body: bytes) -> tuple[bytes, str | None]:
+    """compresses body if large enough and accepted by the client"""
+    min_bytes = request.app.state.settings.COMPRESSION_MIN_BYTES
+    if len(body) < min_bytes:
+        return body, None
+    for name, _ in _parse_header(request.headers.get("accept-encoding", "")):
+        if name == "br" and brotli is not None:
+            return brotli.compress(body), "br"
+        if name == "gzip":
+            return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
+
+
+def dataset_response(
+    request: Request,
+    dataset: DataSetInterface,
+    metadata: dict | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> Response:
+    media_type = negotiate_media_type(request.headers.get("accept"))
+    if media_type is None:
+        return JSONResponse(
+            {"error": f"Supported media types are {supported_media_types()}"},
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        )
+
+    headers = {"Vary": "Accept, Accept-Encoding", "X-Total-Count": str(dataset.size)}
+    if media_type == NDJSON:
+        return StreamingResponse(
+            ndjson_lines(dataset, offset, limit, metadata),
+            media_type=media_type,
+            headers=headers,
+        )
+
+    body, encoding = compress(
+        request, encode_dataset(dataset.page(offset, limit), media_type, metadata)
+    )
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
+
+
+def _dataset_frames(data: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if data.empty:
+        yield data
+    for start in range(0, len(data), chunk_rows):
+        yield data.iloc[start : start + chunk_rows]
+
+
+def export_response(
+    dataset: DataSetInterface,
+    name: str,
+    export_format: ExportFormat = ExportFormat.CSV,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> Response:
+    """the dataset as a file to download, streamed chunk by chunk"""
+    if dataset.sample is None:
+        return JSONResponse(
+            {"error": "No data to export"}, status_code=status.HTTP_404_NOT_FOUND
+        )
+    if export_format == ExportFormat.PARQUET and pq is None:
+        return JSONResponse(
+            {"error": "Parquet exports need pyarrow"},
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        )
+
+    # the frame as it is now, even if the dataset changes while streaming
+    frames = _dataset_frames(dataset.page(), chunk_rows)
+    if export_format == ExportFormat.PARQUET:
+        media_type, chunks = PARQUET, stream_frames(frames, PARQUET)
+    elif export_format == ExportFormat.CSV_GZ:
+        media_type, chunks = GZIP, gzip_chunks(stream_frames(frames, CSV))
+    else:
+        media_type, chunks = CSV, stream_frames(frames, CSV)
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'
+        },
+    )
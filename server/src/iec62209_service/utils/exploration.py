@@ -0,0 +1,126 @@
+"""Partitioned search of the critical space
+
+Work.explore searches the space from random starting points. The search is
+seeded: a single exploration (the default) runs in place, with the global
+random generators the iec62209 package draws from seeded for it and restored
+afterwards (see randomstate). With several partitions, each one is an
+exploration seeded from the seed of the search, which run in a pool of spawned
+processes. Their critical samples are merged: configurations found by several
+partitions (at the resolution of DEDUPLICATION) are kept once, with their
+highest probability of passing. For a given seed and number of partitions, the
+result does not depend on the number of workers.
+
+When Work.explore takes a number of iterations (see BUDGET_PARAMETERS), it is
+shared between the partitions, so that a partitioned search costs about one
+exploration spread over the workers. Otherwise each partition is a whole
+exploration: n partitions cost n explorations.
+"""
+
+import inspect
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import ceil
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+from iec62209.work import Sample, Work
+
+from . import progress
+from .ingestion import XVAR
+from .randomstate import seeded
+
+# names under which Work.explore may take its number of iterations
+BUDGET_PARAMETERS = ("niter", "n_iter", "iters", "iterations")
+
+# configurations closer than this, for every variable, are the same one: finer
+# than what a measurement tells apart
+DEDUPLICATION = {
+    "frequency": 1.0,  # MHz
+    "power": 0.1,  # dBm
+    "par": 0.1,  # dB
+    "bandwidth": 0.1,  # MHz
+    "distance": 0.1,  # mm
+    "angle": 1.0,  # degrees
+    "x": 0.1,  # mm
+    "y": 0.1,  # mm
+}
+
+
+def partition_seeds(seed: int, partitions: int) -> list[int]:
+    return [int(s) for s in np.random.SeedSequence(seed).generate_state(partitions)]
+
+
+def _explore(work: Work, budget: dict | None = None) -> Sample:
+    work.explore(show=False, save_to=None, **(budget or {}))
+    return work.data["critsample"]
+
+
+def _explore_seeded(work: Work, seed: int, budget: dict) -> Sample:
+    # NOTE: only in the processes of the pool, which own their random state
+    random.seed(seed)
+    np.random.seed(seed)
+    return _explore(work, budget)
+
+
+def partition_budget(work: Work, partitions: int) -> dict:
+    """keyword arguments of Work.explore sharing its iterations between partitions"""
+    parameters = inspect.signature(work.explore).parameters
+    for name in BUDGET_PARAMETERS:
+        default = parameters[name].default if name in parameters else None
+        if isinstance(default, int) and not isinstance(default, bool):
+            return {name: max(1, ceil(default / partitions))}
+    return {}
+
+
+def merge_critical_samples(samples: list[Sample]) -> Sample:
+    merged = samples[0]
+    data = pd.concat([sample.data for sample in samples], ignore_index=True)
+    data = data.sort_values("pass", ascending=False, kind="stable")
+    variables = [var for var in XVAR if var in data]
+    resolution = np.array([DEDUPLICATION.get(var, 0.0) for var in variables])
+    cells = data[variables].to_numpy(dtype=float)
+    # the cell of each configuration on the grid of the resolution
+    cells = np.where(
+        resolution > 0,
+        np.round(cells / np.where(resolution > 0, resolution, 1.0)),
+        cells,
+    )
+    duplicated = pd.DataFrame(cells).duplicated(keep="first").to_numpy()
+    merged.data = data[~duplicated].reset_index(drop=True)
+    return merged
+
+
+def explore_partitioned(
+    work: Work,
+    partitions: int = 1,
+    workers: int | None = None,
+    seed: int | None = None,
+) -> Sample:
+    """explores the space of the model in work, sets and returns the critical sample
+
+    Without a seed, the search is seeded with 0.
+    """
+    seeds = partition_seeds(seed or 0, partitions)
+    if partitions == 1:
+        with seeded(seeds[0]):
+            return _explore(work)
+
+    budget = partition_budget(work, partitions)
+    workers = min(partitions, workers or os.cpu_count() or 1)
+    samples: list[Sample | None] = [None] * partitions
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn")
+    ) as pool:
+        futures = {
+            pool.submit(_explore_seeded, work, s, budget): i
+            for i, s in enumerate(seeds)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            # merged in the order of the seeds, whatever the order of completion
+            samples[futures[future]] = future.result()
+            progress.update(100.0 * done / partitions, partitions=partitions)
+
+    work.data["critsample"] = merge_critical_samples(samples)
+    return work.data["critsample"]
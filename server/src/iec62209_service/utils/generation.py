@@ -0,0 +1,105 @@
+"""Seeded generation of training and test samples
+
+Work.generate_sample draws a whole sample at once, from the global random state.
+Here a sample is drawn in batches of at most batch_rows configurations, each
+seeded from the seed of the sample, so that
+ - very large candidate sets are produced, and streamed, batch by batch
+ - for a given seed, size and batch size, the sample is always the same
+ - several samples (e.g. training and test) are drawn with one Work, their seeds
+   derived from one seed and their names: the training sample of a seed is the
+   same whether it is generated alone or with the test sample
+
+Every batch is a sample of its own, spread over the whole space. A batch is
+drawn seeded, under the lock of the global random state (see randomstate), so
+concurrent generations, e.g. two streamed downloads, draw the same samples as
+they would alone; the state is restored after each batch.
+"""
+
+import secrets
+import zlib
+from collections.abc import Iterator
+from math import ceil
+
+import numpy as np
+import pandas as pd
+from iec62209.work import Sample, Work
+
+from . import metrics, progress
+from .exploration import partition_seeds
+from .randomstate import seeded
+
+# measured values, filled in by the user
+MEASURED_COLUMNS = ["sar10g", "u10g"]
+
+BATCH_ROWS = 100_000
+
+
+def new_seed() -> int:
+    """a random seed, reported so that the sample can be generated again"""
+    return secrets.randbits(32)
+
+
+def sample_seed(seed: int, name: str) -> int:
+    """seed of the sample of a name, derived from the seed of the generation"""
+    sequence = np.random.SeedSequence([seed, zlib.crc32(name.encode())])
+    return int(sequence.generate_state(1)[0])
+
+
+def iter_batches(
+    work: Work,
+    size: int,
+    xmax: float,
+    ymax: float,
+    seed: int,
+    batch_rows: int,
+) -> Iterator[Sample]:
+    """the sample of size configurations, batch by batch"""
+    batches = max(1, ceil(size / batch_rows))
+    for index, batch_seed in enumerate(partition_seeds(seed, batches)):
+        with seeded(batch_seed), metrics.timed("generate_batch"):
+            work.generate_sample(
+                size=min(batch_rows, size - index * batch_rows),
+                xmax=xmax,
+                ymax=ymax,
+                show=False,
+                save_to=None,
+            )
+        sample = work.data.pop("sample")
+        if not isinstance(getattr(sample, "data", None), pd.DataFrame):
+            raise Exception("Invalid sample generated")
+        progress.update(100 * (index + 1) / batches, batch=index + 1, batches=batches)
+        yield sample
+
+
+def generate_sample(
+    work: Work, size: int, xmax: float, ymax: float, seed: int, batch_rows: int
+) -> Sample:
+    """the whole sample, its batches concatenated"""
+    with progress.phase("generate_sample"):
+        samples = list(iter_batches(work, size, xmax, ymax, seed, batch_rows))
+    sample = samples[0]
+    if len(samples) > 1:
+        sample.data = pd.concat([s.data for s in samples], ignore_index=True)
+    return sample
+
+
+def iter_frames(
+    sizes: dict[str, tuple[int, float, float]], seed: int, batch_rows: int
+) -> Iterator[pd.DataFrame]:
+    """the samples of names to (size, xmax, ymax), batch by batch, with one Work
+
+    With several samples, a first column "sample" holds the name of the sample
+    of each configuration.
+    """
+    # NOTE: no phase here, the batches of a stream are drawn in different contexts
+    work = Work()
+    for name, (size, xmax, ymax) in sizes.items():
+        for sample in iter_batches(
+            work, size, xmax, ymax, sample_seed(seed, name), batch_rows
+        ):
+            data = sample.data
+            for column in MEASURED_COLUMNS:
+                data[column] = 0
+            if len(sizes) > 1:
+                data.insert(0, "sample", name)
+            yield data
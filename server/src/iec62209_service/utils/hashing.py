@@ -0,0 +1,25 @@
+from hashlib import blake2b
+
+import numpy as np
+import pandas as pd
+
+
+def fingerprint(*parts) -> str:
+    """content hash of data frames, arrays, strings and bytes"""
+    h = blake2b(digest_size=16)
+    for part in parts:
+        if part is None:
+            h.update(b"\0")
+        elif isinstance(part, pd.DataFrame):
+            h.update(",".join(map(str, part.columns)).encode())
+            h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            h.update(str(part.dtype).encode())
+            h.update(np.ascontiguousarray(part).tobytes())
+        elif isinstance(part, bytes):
+            h.update(part)
+        else:
+            h.update(str(part).encode())
+        # separator, so that ("ab", "c") and ("a", "bc") differ
+        h.update(b"\x1f")
+    return h.hexdigest()
@@ -0,0 +1,36 @@
+import io
+from typing import BinaryIO
+
+from iec62209.work import Sample, add_zvar, load_measured_sample
+
+from .validation import read_measured_csv
+
+# these are the variables the iec62209 package models
+XVAR = ["frequency", "power", "par", "bandwidth", "distance", "angle", "x", "y"]
+ZVAR = ["sard10g"]
+
+
+def read_measured_sample(source: str | BinaryIO) -> Sample:
+    """parses a measured csv (path or uploaded stream) into a Sample
+
+    The resulting sample carries the normalized deviation 'sard10g' as
+    response variable and is ready to be used by Work, with no temporary
+    files in between. The csv is validated first, and rejected with a
+    ValidationError (see utils.validation); the validated data is then
+    loaded by the iec62209 package from memory.
+    """
+    buffer = io.StringIO()
+    read_measured_csv(source).to_csv(buffer, index=False)
+    buffer.seek(0)
+    try:
+        measured = load_measured_sample(buffer)
+        add_zvar(measured, "10g")
+    except TypeError:
+        raise Exception(
+            "Please make sure that numbers are not formatted (e.g. to percentages)"
+        )
+
+    if measured.data.empty:
+        raise Exception("Empty data set")
+
+    return Sample(measured.data, xvar=XVAR, zvar=ZVAR)
@@ -0,0 +1,214 @@
+"""In-process metrics, exposed in the Prometheus text format
+
+Counters and histograms live in a registry of the process. Phases of the
+pipeline (see also utils.progress) are timed with
+
+    with metrics.timed("fig2png"):
+        ...
+
+Their durations are observed in a histogram and, while serving a request,
+collected for its Server-Timing header. Job workers forward their timings to
+the server process instead (see set_forward).
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(float(4**i) for i in range(4, 14))  # 256 B to 64 MB
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Labels = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self._values: dict[Labels, float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labelnames: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.doc = doc
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> (counts per bucket and +Inf, sum)
+        self._values: dict[Labels, tuple[list[int], float]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            counts, total = self._values.get(labels) or (
+                [0] * (len(self.buckets) + 1),
+                0.0,
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[labels] = (counts, total + value)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = [(labels, list(c), s) for labels, (c, s) in self._values.items()]
+        for labels, counts, total in values:
+            cumulated = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulated += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                tag = _labels(self.labelnames, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{tag} {cumulated}"
+            tag = _labels(self.labelnames, labels)
+            yield f"{self.name}_sum{tag} {_number(total)}"
+            yield f"{self.name}_count{tag} {cumulated}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def register(self, metric: Counter | Histogram) -> Counter | Histogram:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.doc}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "iec62209_request_duration_seconds",
+        "Latency of the HTTP requests, per router",
+        ("router", "method", "status"),
+    )
+)
+REQUEST_BYTES = REGISTRY.register(
+    Histogram(
+        "iec62209_request_size_bytes",
+        "Size of the HTTP request bodies, per router",
+        ("router",),
+        SIZE_BUCKETS,
+    )
+)
+RESPONSE_BYTES = REGISTRY.register(
+    Histogram(
+        "iec62209_response_size_bytes",
+        "Size of the HTTP response bodies of known length, per router",
+        ("router",),
+        SIZE_BUCKETS,
+    )
+)
+PHASE_SECONDS = REGISTRY.register(
+    Histogram(
+        "iec62209_phase_duration_seconds",
+        "Duration of the internal phases of the pipeline",
+        ("phase",),
+    )
+)
+PHASE_ERRORS = REGISTRY.register(
+    Counter(
+        "iec62209_phase_errors_total",
+        "Phases of the pipeline that failed",
+        ("phase",),
+    )
+)
+
+_forward: Callable[[str, float, bool], None] | None = None
+_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "server_timings", default=None
+)
+
+
+def set_forward(forward: Callable[[str, float, bool], None] | None) -> None:
+    """phases observed in this process are handed to forward (job workers)"""
+    global _forward
+    _forward = forward
+
+
+def observe_phase(name: str, seconds: float, failed: bool = False) -> None:
+    if _forward is not None:
+        _forward(name, seconds, failed)
+        return
+    PHASE_SECONDS.observe(seconds, name)
+    if failed:
+        PHASE_ERRORS.inc(name)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    start = perf_counter()
+    try:
+        yield
+    except Exception:
+        observe_phase(name, perf_counter() - start, failed=True)
+        raise
+    observe_phase(name, perf_counter() - start)
+
+
+@contextmanager
+def collect_timings() -> Iterator[list[tuple[str, float]]]:
+    """phases timed in this context, e.g. while serving a request"""
+    timings: list[tuple[str, float]] = []
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def server_timing(timings: list[tuple[str, float]], total: float) -> str:
+    """Server-Timing header value, with the phases of the same name summed up"""
+    durations: dict[str, float] = {}
+    for name, seconds in timings:
+        durations[name] = durations.get(name, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(f"{name};dur={s * 1000:.1f}" for name, s in durations.items())
@@ -0,0 +1,109 @@
+"""Binary model container
+
+Alternative to the JSON model files, as a numpy .npz archive:
+ - "header": utf-8 JSON with everything but the large arrays, i.e. the model
+   json where the sample data is replaced by its column names and "vgx"/"vgz"
+   are left out, plus the format name and version
+ - "sample/<column>": each column of the embedded sample, with its own dtype.
+   Text columns are dictionary encoded: integer codes into the distinct values
+   stored in "categories/<column>"
+ - "vgx", "vgz": the variogram arrays
+
+Columns are decoded straight into arrays instead of parsing lists of numbers.
+"""
+
+import io
+from json import dumps as jdumps
+from json import loads as jloads
+from typing import BinaryIO
+
+import numpy as np
+
+FORMAT_NAME = "iec62209-model"
+FORMAT_VERSION = 1
+
+MEDIA_TYPE = "application/vnd.iec62209.model+npz"
+
+_ARRAYS = ("vgx", "vgz")
+
+
+def is_npz(head: bytes) -> bool:
+    """whether the first bytes of a file are those of an npz (zip) archive"""
+    return head.startswith(b"PK\x03\x04")
+
+
+def _column(values) -> np.ndarray:
+    column = np.asarray(values)
+    if column.dtype.kind == "O":
+        # e.g. numbers with missing values (None)
+        try:
+            column = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            column = column.astype(str)
+    return column
+
+
+def _encode_column(name: str, values) -> dict[str, np.ndarray]:
+    column = _column(values)
+    if column.dtype.kind != "U":
+        return {f"sample/{name}": column}
+    categories, codes = np.unique(column, return_inverse=True)
+    dtype = np.min_scalar_type(max(len(categories) - 1, 0))
+    return {
+        f"sample/{name}": codes.astype(dtype),
+        f"categories/{name}": categories,
+    }
+
+
+def _decode_column(npz, name: str) -> np.ndarray:
+    column = npz[f"sample/{name}"]
+    if f"categories/{name}" in npz.files:
+        return npz[f"categories/{name}"][column]
+    return column
+
+
+def dump_model_npz(content: dict) -> bytes:
+    """model json (as returned by Model.to_json) into an npz archive"""
+    header = {k: v for k, v in content.items() if k not in _ARRAYS}
+    sample = dict(content["sample"])
+    data: dict = sample.pop("data")
+    sample["columns"] = list(data)
+    header["sample"] = sample
+    header["format"] = {"name": FORMAT_NAME, "version": FORMAT_VERSION}
+
+    arrays = {
+        "header": np.frombuffer(jdumps(header).encode(), dtype=np.uint8),
+        **{name: np.asarray(content[name]) for name in _ARRAYS if name in content},
+    }
+    for name, values in data.items():
+        arrays.update(_encode_column(name, values))
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+def _read_header(npz) -> dict:
+    header = jloads(npz["header"].tobytes().decode())
+    fmt = header.pop("format", {})
+    if fmt.get("name") != FORMAT_NAME:
+        raise Exception("Not an IEC62209 model file")
+    if fmt.get("version", 0) > FORMAT_VERSION:
+        raise Exception(
+            f"Model file version {fmt.get('version')} is not supported, "
+            "please update the application"
+        )
+    return header
+
+
+def load_model_npz(source: str | BinaryIO) -> dict:
+    """model json (as expected by Model.from_json) with columns as arrays"""
+    with np.load(source, allow_pickle=False) as npz:
+        content = _read_header(npz)
+        sample = content["sample"]
+        sample["data"] = {
+            name: _decode_column(npz, name) for name in sample.pop("columns")
+        }
+        for name in _ARRAYS:
+            if name in npz.files:
+                content[name] = npz[name]
+    return content
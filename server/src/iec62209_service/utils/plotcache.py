@@ -0,0 +1,92 @@
+"""In-process cache of rendered plots
+
+Plots are keyed by their kind and a fingerprint of the content they depict
+(sample, model or residuals), so the same key always maps to the same png.
+The key doubles as strong ETag, so browsers revalidating a plot get a 304
+without any rendering. Sessions with the same content share its plots: entries
+are only evicted by the size of the cache, least recently used first.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable
+from io import BytesIO
+from threading import Lock
+
+from fastapi import Request, Response, status
+
+from .hashing import fingerprint
+
+
+class PlotCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._pngs: OrderedDict[str, bytes] = OrderedDict()
+        self._size: int = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._pngs)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            png = self._pngs.get(key)
+            if png is not None:
+                self._pngs.move_to_end(key)
+            return png
+
+    def put(self, key: str, png: bytes) -> None:
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._pngs[key] = png
+            self._size += len(png)
+            while self._size > self.max_bytes:
+                self._discard(next(iter(self._pngs)))
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pngs.clear()
+            self._size = 0
+
+    def _discard(self, key: str) -> None:
+        png = self._pngs.pop(key, None)
+        if png is not None:
+            self._size -= len(png)
+
+
+def plot_key(kind: str, content: str) -> str:
+    return fingerprint(kind, content)
+
+
+def png_response(
+    request: Request,
+    plots: PlotCache,
+    kind: str,
+    content: str,
+    render: Callable[[], BytesIO],
+) -> Response:
+    """serves a plot from the cache, rendering it only on a miss
+
+    Plots are revalidated by their ETag: the timestamp older clients append to
+    plot urls is not needed, and ignored like any other unknown query parameter
+    """
+    key = plot_key(kind, content)
+
+    headers = {"ETag": f'"{key}"', "Cache-Control": "no-cache"}
+    if f'"{key}"' in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    png = plots.get(key)
+    if png is None:
+        png = render().getvalue()
+        plots.put(key, png)
+    return Response(png, media_type="image/png", headers=headers)
@@ -0,0 +1,74 @@
+"""Batch evaluation of a model over a table of configurations
+
+Configurations are read in chunks (csv, or Arrow when pyarrow is installed),
+every chunk is evaluated at once and the rows, extended with the predicted
+deviation 'sard10g' and its uncertainty 'err', are streamed back in the
+media type negotiated like other streams (csv, ndjson or Arrow). Neither the table nor the predictions are held entirely in memory.
+"""
+
+from collections.abc import Callable, Iterator
+from itertools import chain
+from typing import BinaryIO
+
+import pandas as pd
+
+from . import encoding
+from .encoding import ARROW
+
+CSV = "text/csv"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+
+Predictor = Callable[[pd.DataFrame], pd.DataFrame]
+
+
+def configurations_media_type(filename: str | None, content_type: str | None) -> str:
+    """format of an uploaded table of configurations, csv unless told otherwise"""
+    if content_type in (ARROW, ARROW_FILE):
+        return content_type
+    suffix = (filename or "").rsplit(".", 1)[-1].lower()
+    if suffix in ("arrow", "feather"):
+        return ARROW_FILE
+    if suffix == "arrows":
+        return ARROW
+    return CSV
+
+
+def read_configurations(
+    source: BinaryIO, media_type: str, chunk_rows: int
+) -> Iterator[pd.DataFrame]:
+    if media_type in (ARROW, ARROW_FILE):
+        pa = encoding.pa
+        if pa is None:
+            raise Exception("Arrow tables need pyarrow to be installed")
+        if media_type == ARROW_FILE:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = pa.ipc.open_stream(source)
+        # batches are evaluated as they come, whatever their size
+        return (batch.to_pandas() for batch in batches)
+    return pd.read_csv(source, chunksize=chunk_rows)
+
+
+def _with_predictions(predict: Predictor, chunk: pd.DataFrame) -> pd.DataFrame:
+    predicted = predict(chunk)
+    # e.g. a table exported with its predictions: those are replaced
+    chunk = chunk.drop(columns=predicted.columns, errors="ignore")
+    return pd.concat([chunk, predicted], axis=1)
+
+
+def predict_chunks(
+    predict: Predictor, chunks: Iterator[pd.DataFrame]
+) -> Iterator[pd.DataFrame]:
+    """configurations with their predictions, chunk by chunk
+
+    The first chunk is evaluated eagerly, so that invalid tables fail before
+    anything is streamed back
+    """
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None or first.empty:
+        raise Exception("Empty data set")
+    head = _with_predictions(predict, first)
+    rest = (_with_predictions(predict, chunk) for chunk in chunks)
+    return chain([head], rest)
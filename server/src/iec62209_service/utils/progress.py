@@ -0,0 +1,131 @@
+"""Progress of long-running operations
+
+Operations report their phases with
+
+    with progress.phase("make_model"):
+        ...
+        progress.update(50)
+
+which emits 'start', 'progress' and 'end' (or 'error') events with the
+elapsed time, and times the phase (see utils.metrics). Events go to the channel
+bound to the current context (the session of the request, or of the job) and are
+handed to the sink of the process: the ProgressHub of the server, or a queue
+towards it in job workers. Without a sink or a channel, reporting does nothing.
+
+Request handlers run their phases in the threadpool (run_in_threadpool), which
+copies the context, channel included: a phase run on the event loop would keep
+the server-sent events of its progress from being streamed until it is over.
+"""
+
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from itertools import count
+from threading import Lock
+from time import monotonic, time
+
+from . import metrics
+
+Sink = Callable[[str, dict], None]
+
+_sink: Sink | None = None
+_channel: ContextVar[str | None] = ContextVar("progress_channel", default=None)
+_phase: ContextVar[tuple[str, float] | None] = ContextVar(
+    "progress_phase", default=None
+)
+
+
+def set_sink(sink: Sink | None) -> None:
+    global _sink
+    _sink = sink
+
+
+def bind(channel: str | None) -> Token:
+    """reports in this context go to channel"""
+    return _channel.set(channel)
+
+
+def unbind(token: Token) -> None:
+    _channel.reset(token)
+
+
+def _emit(name: str, status: str, started: float, **info) -> None:
+    channel = _channel.get()
+    if _sink is None or channel is None:
+        return
+    event = {
+        "phase": name,
+        "status": status,
+        "elapsed": round(monotonic() - started, 3),
+        "time": time(),
+        **info,
+    }
+    try:
+        _sink(channel, event)
+    except Exception:  # pylint: disable=broad-except
+        # progress is informative: never fail an operation because of it
+        pass
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    started = monotonic()
+    token = _phase.set((name, started))
+    _emit(name, "start", started, percent=0)
+    try:
+        yield
+    except Exception as e:
+        metrics.observe_phase(name, monotonic() - started, failed=True)
+        _emit(name, "error", started, error=str(e))
+        raise
+    else:
+        metrics.observe_phase(name, monotonic() - started)
+        _emit(name, "end", started, percent=100)
+    finally:
+        _phase.reset(token)
+
+
+def update(percent: float | None = None, **info) -> None:
+    """reports progress of the innermost phase"""
+    current = _phase.get()
+    if current is not None:
+        name, started = current
+        percent = None if percent is None else round(percent, 1)
+        _emit(name, "progress", started, percent=percent, **info)
+
+
+class ProgressHub:
+    """recent events per channel, numbered for clients to resume from
+
+    Only the channels with the most recent activity are kept
+    """
+
+    def __init__(self, history: int = 256, max_channels: int = 1024):
+        self.history = history
+        self.max_channels = max_channels
+        self._events: OrderedDict[str, deque] = OrderedDict()
+        self._ids = count(1)
+        self._lock = Lock()
+
+    def publish(self, channel: str, event: dict) -> None:
+        with self._lock:
+            events = self._events.setdefault(channel, deque(maxlen=self.history))
+            events.append({"id": next(self._ids), **event})
+            self._events.move_to_end(channel)
+            while len(self._events) > self.max_channels:
+                self._events.popitem(last=False)
+
+    def last_id(self, channel: str) -> int:
+        with self._lock:
+            events = self._events.get(channel)
+            return events[-1]["id"] if events else 0
+
+    def since(self, channel: str, last_id: int) -> list[dict]:
+        with self._lock:
+            events = self._events.get(channel, ())
+            return [event for event in events if event["id"] > last_id]
+
+    def forget(self, channel: str) -> None:
+        with self._lock:
+            self._events.pop(channel, None)
@@ -0,0 +1,34 @@
+"""The random state of the process
+
+The iec62209 package draws from the global generators of random and
+numpy.random. Requests served by different threads (e.g. streamed downloads in
+the threadpool) share them: seeding them and drawing is done under this lock,
+so that the draws of a seeded sample are not interleaved with others.
+"""
+
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from threading import RLock
+
+import numpy as np
+
+GLOBAL_RANDOM = RLock()
+
+
+@contextmanager
+def seeded(seed: int) -> Iterator[None]:
+    """draws of the block from the global generators seeded with seed
+
+    Their state is restored afterwards: the draws of the rest of the process
+    are not made predictable by a seeded operation.
+    """
+    with GLOBAL_RANDOM:
+        state = random.getstate(), np.random.get_state()
+        random.seed(seed)
+        np.random.seed(seed)
+        try:
+            yield
+        finally:
+            random.setstate(state[0])
+            np.random.set_state(state[1])
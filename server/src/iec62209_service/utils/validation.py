@@ -0,0 +1,169 @@
+"""Validation of uploaded measured samples
+
+A measured csv is checked before the iec62209 package gets its sample, so that a
+bad upload is rejected in milliseconds, before any model work, with a report of
+where it is bad instead of a generic parse error. The csv is read by pandas,
+and the validated frame is what the loader of the iec62209 package gets. Every
+column is checked in one vectorised pass:
+ - the required headings are present; columns without a heading, e.g. the
+   index written by pandas ("Unnamed: 0"), are dropped
+ - measured variables are numbers: cells formatted as percentages ("12%") or
+   with commas ("1,5" or "1,234") are told apart from other text
+ - no value is missing (or infinite)
+ - values are within the range of their variable (e.g. frequency in MHz)
+
+Issues are reported with the line of the file (the headings are line 1), the
+column and the value. Only the first MAX_ISSUES are listed, all are counted.
+"""
+
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+
+from . import metrics
+
+REQUIRED = [
+    "antenna",
+    "frequency",
+    "power",
+    "modulation",
+    "par",
+    "bandwidth",
+    "distance",
+    "angle",
+    "x",
+    "y",
+    "sar10g",
+    "u10g",
+]
+NUMERIC = [c for c in REQUIRED if c not in ("antenna", "modulation")]
+
+# inclusive bounds of the values of a variable, None if unbounded
+RANGES: dict[str, tuple[float | None, float | None]] = {
+    "frequency": (4.0, 10_000.0),  # MHz
+    "x": (-500.0, 500.0),  # mm
+    "y": (-500.0, 500.0),  # mm
+    "distance": (0.0, None),
+    "par": (0.0, None),
+    "bandwidth": (0.0, None),
+    "u10g": (0.0, None),
+}
+# the deviation is relative to a logarithm of the measured sar
+POSITIVE = ["sar10g"]
+
+MAX_ISSUES = 100
+
+# the name pandas gives a column without a heading
+_UNNAMED = r"Unnamed: \d+"
+
+_COMMA_NUMBER = r"[-+]?(\d{1,3}(,\d{3})+(\.\d*)?|\d*,\d+)"
+
+
+class ValidationError(Exception):
+    """an upload that is not a valid measured sample"""
+
+    def __init__(self, issues: list[dict], count: int):
+        self.issues = issues[:MAX_ISSUES]
+        self.count = count
+        first = issues[0]
+        where = f"line {first['line']}, " if first.get("line") else ""
+        column = f"column '{first['column']}': " if first.get("column") else ""
+        more = f" (and {count - 1} more issues)" if count > 1 else ""
+        super().__init__(f"Invalid data: {where}{column}{first['message']}{more}")
+
+    def to_dict(self) -> dict:
+        return {"error": str(self), "count": self.count, "issues": self.issues}
+
+
+def _issues(column: str, data: pd.Series, mask: pd.Series, message: str) -> list:
+    """one issue per flagged row, up to MAX_ISSUES"""
+    rows = np.flatnonzero(mask.to_numpy())[:MAX_ISSUES]
+    values = data.to_numpy()[rows]
+    return [
+        {
+            "line": int(row) + 2,
+            "column": column,
+            "value": None if pd.isna(value) else str(value),
+            "message": message,
+        }
+        for row, value in zip(rows, values)
+    ]
+
+
+def _check_numeric(column: str, data: pd.Series) -> tuple[list, int]:
+    """the issues of a numeric column, and their count"""
+    checks = []
+    numbers = pd.to_numeric(data, errors="coerce")
+    if not pd.api.types.is_numeric_dtype(data):
+        invalid = numbers.isna() & data.notna()
+        # only the invalid cells are looked at as text
+        text = data[invalid].astype(str).str.strip()
+        percent = text.str.endswith("%").reindex(data.index, fill_value=False)
+        comma = text.str.fullmatch(_COMMA_NUMBER).reindex(data.index, fill_value=False)
+        comma &= ~percent
+        checks += [
+            (percent, "percentage: numbers must not be formatted"),
+            (comma, "comma in number: use a dot as decimal separator, no separators"),
+            (invalid & ~percent & ~comma, "not a number"),
+        ]
+    checks.append((data.isna(), "missing value"))
+    checks.append((np.isinf(numbers), "infinite value"))
+
+    low, high = RANGES.get(column, (None, None))
+    if low is not None:
+        checks.append((numbers < low, f"below the minimum of {low:g}"))
+    if high is not None:
+        checks.append((numbers > high, f"above the maximum of {high:g}"))
+    if column in POSITIVE:
+        checks.append((numbers <= 0, "must be positive"))
+
+    issues, count = [], 0
+    for mask, message in checks:
+        flagged = int(mask.sum())
+        if flagged:
+            count += flagged
+            issues += _issues(column, data, mask, message)
+    return issues, count
+
+
+def validate_measured_data(data: pd.DataFrame) -> None:
+    """raises a ValidationError listing the issues of a measured sample"""
+    missing = [c for c in REQUIRED if c not in data.columns]
+    if missing:
+        raise ValidationError(
+            [{"message": f"missing headings {missing}, found {list(data.columns)}"}],
+            1,
+        )
+    if data.empty:
+        raise ValidationError([{"message": "no data"}], 1)
+
+    issues, count = [], 0
+    for column in ("antenna", "modulation"):
+        mask = data[column].isna()
+        if mask.any():
+            count += int(mask.sum())
+            issues += _issues(column, data[column], mask, "missing value")
+    for column in NUMERIC:
+        column_issues, column_count = _check_numeric(column, data[column])
+        issues += column_issues
+        count += column_count
+    if count:
+        # by line, then in the order of the columns
+        order = {c: i for i, c in enumerate(REQUIRED)}
+        issues.sort(key=lambda i: (i["line"], order[i["column"]]))
+        raise ValidationError(issues, count)
+
+
+def read_measured_csv(source: str | BinaryIO) -> pd.DataFrame:
+    """parses and validates a measured csv (path or stream), the frame of the sample"""
+    with metrics.timed("validate_csv"):
+        try:
+            data = pd.read_csv(source, skipinitialspace=True, low_memory=False)
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
+            raise ValidationError([{"message": f"not a valid csv file: {e}"}], 1)
+        except pd.errors.EmptyDataError:
+            raise ValidationError([{"message": "empty file"}], 1)
+        data = data.loc[:, ~data.columns.str.fullmatch(_UNNAMED)]
+        validate_measured_data(data)
+    return data
@@ -0,0 +1,144 @@
+"""Per-session workspaces
+
+Every browser session owns a Workspace with its own Work, datasets, residuals
+and goodfit results. Workspaces are kept in a registry that evicts idle sessions
+after a TTL and the least recently used ones when the memory cap is exceeded.
+With several workers, they are kept in a shared store instead (see sharedstate).
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+
+from .settings import ApplicationSettings
+from .utils import progress
+from .utils.common import ModelInterface, SampleInterface
+
+SESSION_COOKIE_NAME = "iec62209_session"
+
+
+class Workspace:
+    def __init__(self, session_id: str):
+        self.session_id: str = session_id
+        self.samples = SampleInterface()
+        self.model = ModelInterface(self.samples)
+        self.last_access: float = monotonic()
+
+    def touch(self) -> None:
+        self.last_access = monotonic()
+
+    def memory_usage(self) -> int:
+        """approximate size in bytes of the data frames held by this workspace"""
+        frames = {}
+        samples = [
+            self.samples.trainingSet.sample,
+            self.samples.testSet.sample,
+            self.samples.criticalSet.sample,
+        ]
+        for item in self.model.work.data.values():
+            samples.append(getattr(item, "sample", item))
+        for sample in samples:
+            data = getattr(sample, "data", None)
+            if data is not None and hasattr(data, "memory_usage"):
+                # the same frame is often shared between work and datasets
+                frames[id(data)] = data
+        return int(sum(df.memory_usage(index=True).sum() for df in frames.values()))
+
+
+class WorkspaceRegistry:
+    def __init__(self, ttl: float, max_memory: int):
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self._workspaces: OrderedDict[str, Workspace] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._workspaces)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._workspaces
+
+    def get(self, session_id: str) -> Workspace:
+        """returns the workspace of a session, creating it if needed"""
+        with self._lock:
+            self._evict_expired()
+            workspace = self._workspaces.get(session_id)
+            if workspace is None:
+                workspace = self._workspaces[session_id] = Workspace(session_id)
+            else:
+                self._workspaces.move_to_end(session_id)
+            workspace.touch()
+            self._evict_over_memory(keep=session_id)
+            return workspace
+
+    @contextmanager
+    def session(self, session_id: str, readonly: bool = False) -> Iterator[Workspace]:
+        """the workspace of a session, for one request"""
+        yield self.get(session_id)
+
+    def update(self, session_id: str, fn: Callable[[Workspace], None]) -> None:
+        with self.session(session_id) as workspace:
+            fn(workspace)
+
+    def remove(self, session_id: str) -> None:
+        with self._lock:
+            self._workspaces.pop(session_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._workspaces.clear()
+
+    def memory_usage(self) -> int:
+        return sum(ws.memory_usage() for ws in self._workspaces.values())
+
+    def _evict_expired(self) -> None:
+        deadline = monotonic() - self.ttl
+        # ordered from least to most recently used
+        while self._workspaces:
+            session_id, workspace = next(iter(self._workspaces.items()))
+            if workspace.last_access > deadline:
+                break
+            del self._workspaces[session_id]
+
+    def _evict_over_memory(self, keep: str) -> None:
+        usage = {sid: ws.memory_usage() for sid, ws in self._workspaces.items()}
+        total = sum(usage.values())
+        for session_id in list(self._workspaces):
+            if total <= self.max_memory:
+                break
+            if session_id == keep:
+                continue
+            total -= usage[session_id]
+            del self._workspaces[session_id]
+
+
+def setup_workspaces(app: FastAPI, settings: ApplicationSettings) -> None:
+    app.state.workspaces = WorkspaceRegistry(
+        ttl=settings.WORKSPACE_TTL_SECONDS,
+        max_memory=settings.WORKSPACE_MAX_MEMORY_MB * 1024 * 1024,
+    )
+
+    @app.middleware("http")
+    async def _session_middleware(request: Request, call_next):
+        session_id = request.cookies.get(SESSION_COOKIE_NAME)
+        is_new = not session_id
+        if is_new:
+            session_id = uuid4().hex
+        request.state.session_id = session_id
+        # progress reported while serving the request goes to its session
+        token = progress.bind(session_id)
+        try:
+            response = await call_next(request)
+        finally:
+            progress.unbind(token)
+
+        if is_new:
+            response.set_cookie(
+                SESSION_COOKIE_NAME, session_id, httponly=True, samesite="strict"
+            )
+        return response
@@ -0,0 +1,49 @@
+"""The acceptance criterion |sard10g| <= mpe10g on known samples"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from iec62209.work import Sample
+from iec62209_service.utils.common import DataSetInterface, ModelInterface
+
+
+def dataset(sard10g: list[float], mpe10g: list[float]) -> DataSetInterface:
+    data = pd.DataFrame({"frequency": 900.0, "sard10g": sard10g, "mpe10g": mpe10g})
+    ds = DataSetInterface()
+    ds.sample = Sample(data, xvar=["frequency"], zvar=["sard10g"])
+    ds.headings = data.columns.tolist()
+    return ds
+
+
+def test_sample_within_the_criterion_is_accepted():
+    acceptance = ModelInterface.acceptance(dataset([0.1, -0.2, 0.3], [0.5, 0.5, 0.3]))
+    assert acceptance.accept
+    assert acceptance.violations() == []
+
+
+def test_violations_are_the_rows_past_the_criterion():
+    acceptance = ModelInterface.acceptance(dataset([0.1, -0.8, 0.3, 0.9], [0.5] * 4))
+    assert not acceptance.accept
+    assert [v["row"] for v in acceptance.violations()] == [1, 3]
+    assert [v["margin"] for v in acceptance.violations()] == pytest.approx([-0.3, -0.4])
+
+
+def test_missing_deviations_are_not_violations():
+    acceptance = ModelInterface.acceptance(dataset([np.nan, 0.1], [0.5, 0.5]))
+    assert acceptance.accept
+
+
+def test_empty_sample_is_accepted():
+    assert ModelInterface.acceptance(DataSetInterface()).accept
+
+
+def test_sample_without_the_criterion_columns_is_an_error():
+    ds = dataset([0.1], [0.5])
+    ds.sample.data = ds.sample.data.drop(columns="mpe10g")
+    with pytest.raises(Exception, match="mpe10g"):
+        ModelInterface.acceptance(ds)
+
+
+def test_acceptance_criteria_is_the_flag_of_the_acceptance():
+    assert ModelInterface.acceptance_criteria(dataset([0.1], [0.5]))
+    assert not ModelInterface.acceptance_criteria(dataset([0.6], [0.5]))
@@ -0,0 +1,32 @@
+"""Seeded generation of samples, batch by batch"""
+
+import random
+
+import numpy as np
+import pandas as pd
+from iec62209.work import Work
+from iec62209_service.utils import generation
+
+
+def batches(seed: int) -> list[pd.DataFrame]:
+    return [
+        sample.data
+        for sample in generation.iter_batches(Work(), 25, 100.0, 100.0, seed, 10)
+    ]
+
+
+def test_same_seed_draws_the_same_batches():
+    first, second = batches(7), batches(7)
+    assert [len(data) for data in first] == [10, 10, 5]
+    for a, b in zip(first, second):
+        pd.testing.assert_frame_equal(a, b)
+
+
+def test_global_random_state_is_restored():
+    random.seed(1)
+    np.random.seed(1)
+    expected = random.random(), np.random.random()
+    random.seed(1)
+    np.random.seed(1)
+    batches(7)
+    assert (random.random(), np.random.random()) == expected
@@ -0,0 +1,81 @@
+"""Round trips of fitted models through the JSON and npz model files"""
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.synthetic import MODEL_METADATA, measured_csv, measured_dataframe
+from iec62209_service.utils import modelformat
+from iec62209_service.utils.common import ModelInterface, ModelMetadata, SampleInterface
+
+
+@pytest.fixture(scope="module")
+def fitted() -> ModelInterface:
+    model = ModelInterface(SampleInterface())
+    model.load_init_sample(io.BytesIO(measured_csv(60)))
+    model.make_model()
+    model.set_metadata(ModelMetadata(**MODEL_METADATA))
+    return model
+
+
+def assert_same_model(loaded: ModelInterface, fitted: ModelInterface):
+    pd.testing.assert_frame_equal(
+        loaded.samples.trainingSet.data,
+        fitted.samples.trainingSet.data,
+        check_dtype=False,
+    )
+    assert loaded.get_metadata() == fitted.get_metadata()
+    configurations = measured_dataframe(20, seed=1)
+    pd.testing.assert_frame_equal(
+        loaded.predictor()(configurations), fitted.predictor()(configurations)
+    )
+
+
+def test_json_round_trip(fitted: ModelInterface, tmp_path):
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps(fitted.dump_model_to_json()))
+
+    loaded = ModelInterface(SampleInterface())
+    loaded.load_model_from_json(str(path))
+    assert_same_model(loaded, fitted)
+
+
+def test_npz_round_trip(fitted: ModelInterface):
+    content = fitted.dump_model_to_npz()
+    assert modelformat.is_npz(content)
+
+    loaded = ModelInterface(SampleInterface())
+    loaded.load_model_from_npz(io.BytesIO(content))
+    assert_same_model(loaded, fitted)
+
+
+def test_npz_keeps_column_types(fitted: ModelInterface):
+    content = modelformat.load_model_npz(io.BytesIO(fitted.dump_model_to_npz()))
+    data = content["sample"]["data"]
+    assert data["antenna"].dtype.kind == "U"
+    assert data["frequency"].dtype.kind in "if"
+    expected = fitted.samples.trainingSet.data
+    np.testing.assert_array_equal(data["modulation"], expected["modulation"])
+
+
+def test_npz_rejects_other_archives():
+    buf = io.BytesIO()
+    np.savez(buf, header=np.frombuffer(b"{}", dtype=np.uint8))
+    buf.seek(0)
+    with pytest.raises(Exception, match="Not an IEC62209 model file"):
+        modelformat.load_model_npz(buf)
+
+
+def test_npz_rejects_newer_versions(fitted: ModelInterface):
+    with np.load(io.BytesIO(fitted.dump_model_to_npz())) as npz:
+        arrays = {name: npz[name] for name in npz.files}
+    header = json.loads(arrays["header"].tobytes())
+    header["format"]["version"] = modelformat.FORMAT_VERSION + 1
+    arrays["header"] = np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    buf.seek(0)
+    with pytest.raises(Exception, match="not supported"):
+        modelformat.load_model_npz(buf)
@@ -0,0 +1,125 @@
+"""Pdf written by the native report backend, read back object by object"""
+
+import io
+import re
+import struct
+import zlib
+
+import pytest
+from benchmarks.synthetic import MODEL_METADATA, measured_csv
+from iec62209_service.reports import pdfdocument
+from iec62209_service.reports.builder import build_report
+from iec62209_service.reports.texutils import ReportBackend, ReportStage
+from iec62209_service.utils.common import ModelInterface, ModelMetadata, SampleInterface
+
+_OBJECT = re.compile(
+    rb"(\d+) 0 obj\n(.*?)(?:\nstream\n(.*?)\nendstream)?\nendobj\n", re.S
+)
+_LENGTH = re.compile(rb"/Length (\d+)")
+
+
+def read_pdf(content: bytes) -> dict[int, tuple[bytes, bytes | None]]:
+    """object number -> (dictionary, decoded stream), found through the xref table"""
+    assert content.startswith(b"%PDF-1.4\n")
+    assert content.endswith(b"%%EOF\n")
+    startxref = int(content[content.rindex(b"startxref") :].split()[1])
+    assert content[startxref:].startswith(b"xref\n")
+
+    lines = content[startxref:].split(b"\n")
+    first, count = map(int, lines[1].split())
+    assert first == 0
+    entries = lines[2 : 2 + count]
+    assert entries[0] == b"0000000000 65535 f "
+    trailer = b"\n".join(lines[2 + count :])
+    assert b"/Size %d" % count in trailer
+
+    objects = {}
+    for number, entry in enumerate(entries[1:], 1):
+        offset, generation, kind = entry.split()
+        assert (generation, kind) == (b"00000", b"n")
+        match = _OBJECT.match(content, int(offset))
+        assert match is not None, f"no object {number} at its offset"
+        assert int(match[1]) == number
+        head, stream = match[2], match[3]
+        if stream is not None:
+            assert int(_LENGTH.search(head)[1]) == len(stream)
+            if b"/FlateDecode" in head:
+                stream = zlib.decompress(stream)
+        objects[number] = (head, stream)
+    return objects
+
+
+def pages(objects: dict) -> list[bytes]:
+    """the decoded content of the pages, in order"""
+    root = next(head for head, _ in objects.values() if b"/Type /Pages" in head)
+    kids = [int(n) for n in re.findall(rb"(\d+) 0 R", root.split(b"/Kids")[1])]
+    assert b"/Count %d" % len(kids) in root
+    contents = []
+    for kid in kids:
+        head, _ = objects[kid]
+        assert b"/Type /Page " in head
+        number = int(re.search(rb"/Contents (\d+) 0 R", head)[1])
+        contents.append(objects[number][1])
+    return contents
+
+
+def png(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    rows = b"".join(b"\x00" + b"\x80\x40\x20" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def test_document_objects_are_where_the_xref_table_says(tmp_path):
+    figure = tmp_path / "figure.png"
+    figure.write_bytes(png(40, 30))
+
+    doc = pdfdocument.Document("Title", "Subtitle", "today", "footer")
+    doc.heading("Results", label="results")
+    doc.paragraph("Deviations Δ of sar_{10g} ≤ 1 dB, see [[table]] in [[results]].")
+    doc.table([["a", "b"], ["**1**", None]], "A table", label="table")
+    doc.figure(figure, "A figure")
+    doc.long_table(["x", "y"], [[str(i), str(2 * i)] for i in range(300)], "Many rows")
+    target = io.BytesIO()
+    doc.write(target)
+
+    objects = read_pdf(target.getvalue())
+    contents = pages(objects)
+    assert len(contents) > 1
+    for number, content in enumerate(contents, 1):
+        assert b"(Page %d of %d)" % (number, len(contents)) in content
+    text = b"".join(contents)
+    assert b"[[" not in text
+    assert b"Table 1" in text
+    images = [stream for head, stream in objects.values() if b"/Image" in head]
+    # rgb rows, each after its png filter byte
+    assert [len(image) for image in images] == [30 * (1 + 3 * 40)]
+
+
+@pytest.fixture(scope="module")
+def fitted() -> ModelInterface:
+    model = ModelInterface(SampleInterface())
+    model.load_init_sample(io.BytesIO(measured_csv(60)))
+    model.make_model()
+    model.goodfit_test()
+    model.set_metadata(ModelMetadata(**MODEL_METADATA))
+    return model
+
+
+def test_creation_report_is_a_valid_pdf(fitted: ModelInterface, tmp_path):
+    mainpdf = build_report(
+        ReportStage.CREATION, fitted, tmp_path, backend=ReportBackend.NATIVE
+    )
+    objects = read_pdf(mainpdf.read_bytes())
+    contents = pages(objects)
+    assert len(contents) > 1
+    images = [head for head, _ in objects.values() if b"/Image" in head]
+    assert len(images) == 4
@@ -0,0 +1,44 @@
+"""Batch evaluation of configurations, without a fitted model"""
+
+import io
+
+import pandas as pd
+import pytest
+from iec62209_service.utils import prediction
+
+
+def predict(data: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"sard10g": data["frequency"] * 1e-4, "err": 0.1}, index=data.index
+    )
+
+
+def test_chunks_are_read_from_the_upload():
+    source = io.BytesIO(b"frequency,power\n" + b"900,10\n" * 25)
+    chunks = prediction.read_configurations(source, prediction.CSV, chunk_rows=10)
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+
+
+def test_predictions_are_appended():
+    source = io.BytesIO(b"frequency,power\n900,10\n1800,20\n")
+    frames = prediction.predict_chunks(
+        predict, prediction.read_configurations(source, prediction.CSV, 10)
+    )
+    frame = pd.concat(frames)
+    assert frame.columns.tolist() == ["frequency", "power", "sard10g", "err"]
+    assert frame["sard10g"].tolist() == pytest.approx([0.09, 0.18])
+
+
+def test_predictions_replace_those_of_the_table():
+    source = io.BytesIO(b"frequency,sard10g,err,power\n900,5,5,10\n")
+    frames = prediction.predict_chunks(
+        predict, prediction.read_configurations(source, prediction.CSV, 10)
+    )
+    frame = pd.concat(frames)
+    assert frame.columns.tolist() == ["frequency", "power", "sard10g", "err"]
+    assert frame["err"].tolist() == [0.1]
+
+
+def test_empty_tables_fail_before_streaming():
+    with pytest.raises(Exception, match="Empty data set"):
+        prediction.predict_chunks(predict, iter([pd.DataFrame()]))
@@ -0,0 +1,75 @@
+"""Keys of the report cache follow what each report renders"""
+
+import io
+
+import pytest
+from benchmarks.synthetic import MODEL_METADATA, measured_csv
+from iec62209_service.reports.cache import ReportCache
+from iec62209_service.reports.texutils import ReportStage
+from iec62209_service.utils.common import ModelInterface, ModelMetadata, SampleInterface
+
+
+@pytest.fixture
+def fitted() -> ModelInterface:
+    model = ModelInterface(SampleInterface())
+    model.load_init_sample(io.BytesIO(measured_csv(60)))
+    model.make_model()
+    model.goodfit_test()
+    model.set_metadata(ModelMetadata(**MODEL_METADATA))
+    return model
+
+
+@pytest.fixture
+def cache(tmp_path) -> ReportCache:
+    return ReportCache(tmp_path, 10)
+
+
+def test_confirmation_key_follows_the_test_sample(fitted, cache):
+    fitted.load_test_sample(io.BytesIO(measured_csv(30, seed=1)))
+    before = cache.key(ReportStage.CONFIRMATION, fitted)
+    fitted.load_test_sample(io.BytesIO(measured_csv(30, seed=2)))
+    assert cache.key(ReportStage.CONFIRMATION, fitted) != before
+
+
+def test_confirmation_key_follows_the_residuals(fitted, cache):
+    fitted.load_test_sample(io.BytesIO(measured_csv(30, seed=1)))
+    before = cache.key(ReportStage.CONFIRMATION, fitted)
+    fitted.compute_residuals()
+    assert cache.key(ReportStage.CONFIRMATION, fitted) != before
+
+
+def test_verification_key_follows_the_critical_sample(fitted, cache):
+    fitted.load_critical_sample(io.BytesIO(measured_csv(30, seed=1)))
+    before = cache.key(ReportStage.VERIFICATION, fitted)
+    fitted.load_critical_sample(io.BytesIO(measured_csv(30, seed=2)))
+    assert cache.key(ReportStage.VERIFICATION, fitted) != before
+
+
+def test_creation_key_ignores_the_other_samples(fitted, cache):
+    before = cache.key(ReportStage.CREATION, fitted)
+    fitted.load_test_sample(io.BytesIO(measured_csv(30, seed=1)))
+    fitted.load_critical_sample(io.BytesIO(measured_csv(30, seed=2)))
+    assert cache.key(ReportStage.CREATION, fitted) == before
+
+
+def test_new_test_sample_drops_the_residuals(fitted):
+    fitted.load_test_sample(io.BytesIO(measured_csv(30, seed=1)))
+    fitted.compute_residuals()
+    fitted.load_test_sample(io.BytesIO(measured_csv(30, seed=2)))
+    with pytest.raises(Exception, match="Residuals"):
+        fitted.residuals_fingerprint()
+
+
+def test_model_fingerprint_ignores_the_metadata(fitted):
+    before = fitted.model_fingerprint()
+    fitted.set_metadata(ModelMetadata(**{**MODEL_METADATA, "systemName": "other"}))
+    assert fitted.model_fingerprint() == before
+    # and would be the same computed afresh, e.g. in another session
+    fitted._model_fingerprint = None
+    assert fitted.model_fingerprint() == before
+
+
+def test_report_key_follows_the_metadata(fitted, cache):
+    before = cache.key(ReportStage.CREATION, fitted)
+    fitted.set_metadata(ModelMetadata(**{**MODEL_METADATA, "systemName": "other"}))
+    assert cache.key(ReportStage.CREATION, fitted) != before
@@ -0,0 +1,63 @@
+"""Validation of measured csv uploads"""
+
+import io
+
+import pytest
+from benchmarks.synthetic import measured_dataframe
+from iec62209_service.utils.validation import (
+    REQUIRED,
+    ValidationError,
+    read_measured_csv,
+)
+
+
+def upload(size: int = 5, index: bool = False, **columns) -> io.BytesIO:
+    data = measured_dataframe(size)
+    for column, values in columns.items():
+        data[column] = data[column].astype(object)
+        for row, value in values.items():
+            data.loc[row, column] = value
+    return io.BytesIO(data.to_csv(index=index).encode())
+
+
+def messages(source: io.BytesIO) -> list[tuple[int, str, str]]:
+    with pytest.raises(ValidationError) as e:
+        read_measured_csv(source)
+    return [(i["line"], i["column"], i["message"]) for i in e.value.issues]
+
+
+def test_valid_upload_is_the_frame_of_the_sample():
+    assert read_measured_csv(upload()).columns.tolist() == REQUIRED
+
+
+def test_percent_and_decimal_comma_are_told_apart():
+    assert messages(upload(sar10g={0: "12%", 2: "1,5"})) == [
+        (2, "sar10g", "percentage: numbers must not be formatted"),
+        (4, "sar10g", "comma in number: use a dot as decimal separator, no separators"),
+    ]
+
+
+def test_text_is_not_a_number():
+    assert messages(upload(power={1: "high"})) == [(3, "power", "not a number")]
+
+
+def test_measured_sar_must_be_positive():
+    assert messages(upload(sar10g={3: 0.0})) == [(5, "sar10g", "must be positive")]
+
+
+def test_x_out_of_range():
+    assert messages(upload(x={0: 600})) == [(2, "x", "above the maximum of 500")]
+
+
+def test_empty_file():
+    with pytest.raises(ValidationError, match="empty file"):
+        read_measured_csv(io.BytesIO(b""))
+
+
+def test_headings_only():
+    with pytest.raises(ValidationError, match="no data"):
+        read_measured_csv(io.BytesIO(",".join(REQUIRED).encode() + b"\n"))
+
+
+def test_index_column_is_dropped():
+    assert read_measured_csv(upload(index=True)).columns.tolist() == REQUIRED